@@ -1,22 +1,33 @@
+import copy
 import random
-import quordle
+import time
+import patterns
+import filters
+import scoring
+import openingbook
+import words
+import rankings
+import letterstats
+import pruning
+import lookahead
+import scheduler
 
 # CLASS: AI
 # base class for AI that will try to guess the answer.
 # base one just picks a random word from its pool.
 # ARGS:
-# guessPool - list of answers it can use
+# guessPool - answers it can use (a list, a words.WordTable or a words.Pool)
 # numPools - the number of different word pools it must maintain.
 # (1 for wordle, 4 for quordle, etc.)
 class AI:
     def __init__(self, guessPool, numPools):
         self.guessPools = []
-        self.guessPools.append(guessPool)
+        self.guessPools.append(words.Pool.of(guessPool)) # view, not a copy
         self.poolToChooseFrom = self.guessPools[0]
         # make the desired number of word pools.
         i = 1
         while i < numPools:
-            temp = guessPool.copy() # need to make copies or python messes up
+            temp = self.guessPools[0].copy() # copies only the bitset
             self.guessPools.append(temp)
             i += 1
 
@@ -28,64 +39,89 @@ class AI:
         self.poolToChooseFrom.remove(ret) # remove choice once done.
         return ret
 
+    # the frequency strategies set this to count their letter tables over the
+    # words left in the pool they pick from each turn, instead of using the
+    # tables of the whole answer list.
+    Adaptive = False
+
+    # the best word of the pool to choose from by RankKey, scored with the
+    # letter tables of that pool. ties go to the first word in pool order.
+    def adaptiveWord(self):
+        ret = letterstats.bestWord(type(self), self.RankKey,
+                                   self.poolToChooseFrom)
+        self.poolToChooseFrom.remove(ret)
+        return ret
+
+    # a copy whose pools can be narrowed (and whose counters can move on)
+    # without touching this one. pools are words.Pools, so this copies a
+    # bitset per board.
+    def clone(self):
+        twin = copy.copy(self)
+        twin.guessPools = [pool.copy() for pool in self.guessPools]
+        chosen = getattr(self, 'poolToChooseFrom', None)
+        for i, pool in enumerate(self.guessPools):
+            if pool is chosen:
+                twin.poolToChooseFrom = twin.guessPools[i]
+        schedule = getattr(self, 'schedule', None)
+        if schedule is not None:
+            twin.schedule = schedule.copy()
+        return twin
+
     # function that picks the pool we should be taking a word from. generally,
     # i think it should be the pool with the largest number of possible words
-    # left, because we have the highest potential info gain that way.
+    # left, because we have the highest potential info gain that way. the
+    # scheduler ranks the boards: one with a single word left comes first (we
+    # need to guess it eventually and we get info from it), then the rest by
+    # PoolPolicy.
     def pickPool(self):
-        mostWordsLeft = 0
-        i = 0
-        for pool in self.guessPools:
-            length = len(self.guessPools[i])
-            if length == 1: # if only one possible word
-                self.poolToChooseFrom = self.guessPools[i]
-                break # immediately choose this word, because we need to
-                      # eventually and we can get info from it.
-            elif length > mostWordsLeft:
-                self.poolToChooseFrom = self.guessPools[i] # assigns pool with
-                                                           # words left
-                mostWordsLeft = length
-            i += 1
+        board = self.boardSchedule().choose(self.guessPools)
+        if board is not None:
+            self.poolToChooseFrom = self.guessPools[board]
+
+    # the scheduler.Scheduler of this AI, made on first use (some children
+    # set up their own pools, so not in __init__).
+    def boardSchedule(self):
+        schedule = getattr(self, 'schedule', None)
+        if schedule is None:
+            schedule = scheduler.Scheduler(self.PoolPolicy, self.goal)
+            self.schedule = schedule
+        return schedule
+
+    # counts a guess that was made without pickWord (one a player chose), so
+    # the scheduler's turns still match the guesses made.
+    def countGuess(self):
+        self.boardSchedule().turns += 1
+
+    # how pickPool ranks the boards: scheduler.LARGEST (most words left),
+    # ENTROPY, EXPECTED or DEADLINE.
+    PoolPolicy = scheduler.LARGEST
+
+    # most guesses that still win the game, set by quordle.PlayAGame. None
+    # for quordle.WinGoal of the number of boards.
+    goal = None
 
     # function that uses the hints provided by the game to eliminate
     # words from the pools. all children can use this function because
     # they will all work this way.
     def interpretHint(self, hint, guess, guessPool):
-            count = 0;
-            for letter in hint:
-                if letter == "G":
-                    self.greenLetter(guess[count], count, guessPool)
-                elif letter == "Y":
-                    self.yellowLetter(guess[count], count, guessPool)
-                elif letter == "B":
-                    self.blackLetter(guess[count], guessPool)
-                count += 1
-
-    # function that eliminates words from the pools that do not have
-    # the green letter in the same spot.
-    def greenLetter(self, letter, spot, guessPool):
-        for word in range(len(guessPool) - 1, -1, -1):
-            ex = guessPool[word]
-            if ex[spot] != letter:
-                guessPool.remove(ex)
-
-    # function that eliminates words from the pools that do not abide
-    # by the yellow rule (in word but different spot).
-    def yellowLetter(self, letter, spot, guessPool):
-        for word in range(len(guessPool) - 1, -1, -1):
-            ex = guessPool[word]
-            if letter not in ex:
-                guessPool.remove(ex)
-            if ex[spot] == letter:
-                guessPool.remove(ex)
-
-
-    # function that eliminates words from the pools that have an instance
-    # of a black letter.
-    def blackLetter(self, letter, guessPool):
-        for word in range(len(guessPool) - 1, -1, -1):
-            ex = guessPool[word]
-            if letter in ex:
-                guessPool.remove(ex)
+            if isinstance(guessPool, words.Pool): # one AND on the bitset
+                guessPool.narrow(guessPool.table.masks().compile(guess, hint))
+                return
+
+            masks = filters.defaultMasks() # compiled letter masks
+            if masks is not None:
+                kept = masks.filter(guessPool, guess, hint) # one pass
+                if kept is not None:
+                    guessPool[:] = kept # keep the same list object
+                    return
+
+            # words outside the masks: keep the ones that would have given
+            # this hint.
+            guess = patterns.cleanWord(guess)
+            code = patterns.hintCode(hint)
+            guessPool[:] = [word for word in guessPool
+                            if patterns.patternCode(
+                                guess, patterns.cleanWord(word)) == code]
 
     # def priority(self, ele):
     #     return len(list(set(ele)))
@@ -99,8 +135,8 @@ class UniqueWords(AI):
 
     def __init__(self, guessPool, numPools):
         self.guessPools = []
-        self.guessPools.append(guessPool)
-        self.guessPools[0].sort(key=self.priority, reverse=True)
+        self.guessPools.append(words.Pool.of(guessPool)) # view, not a copy
+        rankings.rankPool(self.guessPools[0], type(self), 'priority')
 
         i = 1
         while i < numPools:
@@ -137,8 +173,8 @@ class UniqueWords(AI):
 class Scrabble(AI):
     def __init__(self, guessPool, numPools):
         self.guessPools = []
-        self.guessPools.append(guessPool)
-        self.guessPools[0].sort(key=self.ScrabbleWord, reverse=True)
+        self.guessPools.append(words.Pool.of(guessPool)) # view, not a copy
+        rankings.rankPool(self.guessPools[0], type(self), 'ScrabbleWord')
 
         i = 1
         while i < numPools:
@@ -159,6 +195,9 @@ class Scrabble(AI):
             count += temp
         return count
 
+    # name of the method the pool is sorted by, best first.
+    RankKey = 'ScrabbleWord'
+
     ScrabbleValue = {
                 'a': 1, 'b': 3, 'c': 3, 'd': 2, 'e': 1,
                 'f': 4, 'g': 2, 'h': 4, 'i': 1, 'j': 8,
@@ -173,8 +212,8 @@ class Scrabble(AI):
 class CommonLetters(AI):
     def __init__(self, guessPool, numPools):
         self.guessPools = []
-        self.guessPools.append(guessPool)
-        self.guessPools[0].sort(key=self.CommonWord, reverse=True)
+        self.guessPools.append(words.Pool.of(guessPool)) # view, not a copy
+        rankings.rankPool(self.guessPools[0], type(self), 'CommonWord')
 
         i = 1
         while i < numPools:
@@ -184,6 +223,8 @@ class CommonLetters(AI):
 
     def pickWord(self):
         self.pickPool()
+        if self.Adaptive:
+            return self.adaptiveWord()
         ret = self.poolToChooseFrom[0]
         self.poolToChooseFrom.remove(ret)
         return ret
@@ -194,13 +235,11 @@ class CommonLetters(AI):
             count += self.PercentageValue[letter]
         return count
 
-    PercentageValue = {
-                'a': .393, 'b': .115, 'c': .194, 'd': .160, 'e': .456,
-                'f': .089, 'g': .130, 'h': .164, 'i': .280, 'j': .012,
-                'k': .087, 'l': .280, 'm': .129, 'n': .238, 'o': .291,
-                'p': .149, 'q': .013, 'r': .362, 's': .267, 't': .288,
-                'u': .197, 'v': .064, 'w': .084, 'x': .016, 'y': .180, 'z': .015
-        }
+    # name of the method the pool is sorted by, best first.
+    RankKey = 'CommonWord'
+
+    # how many of the answers have a letter, counted from the word list.
+    PercentageValue = letterstats.DefaultTable('PercentageValue')
 
 # CLASS - COMMONLETTERSPOTS
 # subclass of AI that is similar to CommonWords, but more nuanced in that it
@@ -208,8 +247,8 @@ class CommonLetters(AI):
 class CommonLetterSpots(AI):
     def __init__(self, guessPool, numPools):
         self.guessPools = []
-        self.guessPools.append(guessPool)
-        self.guessPools[0].sort(key=self.CommonLetterSpot, reverse=True)
+        self.guessPools.append(words.Pool.of(guessPool)) # view, not a copy
+        rankings.rankPool(self.guessPools[0], type(self), 'CommonLetterSpot')
 
         i = 1
         while i < numPools:
@@ -219,6 +258,8 @@ class CommonLetterSpots(AI):
 
     def pickWord(self):
         self.pickPool()
+        if self.Adaptive:
+            return self.adaptiveWord()
         ret = self.poolToChooseFrom[0]
         self.poolToChooseFrom.remove(ret)
         return ret
@@ -236,58 +277,32 @@ class CommonLetterSpots(AI):
             count += self.PercentageValue[letter]
         return count
 
-    PercentageValue = {
-                'a': .393, 'b': .115, 'c': .194, 'd': .160, 'e': .456,
-                'f': .089, 'g': .130, 'h': .164, 'i': .280, 'j': .012,
-                'k': .087, 'l': .280, 'm': .129, 'n': .238, 'o': .291,
-                'p': .149, 'q': .013, 'r': .362, 's': .267, 't': .288,
-                'u': .197, 'v': .064, 'w': .084, 'x': .016, 'y': .180, 'z': .015
-        }
+    # name of the method the pool is sorted by, best first.
+    RankKey = 'CommonLetterSpot'
+
+    # how many of the answers have a letter, counted from the word list.
+    PercentageValue = letterstats.DefaultTable('PercentageValue')
 
     # how common a letter is in the first spot of a word.
-    FirstLetter = {
-                'a': .061, 'b': .075, 'c': .086, 'd': .048, 'e': .031,
-                'f': .059, 'g': .050, 'h': .030, 'i': .015, 'j': .009,
-                'k': .009, 'l': .038, 'm': .046, 'n': .016, 'o': .018,
-                'p': .061, 'q': .010, 'r': .045, 's': .158, 't': .064,
-                'u': .014, 'v': .019, 'w': .036, 'x': 0, 'y': .003, 'z': .001
-        }
+    FirstLetter = letterstats.DefaultTable('FirstLetter')
 
     # how common a letter is in the second spot of a word.
-    SecondLetter = {
-                'a': .131, 'b': .007, 'c': .017, 'd': .009, 'e': .105,
-                'f': .003, 'g': .005, 'h': .062, 'i': .087, 'j': .001,
-                'k': .004, 'l': .087, 'm': .016, 'n': .038, 'o': .121,
-                'p': .026, 'q': .002, 'r': .115, 's': .007, 't': .033,
-                'u': .080, 'v': .007, 'w': .019, 'x': .006, 'y': .010, 'z': .001
-        }
+    SecondLetter = letterstats.DefaultTable('SecondLetter')
 
     # how common a letter is in the third spot of a word.
-    ThirdLetter = {
-                'a': .133, 'b': .025, 'c': .024, 'd': .032, 'e': .077,
-                'f': .011, 'g': .029, 'h': .004, 'i': .115, 'j': .001,
-                'k': .005, 'l': .048, 'm': .026, 'n': .060, 'o': .105,
-                'p': .025, 'q': .001, 'r': .070, 's': .035, 't': .048,
-                'u': .071, 'v': .021, 'w': .011, 'x': .005, 'y': .013, 'z': .005
-        }
+    ThirdLetter = letterstats.DefaultTable('ThirdLetter')
 
     # how common a letter in the fourth spot of a word.
-    FourthLetter = {
-                'a': .070, 'b': .010, 'c': .066, 'd': .030, 'e': .137,
-                'f': .015, 'g': .033, 'h': .012, 'i': .068, 'j': .001,
-                'k': .024, 'l': .070, 'm': .029, 'n': .079, 'o': .057,
-                'p': .022, 'q': 0, 'r': .066, 's': .074, 't': .060,
-                'u': .035, 'v': .020, 'w': .011, 'x': .001, 'y': .001, 'z': .009
-        }
+    FourthLetter = letterstats.DefaultTable('FourthLetter')
 
     # how commmon a letter is in the fifth spot of a word.
-    FifthLetter = {
-                'a': .028, 'b': .005, 'c': .013, 'd': .051, 'e': .183,
-                'f': .011, 'g': .018, 'h': .060, 'i': .005, 'j': 0,
-                'k': .049, 'l': .067, 'm': .018, 'n': .056, 'o': .025,
-                'p': .024, 'q': 0, 'r': .092, 's': .016, 't': .109,
-                'u': 0, 'v': 0, 'w': .007, 'x': .003, 'y': .157, 'z': .002
-        }
+    FifthLetter = letterstats.DefaultTable('FifthLetter')
+
+# CLASS: ADAPTIVELETTERSPOTS
+# CommonLetterSpots with its letter tables recounted over the pool it picks
+# from every turn, so the spots it likes follow what is left on the board.
+class AdaptiveLetterSpots(CommonLetterSpots):
+    Adaptive = True
 
 # CLASS::: STATICSTARTERS
 # Subclass of AI that starts with the same 2-3 words every game, from a
@@ -298,8 +313,8 @@ class StaticStarters(AI) :
     def __init__(self, guessPool, numPools):
         self.guessNum = 0
         self.guessPools = []
-        self.guessPools.append(guessPool)
-        self.guessPools[0].sort(key=self.CommonLetterSpot, reverse=True)
+        self.guessPools.append(words.Pool.of(guessPool)) # view, not a copy
+        rankings.rankPool(self.guessPools[0], type(self), 'CommonLetterSpot')
 
         i = 1
         while i < numPools:
@@ -309,10 +324,12 @@ class StaticStarters(AI) :
 
     def pickWord(self):
         self.pickPool()
-        if self.guessNum < 2:
+        if self.guessNum < self.NumStarters:
             if len(self.poolToChooseFrom) != 1:
                 self.guessNum += 1
                 return self.Starters[self.guessNum-1]
+        if self.Adaptive:
+            return self.adaptiveWord()
         ret = self.poolToChooseFrom[0]
         self.poolToChooseFrom.remove(ret)
         return ret
@@ -330,58 +347,29 @@ class StaticStarters(AI) :
             count += self.PercentageValue[letter]
         return count
 
-    PercentageValue = {
-                'a': .393, 'b': .115, 'c': .194, 'd': .160, 'e': .456,
-                'f': .089, 'g': .130, 'h': .164, 'i': .280, 'j': .012,
-                'k': .087, 'l': .280, 'm': .129, 'n': .238, 'o': .291,
-                'p': .149, 'q': .013, 'r': .362, 's': .267, 't': .288,
-                'u': .197, 'v': .064, 'w': .084, 'x': .016, 'y': .180, 'z': .015
-        }
+    # name of the method the pool is sorted by, best first.
+    RankKey = 'CommonLetterSpot'
+
+    # how many of the answers have a letter, counted from the word list.
+    PercentageValue = letterstats.DefaultTable('PercentageValue')
 
     # how common a letter is in the first spot of a word.
-    FirstLetter = {
-                'a': .061, 'b': .075, 'c': .086, 'd': .048, 'e': .031,
-                'f': .059, 'g': .050, 'h': .030, 'i': .015, 'j': .009,
-                'k': .009, 'l': .038, 'm': .046, 'n': .016, 'o': .018,
-                'p': .061, 'q': .010, 'r': .045, 's': .158, 't': .064,
-                'u': .014, 'v': .019, 'w': .036, 'x': 0, 'y': .003, 'z': .001
-        }
+    FirstLetter = letterstats.DefaultTable('FirstLetter')
 
     # how common a letter is in the second spot of a word.
-    SecondLetter = {
-                'a': .131, 'b': .007, 'c': .017, 'd': .009, 'e': .105,
-                'f': .003, 'g': .005, 'h': .062, 'i': .087, 'j': .001,
-                'k': .004, 'l': .087, 'm': .016, 'n': .038, 'o': .121,
-                'p': .026, 'q': .002, 'r': .115, 's': .007, 't': .033,
-                'u': .080, 'v': .007, 'w': .019, 'x': .006, 'y': .010, 'z': .001
-        }
+    SecondLetter = letterstats.DefaultTable('SecondLetter')
 
     # how common a letter is in the third spot of a word.
-    ThirdLetter = {
-                'a': .133, 'b': .025, 'c': .024, 'd': .032, 'e': .077,
-                'f': .011, 'g': .029, 'h': .004, 'i': .115, 'j': .001,
-                'k': .005, 'l': .048, 'm': .026, 'n': .060, 'o': .105,
-                'p': .025, 'q': .001, 'r': .070, 's': .035, 't': .048,
-                'u': .071, 'v': .021, 'w': .011, 'x': .005, 'y': .013, 'z': .005
-        }
+    ThirdLetter = letterstats.DefaultTable('ThirdLetter')
 
     # how common a letter in the fourth spot of a word.
-    FourthLetter = {
-                'a': .070, 'b': .010, 'c': .066, 'd': .030, 'e': .137,
-                'f': .015, 'g': .033, 'h': .012, 'i': .068, 'j': .001,
-                'k': .024, 'l': .070, 'm': .029, 'n': .079, 'o': .057,
-                'p': .022, 'q': 0, 'r': .066, 's': .074, 't': .060,
-                'u': .035, 'v': .020, 'w': .011, 'x': .001, 'y': .001, 'z': .009
-        }
+    FourthLetter = letterstats.DefaultTable('FourthLetter')
 
     # how commmon a letter is in the fifth spot of a word.
-    FifthLetter = {
-                'a': .028, 'b': .005, 'c': .013, 'd': .051, 'e': .183,
-                'f': .011, 'g': .018, 'h': .060, 'i': .005, 'j': 0,
-                'k': .049, 'l': .067, 'm': .018, 'n': .056, 'o': .025,
-                'p': .024, 'q': 0, 'r': .092, 's': .016, 't': .109,
-                'u': 0, 'v': 0, 'w': .007, 'x': .003, 'y': .157, 'z': .002
-        }
+    FifthLetter = letterstats.DefaultTable('FifthLetter')
+
+    # how many of the Starters are guessed before going by the ranking.
+    NumStarters = 2
 
     Starters = {
                 0: "raise",
@@ -393,11 +381,12 @@ class StaticStarters(AI) :
 # CLASS: ENTROPY
 # subclass of AI that starts with the static words but then attempts to
 # make guesses based on the entropy of the guesses left, meaning how much
-# they reduce the pool.
+# they reduce the pool. Scoring picks the rating: scoring.ENTROPY for the
+# expected information in bits, scoring.RATIO for the sum of before / after.
 class Entropy(AI):
     def __init__(self, guessPool, numPools):
         self.guessPools = []
-        self.guessPools.append(guessPool)
+        self.guessPools.append(words.Pool.of(guessPool)) # view, not a copy
         self.poolToChooseFrom = self.guessPools[0]
         self.guessNum = 0
 
@@ -408,8 +397,19 @@ class Entropy(AI):
             self.guessPools.append(temp)
             i += 1
 
-    def pickWord(self):
+    # budget - seconds the pick may take, None for TimeBudget. with a budget
+    # the guesses are scored against a growing sample of the pool until the
+    # time is up (see AnytimeRating).
+    def pickWord(self, budget=None):
+        if budget is None:
+            budget = self.TimeBudget
+        self.deadline = None
+        if budget is not None:
+            self.deadline = time.perf_counter() + budget
         self.pickPool()
+        self.pruned = None # guesses cut before scoring, if it scored any
+        self.evaluated = None # share of the pool the scores looked at, if
+                              # it scored any under a budget
         if self.guessNum < 3:
             if len(self.poolToChooseFrom) != 1:
                 self.guessNum += 1
@@ -418,11 +418,50 @@ class Entropy(AI):
             ret = self.poolToChooseFrom.pop()
             return ret
         else:
-            ret = self.EntropyRating()
-            self.poolToChooseFrom.remove(ret)
+            # the choice only depends on the pool, so look it up in the book
+            # shared by every game before rating the pool again.
+            book = openingbook.sharedBook(self.BookName())
+            ret = None
+            if book is not None:
+                ret = book.pick(self.poolToChooseFrom)
+            if ret is None:
+                ret = self.EntropyRating()
+                # a guess picked under a budget is not kept: the book is exact.
+                if book is not None and self.deadline is None:
+                    book.remember(self.poolToChooseFrom, ret)
+            if ret in self.poolToChooseFrom: # SearchAll can pick a non answer
+                self.poolToChooseFrom.remove(ret)
             return ret
 
+    # name of this AI's opening book, one per scoring method.
+    @classmethod
+    def BookName(cls):
+        return cls.__name__ + '-' + cls.Scoring
+
     def EntropyRating(self):
+        table = patterns.defaultTable()
+        pool = self.poolToChooseFrom
+        cols = rows = None
+        if table is not None: # score every guess at once from the table
+            cols = scoring.poolColumns(table, pool)
+            if cols is not None and self.deadline is not None:
+                ret = self.AnytimeRating(table, cols)
+                if ret is not None:
+                    return ret
+            rows = scoring.wordRows(table, pool)
+        if cols is not None and rows is not None:
+            # with the whole dictionary to search, guesses that would split
+            # the pool the same way as an earlier one, or not at all, are cut
+            # before scoring. the pool's words come first, so they win ties.
+            # (the pool's own words never split it the same way, so there is
+            # nothing to cut when only they are searched.)
+            if self.SearchAll:
+                rows, self.pruned = pruning.candidateRows(table, [pool],
+                                                          first=rows)
+            scores = scoring.scoreRows(table, rows, cols, self.Scoring)
+            return table.guesses[rows[scoring.bestIndex(scores)]]
+
+        # slow path for words outside the table: rates by before / after.
         before = len(self.poolToChooseFrom)
         max = self.poolToChooseFrom[0]
         maxRating = 0
@@ -433,10 +472,10 @@ class Entropy(AI):
             for secondWord in self.poolToChooseFrom:
                 newAnswers = self.poolToChooseFrom.copy()
                 newAI = AI(newAnswers, 1)
-                miniGame = quordle.Quordle(newAnswers, 1)
-                miniGame.answers[0] = secondWord
-                hint = miniGame.evaluateGuess(testWord[:5])
-                newAI.interpretHint(hint[0], testWord[:5], newAI.guessPools[0])
+                hint = patterns.HINTS[patterns.patternCode(
+                    patterns.cleanWord(testWord[:5]),
+                    patterns.cleanWord(secondWord))]
+                newAI.interpretHint(hint, testWord[:5], newAI.guessPools[0])
                 after = len(newAI.guessPools[0])
 
                 total += (before / after)
@@ -446,9 +485,255 @@ class Entropy(AI):
 
         return max
 
+    # EntropyRating before self.deadline, given the pool's table columns.
+    # the work before the first look at the clock is bounded whatever the
+    # size of the dictionary: with SearchAll only the best ranked guesses
+    # (pruning.leadRows) are pruned and scored, in that order, so a round the
+    # clock cuts short has scored the likeliest picks. a small pool's own
+    # words go first, since one of them is usually the pick; a big pool's
+    # are left to the ranking. returns None if the pool's words are not all
+    # in the table.
+    def AnytimeRating(self, table, cols):
+        pool = self.poolToChooseFrom
+        rows = []
+        stride = scoring.ROW_STRIDE
+        if not self.SearchAll or len(cols) <= scoring.SAMPLE_START:
+            rows = scoring.wordRows(table, pool)
+            if rows is None:
+                return None
+        if self.SearchAll:
+            rows = rows + pruning.leadRows(table, [pool])
+            rows, self.pruned = pruning.candidateRows(table, [pool], rows=rows)
+            stride = 1
+        order = cols
+        if len(cols) > scoring.SAMPLE_START:
+            if time.perf_counter() < self.deadline:
+                order = scoring.sampleOrder(cols, [table.answers[col][0]
+                                                   for col in cols])
+            else: # no time left to stratify, a plain sample has to do
+                order = random.sample(cols, scoring.SAMPLE_START)
+        scores, evaluated = scoring.scoreRowsAnytime(
+            table, rows, order, self.Scoring, self.deadline, stride)
+        self.evaluated = evaluated / len(cols)
+        return table.guesses[rows[scoring.bestIndex(scores)]]
+
+    # how guesses are rated once the starters are used up.
+    Scoring = scoring.ENTROPY
+
+    # also consider guesses that can't be the answer (the whole dictionary),
+    # not just the words left in the pool.
+    SearchAll = False
+
+    # seconds a pick may take by default, None to always score the whole pool.
+    TimeBudget = None
 
     Starters = {
                 0: "raise",
                 1: "clout",
                 2: "nymph",
     }
+
+
+# CLASS: WIDEENTROPY
+# Entropy that, after the starters, rates every word of the guess dictionary
+# on the chosen board instead of only the words still possible there.
+class WideEntropy(Entropy):
+    SearchAll = True
+
+
+# CLASS: ANYTIMEENTROPY
+# WideEntropy with a hard budget per guess: the pool's words and the best
+# ranked guesses of the dictionary are scored against a stratified sample of
+# the words left (by first letter), grown for as long as the budget lasts.
+class AnytimeEntropy(WideEntropy):
+    TimeBudget = 0.005
+
+    # reads WideEntropy's book: a pick found there is exact, and better than
+    # any this can make in its budget. it never writes to it.
+    @classmethod
+    def BookName(cls):
+        return WideEntropy.BookName()
+
+
+# CLASS: JOINTENTROPY
+# subclass of AI built for Quordle: instead of working on one board at a
+# time, every word in the guess dictionary (including words that can never be
+# an answer) is rated by its entropy summed over all unsolved boards, plus
+# SolveBonus times its chance of solving a board outright.
+class JointEntropy(AI):
+    def __init__(self, guessPool, numPools):
+        self.guessPools = []
+        self.guessPools.append(words.Pool.of(guessPool)) # view, not a copy
+        self.poolToChooseFrom = self.guessPools[0]
+
+        i = 1
+        while i < numPools:
+            temp = self.guessPools[0].copy()
+            self.guessPools.append(temp)
+            i += 1
+
+    def pickWord(self):
+        self.pickPool()
+        self.pruned = None # guesses cut before scoring, if it scored any
+        if len(self.poolToChooseFrom) == 1: # a board is down to one word
+            ret = self.poolToChooseFrom[0]
+        else:
+            ret = self.JointRating()
+            if ret is None: # words outside the table, fall back to random
+                ret = random.choice(self.poolToChooseFrom)
+
+        # the guess is done with on every board: either it is the answer, or
+        # the hint would rule it out anyway.
+        for pool in self.guessPools:
+            if ret in pool:
+                pool.remove(ret)
+        return ret
+
+    # returns the best guess for all the boards together, as the pool's own
+    # string if it is a possible answer. None if the table can't be used.
+    def JointRating(self):
+        table = patterns.defaultTable()
+        if table is None:
+            return None
+        live = [pool for pool in self.guessPools if len(pool) > 0]
+        poolsCols = []
+        for pool in live:
+            cols = scoring.poolColumns(table, pool)
+            if cols is None:
+                return None
+            poolsCols.append(cols)
+
+        # the choice only depends on the pools, so it is kept in a book.
+        book = openingbook.sharedBook(self.BookName())
+        key = openingbook.poolsKey(live) if book is not None else None
+        row = book.get(key) if key is not None else None
+        if row is None:
+            # guesses that split every pool like an earlier one, or tell
+            # nothing, are cut before scoring, and so are the ones whose
+            # entropy bound can't reach the best score (ratio scores have no
+            # bound, so every row is scored).
+            rows, self.pruned = pruning.candidateRows(table, live)
+            bounds = None
+            if self.Scoring == scoring.ENTROPY:
+                bounds = pruning.jointBounds(table, rows, poolsCols,
+                                             self.SolveBonus)
+            best, numScored = scoring.bestRowJoint(
+                table, rows, poolsCols, self.Scoring, self.SolveBonus, bounds)
+            self.pruned += len(rows) - numScored
+            row = rows[best]
+            if key is not None:
+                book.put(key, row)
+
+        word = table.guesses[row]
+        for pool in live: # hand back the pool's own string for answers
+            for candidate in pool:
+                if patterns.cleanWord(candidate) == word:
+                    return candidate
+        return word
+
+    # name of this AI's opening book.
+    @classmethod
+    def BookName(cls):
+        return '%s-%s-%g' % (cls.__name__, cls.Scoring, cls.SolveBonus)
+
+    # how guesses are rated on each board.
+    Scoring = scoring.ENTROPY
+
+    # worth (in the same units as the rating) of solving one board for sure.
+    SolveBonus = 1.0
+
+
+# CLASS: LOOKAHEAD
+# subclass of AI that searches more than one guess ahead. after its starter it
+# picks the guess that minimizes the guesses still needed on the chosen board
+# (the expected number, or the worst case), looking Depth guesses deep, plus
+# a quick estimate of what the guess leaves on the other boards. searched
+# pools are shared by every game in the process, so the common ones cost
+# nothing after the first game, and NodeBudget / TimeBudget bound each move.
+class Lookahead(AI):
+    def __init__(self, guessPool, numPools):
+        self.guessNum = 0
+        self.guessPools = []
+        self.guessPools.append(words.Pool.of(guessPool)) # view, not a copy
+        self.poolToChooseFrom = self.guessPools[0]
+
+        i = 1
+        while i < numPools:
+            temp = self.guessPools[0].copy()
+            self.guessPools.append(temp)
+            i += 1
+
+    def pickWord(self):
+        self.pickPool()
+        if self.guessNum < self.NumStarters:
+            if len(self.poolToChooseFrom) != 1:
+                self.guessNum += 1
+                return self.Starters[self.guessNum-1]
+        if len(self.poolToChooseFrom) <= 2: # nothing to search
+            ret = self.poolToChooseFrom[0]
+        else:
+            ret = self.SearchRating()
+            if ret is None: # words outside the table
+                ret = self.poolToChooseFrom[0]
+
+        # the guess is done with on every board: either it is the answer, or
+        # the hint would rule it out anyway.
+        for pool in self.guessPools:
+            if ret in pool:
+                pool.remove(ret)
+        return ret
+
+    # returns the guess the search picks, or None if the table can't be used.
+    def SearchRating(self):
+        table = patterns.defaultTable()
+        if table is None:
+            return None
+        pools = []
+        chosen = 0
+        for pool in self.guessPools:
+            if len(pool) == 0:
+                continue
+            cols = scoring.poolColumns(table, pool)
+            if cols is None:
+                return None
+            if pool is self.poolToChooseFrom:
+                chosen = len(pools)
+            pools.append(tuple(sorted(cols)))
+
+        tree = lookahead.sharedTree(table, self.Objective, self.Width,
+                                    self.RootWidth)
+        row = tree.bestMove(pools, chosen, self.Depth, self.NodeBudget,
+                            self.TimeBudget)
+        return table.guesses[row]
+
+    # what the search minimizes: lookahead.EXPECTED or lookahead.WORST.
+    Objective = lookahead.EXPECTED
+
+    # guesses searched, counting the one being picked.
+    Depth = 2
+
+    # guesses tried on every searched pool, and for the move itself.
+    Width = 8
+    RootWidth = 16
+
+    # most pools expanded per move, and seconds per move (None for no limit).
+    # out of budget, the best guess found so far is played.
+    NodeBudget = 5000
+    TimeBudget = None
+
+    NumStarters = 1
+
+    Starters = {
+                0: "raise",
+    }
+
+
+# FUNCTION: STRATEGYCLASSES
+# every AI class of this module by name, what the tools that take a strategy
+# name (the service, tournament.py, exhaustive.py) choose from.
+def strategyClasses():
+    found = {}
+    for name, value in list(globals().items()):
+        if isinstance(value, type) and issubclass(value, AI):
+            found[name] = value
+    return found
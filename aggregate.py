@@ -0,0 +1,325 @@
+import json
+import math
+import os
+
+# Running statistics of a run of games in constant memory: nothing is kept
+# per game, only the integer sums of the guess counts and of their squares
+# (which give the mean and variance), a histogram of guess counts (which
+# also gives the percentiles), and for every board a histogram of the turn
+# its word was found on. Guess counts are whole numbers, so statistics from
+# worker processes or a resumed run merge exactly, to the last bit of the
+# mean, and the whole state fits in a small JSON file, which is what lets
+# quordle.PlayLongRun stop and resume a run.
+#
+# The intervals are what a sequential run (quordle.PlayUntilConverged,
+# tournament.CompareUntilSettled) checks after every batch to decide whether
+# it has played enough games.
+
+STATS_VERSION = 2
+Z95 = 1.96 # 95% interval, looked at once
+# interval a sequential run checks after every batch. looking again and
+# again at a 95% interval stops early by chance far more than 5% of the time,
+# so it checks a wider one.
+Z_SEQUENTIAL = 3.0
+
+
+# CLASS: RUNSTATS
+# the statistics of the games played so far.
+# ARGS:
+# numWords - number of boards per game
+# goal - most guesses a game can take and still count as a win
+class RunStats:
+    def __init__(self, numWords, goal):
+        self.numWords = numWords
+        self.goal = goal
+        self.games = 0
+        self.total = 0 # sum of the guess counts
+        self.squares = 0 # sum of their squares
+        self.wins = 0
+        self.histogram = {} # guesses -> games
+        # solveTurns[board] - turn the board's word was found -> games
+        self.solveTurns = [{} for board in range(numWords)]
+
+    # adds one game that took numGuesses, with the turn every board was
+    # solved on if known.
+    def addGame(self, numGuesses, turns=None):
+        self.games += 1
+        self.total += numGuesses
+        self.squares += numGuesses * numGuesses
+        if numGuesses <= self.goal:
+            self.wins += 1
+        self.histogram[numGuesses] = self.histogram.get(numGuesses, 0) + 1
+        if turns is not None:
+            for board, turn in enumerate(turns):
+                counts = self.solveTurns[board]
+                counts[turn] = counts.get(turn, 0) + 1
+
+    # adds the games of other (from another process or chunk) to these.
+    def merge(self, other):
+        self.games += other.games
+        self.total += other.total
+        self.squares += other.squares
+        self.wins += other.wins
+        addCounts(self.histogram, other.histogram)
+        for board in range(self.numWords):
+            addCounts(self.solveTurns[board], other.solveTurns[board])
+
+    # mean guesses, rounded once from the exact sum.
+    @property
+    def mean(self):
+        if self.games == 0:
+            return 0.0
+        return self.total / self.games
+
+    # sample variance of the guess counts, from exact integer sums.
+    def variance(self):
+        if self.games < 2:
+            return 0.0
+        return ((self.games * self.squares - self.total * self.total) /
+                (self.games * (self.games - 1)))
+
+    # standard error of the mean.
+    def stderr(self):
+        if self.games == 0:
+            return 0.0
+        return math.sqrt(self.variance() / self.games)
+
+    # (low, high) interval of the mean guesses.
+    def meanInterval(self, z=Z95):
+        half = z * self.stderr()
+        return (self.mean - half, self.mean + half)
+
+    # (low, high) Wilson interval of the win rate, which stays sensible when
+    # the rate is close to 0 or 1.
+    def winInterval(self, z=Z95):
+        return wilsonInterval(self.wins, self.games, z)
+
+    def worst(self):
+        return max(self.histogram) if self.histogram else 0
+
+    def best(self):
+        return min(self.histogram) if self.histogram else 0
+
+    # the guess count p percent of the games took at most (nearest rank).
+    def percentile(self, p):
+        return histogramPercentile(self.histogram, p)
+
+    # (avg, winPct, worst, best), what PlayManyGames returns.
+    def totals(self):
+        if self.games == 0:
+            return (0, 0, 0, 0)
+        return (self.mean, self.wins / self.games, self.worst(), self.best())
+
+    # everything as a dict, for printing or saving.
+    def summary(self):
+        boards = []
+        for counts in self.solveTurns:
+            solved = sum(counts.values())
+            boards.append({
+                'mean': (sum([turn * n for turn, n in counts.items()]) /
+                         solved if solved else 0.0),
+                'p50': histogramPercentile(counts, 50),
+                'p90': histogramPercentile(counts, 90),
+                'turns': dict(sorted(counts.items())),
+            })
+        return {
+            'games': self.games,
+            'mean': self.mean,
+            'stdev': math.sqrt(self.variance()),
+            'stderr': self.stderr(),
+            'winPct': self.wins / self.games if self.games else 0.0,
+            'worst': self.worst(),
+            'best': self.best(),
+            'p50': self.percentile(50),
+            'p90': self.percentile(90),
+            'p99': self.percentile(99),
+            'histogram': dict(sorted(self.histogram.items())),
+            'boards': boards,
+        }
+
+    # the state as plain JSON types (dict keys become strings).
+    def state(self):
+        return {
+            'version': STATS_VERSION,
+            'numWords': self.numWords,
+            'goal': self.goal,
+            'games': self.games,
+            'total': self.total,
+            'squares': self.squares,
+            'wins': self.wins,
+            'histogram': {str(k): n for k, n in self.histogram.items()},
+            'solveTurns': [{str(k): n for k, n in counts.items()}
+                           for counts in self.solveTurns],
+        }
+
+    # the RunStats of a state() dict. raises ValueError on a bad state.
+    # a version 1 state (a float mean and m2) gets its sums back from its
+    # histogram, which holds every guess count.
+    @classmethod
+    def fromState(cls, state):
+        try:
+            if state['version'] not in (1, STATS_VERSION):
+                raise ValueError('stats version %r' % (state['version'],))
+            stats = cls(state['numWords'], state['goal'])
+            stats.games = state['games']
+            stats.wins = state['wins']
+            stats.histogram = {int(k): n for k, n in
+                               state['histogram'].items()}
+            if state['version'] == 1:
+                stats.total = sum([k * n for k, n in stats.histogram.items()])
+                stats.squares = sum([k * k * n for k, n in
+                                     stats.histogram.items()])
+            else:
+                stats.total = state['total']
+                stats.squares = state['squares']
+            stats.solveTurns = [{int(k): n for k, n in counts.items()}
+                                for counts in state['solveTurns']]
+        except (KeyError, TypeError, AttributeError) as error:
+            raise ValueError('bad stats state: %r' % (error,))
+        if len(stats.solveTurns) != stats.numWords:
+            raise ValueError('bad stats state: %d boards of solve turns'
+                             % len(stats.solveTurns))
+        return stats
+
+
+# CLASS: PAIREDSTATS
+# running statistics of the difference between two strategies played on the
+# same games (a's guesses minus b's, so negative means a did better).
+class PairedStats:
+    def __init__(self):
+        self.games = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.better = 0 # games a took fewer guesses
+        self.worse = 0
+        self.ties = 0
+
+    # adds one game a took guessesA and b took guessesB on.
+    def addPair(self, guessesA, guessesB):
+        diff = guessesA - guessesB
+        self.games += 1
+        delta = diff - self.mean
+        self.mean += delta / self.games
+        self.m2 += delta * (diff - self.mean)
+        if diff < 0:
+            self.better += 1
+        elif diff > 0:
+            self.worse += 1
+        else:
+            self.ties += 1
+
+    def stderr(self):
+        if self.games < 2:
+            return 0.0
+        return math.sqrt(self.m2 / (self.games - 1) / self.games)
+
+    # (low, high) interval of the mean difference.
+    def interval(self, z=Z95):
+        half = z * self.stderr()
+        return (self.mean - half, self.mean + half)
+
+    def summary(self, z=Z95):
+        return {'games': self.games, 'meanDiff': self.mean,
+                'stderr': self.stderr(), 'interval': self.interval(z),
+                'better': self.better, 'worse': self.worse,
+                'ties': self.ties}
+
+
+# FUNCTION: WILSONINTERVAL
+# (low, high) Wilson score interval of wins out of games.
+def wilsonInterval(wins, games, z=Z95):
+    if games == 0:
+        return (0.0, 1.0)
+    p = wins / games
+    scale = 1 + z * z / games
+    center = (p + z * z / (2 * games)) / scale
+    half = z * math.sqrt(p * (1 - p) / games +
+                         z * z / (4 * games * games)) / scale
+    return (max(0.0, center - half), min(1.0, center + half))
+
+
+# FUNCTION: ADDCOUNTS
+# adds the counts of one histogram dict to another.
+def addCounts(counts, other):
+    for key, n in other.items():
+        counts[key] = counts.get(key, 0) + n
+
+
+# FUNCTION: HISTOGRAMPERCENTILE
+# the smallest value at least p percent of a histogram's entries are at or
+# below, 0 for an empty histogram.
+def histogramPercentile(counts, p):
+    total = sum(counts.values())
+    if total == 0:
+        return 0
+    rank = max(1, math.ceil(p / 100 * total))
+    seen = 0
+    for value in sorted(counts):
+        seen += counts[value]
+        if seen >= rank:
+            return value
+    return max(counts)
+
+
+# FUNCTION: SUMMARIZETIMES
+# latency distribution of a list of times in seconds, reported in
+# microseconds (what bench.py and the service report).
+def summarizeTimes(times):
+    times = sorted(times)
+    n = len(times)
+    if n == 0:
+        return {'calls': 0}
+
+    def percentile(p):
+        return times[min(n - 1, int(p * n))] * 1e6
+
+    return {
+        'calls': n,
+        'meanUs': sum(times) / n * 1e6,
+        'p50Us': percentile(0.50),
+        'p90Us': percentile(0.90),
+        'p99Us': percentile(0.99),
+        'maxUs': times[-1] * 1e6,
+    }
+
+
+# CLASS: CHECKPOINT
+# a small state file for resuming a run: the run's settings, how many games
+# are done, and the RunStats of those games.
+# ARGS:
+# path - the state file
+# settings - dict describing the run (strategy, boards, seed, ...); a file
+# saved by a run with other settings is refused
+class Checkpoint:
+    def __init__(self, path, settings):
+        self.path = path
+        self.settings = settings
+
+    # (games done, stats) from the file, or None if there is no file.
+    # raises ValueError if the file belongs to another run or is damaged.
+    def load(self):
+        try:
+            with open(self.path) as stateFile:
+                saved = json.load(stateFile)
+        except FileNotFoundError:
+            return None
+        except ValueError as error:
+            raise ValueError('%s is not a checkpoint: %s' % (self.path, error))
+        if not isinstance(saved, dict) or saved.get('settings') != self.settings:
+            raise ValueError('%s is a checkpoint of another run' % self.path)
+        stats = RunStats.fromState(saved.get('stats'))
+        if saved.get('done') != stats.games:
+            raise ValueError('%s is a damaged checkpoint' % self.path)
+        return saved['done'], stats
+
+    # writes the state, through a temporary file so an interrupted save
+    # leaves the last one whole.
+    def save(self, done, stats):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp = '%s.%d.tmp' % (self.path, os.getpid())
+        with open(temp, 'w') as stateFile:
+            json.dump({'settings': self.settings, 'done': done,
+                       'stats': stats.state()}, stateFile)
+        os.replace(temp, self.path)
@@ -0,0 +1,277 @@
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+import AI
+import aggregate
+import patterns
+import filters
+import openingbook
+import quordle
+import words
+
+# Benchmarks for the solver's hot paths and whole games. Everything is seeded
+# so two runs on the same machine do the same work, and results are saved as
+# JSON so a later run can be compared against them:
+#
+#   python bench.py run --out baseline.json
+#   python bench.py compare baseline.json
+#
+# Strategies with an opening book (Entropy) pick much faster once a book has
+# been saved to cache/, so by default the books start out empty and a run
+# times the same work whatever is in cache/. --books reads the saved books,
+# and every result records which way it was run.
+
+BENCH_VERSION = 1
+
+STRATEGIES = ['AI', 'UniqueWords', 'Scrabble', 'CommonLetters',
+              'CommonLetterSpots', 'StaticStarters', 'Entropy']
+
+# metrics where bigger is better, everything else is a time or a size.
+HIGHER_IS_BETTER = ('gamesPerSec',)
+
+# metrics that can fail a comparison. tail latencies (p90, p99, max) are too
+# noisy on short runs, they are only reported.
+GATED = ('meanUs', 'p50Us', 'gamesPerSec', 'peakKiB')
+
+
+# FUNCTION: BENCHEVALUATEGUESS
+# times Quordle.evaluateGuess for random guesses against random 4 word games.
+def benchEvaluateGuess(answers, guesses, calls, seed):
+    rng = random.Random(seed)
+    times = []
+    for i in range(calls):
+        game = quordle.Quordle(answers, 4, rng.sample(answers, 4))
+        guess = rng.choice(guesses)[:5]
+        start = time.perf_counter()
+        game.evaluateGuess(guess)
+        times.append(time.perf_counter() - start)
+    return aggregate.summarizeTimes(times)
+
+
+# FUNCTION: BENCHINTERPRETHINT
+# times AI.interpretHint narrowing a full answer pool by a random guess and
+# the hint it would get for a random answer (copying the pool not included).
+def benchInterpretHint(answers, guesses, calls, seed):
+    rng = random.Random(seed)
+    myAI = AI.AI([], 1)
+    times = []
+    for i in range(calls):
+        game = quordle.Quordle(answers, 1, [rng.choice(answers)])
+        guess = rng.choice(guesses)[:5]
+        hint = game.evaluateGuess(guess)[0]
+        pool = words.Pool.of(answers)
+        start = time.perf_counter()
+        myAI.interpretHint(hint, guess, pool)
+        times.append(time.perf_counter() - start)
+    return aggregate.summarizeTimes(times)
+
+
+# FUNCTION: TIMEDGAME
+# plays one seeded game with quordle.PlayAGame, adding the time of every
+# pickWord call to pickTimes. returns the number of guesses. the game gets a
+# real instance of ai with only its bound pickWord wrapped, so everything
+# cached per class (rankings, opening book) is the same as in a real run.
+def timedGame(answers, numWords, ai, seed, pickTimes):
+    def timedAI(answers, numWords):
+        myAI = ai(answers, numWords)
+        pick = myAI.pickWord
+
+        def pickWord(*args):
+            start = time.perf_counter()
+            word = pick(*args)
+            pickTimes.append(time.perf_counter() - start)
+            return word
+        myAI.pickWord = pickWord
+        return myAI
+    timedAI.__name__ = ai.__name__
+
+    return quordle.PlayAGame(answers, numWords, timedAI, seed)
+
+
+# FUNCTION: BENCHSTRATEGY
+# plays numGames seeded games of an AI with 1 and 4 boards, repeat times.
+# reports pickWord latency (over every game), games per second of the fastest
+# repeat, average guesses and the peak memory traced while playing a few more
+# games.
+def benchStrategy(answers, ai, numGames, seed, repeat=3):
+    pickTimes = []
+    games = {}
+    for numWords in (1, 4):
+        elapsed = None
+        for r in range(repeat):
+            guesses = 0
+            start = time.perf_counter()
+            for j in range(numGames):
+                guesses += timedGame(answers, numWords, ai,
+                                     quordle.GameSeed(seed, j), pickTimes)
+            took = time.perf_counter() - start
+            if elapsed is None or took < elapsed:
+                elapsed = took
+
+        tracemalloc.start()
+        for j in range(min(numGames, 5)):
+            timedGame(answers, numWords, ai, quordle.GameSeed(seed, j), [])
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        games[str(numWords)] = {
+            'games': numGames,
+            'gamesPerSec': numGames / elapsed,
+            'avgGuesses': guesses / numGames,
+            'peakKiB': peak / 1024,
+        }
+    return aggregate.summarizeTimes(pickTimes), games
+
+
+# FUNCTION: RUNBENCHMARKS
+# runs the whole suite and returns the results as a dict.
+# ARGS:
+# numGames - games per strategy and board count
+# calls - calls timed for evaluateGuess and interpretHint
+# seed - base seed of every random choice
+# strategies - names of the AI classes to play
+# repeat - times each set of games is played, the fastest one counts
+# books - let strategies read the opening books saved by earlier runs
+def runBenchmarks(numGames=50, calls=2000, seed=0, strategies=STRATEGIES,
+                  repeat=3, books=False):
+    openingbook.LOAD_SAVED = books
+    openingbook.dropBooks() # books loaded before the setting changed
+    answers = words.defaultAnswers()
+    guesses = list(words.loadWords(patterns.GUESSES_PATH)) + list(answers)
+    patterns.defaultTable() # load shared tables before timing anything
+    filters.defaultMasks()
+
+    results = {
+        'evaluateGuess': benchEvaluateGuess(answers, guesses, calls, seed),
+        'interpretHint': benchInterpretHint(answers, guesses, calls, seed),
+        'pickWord': {},
+        'games': {},
+    }
+    for name in strategies:
+        picks, games = benchStrategy(answers, getattr(AI, name), numGames,
+                                     seed, repeat)
+        results['pickWord'][name] = picks
+        results['games'][name] = games
+
+    return {
+        'version': BENCH_VERSION,
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'seed': seed,
+        'games': numGames,
+        'calls': calls,
+        'repeat': repeat,
+        'books': books,
+        'results': results,
+    }
+
+
+# FUNCTION: FLATTEN
+# flattens nested result dicts into {'a/b/c': value}.
+def flatten(results, prefix=''):
+    flat = {}
+    for key, value in results.items():
+        if isinstance(value, dict):
+            flat.update(flatten(value, prefix + key + '/'))
+        else:
+            flat[prefix + key] = value
+    return flat
+
+
+# FUNCTION: COMPAREBENCHMARKS
+# compares a run against a baseline. a GATED time or size metric that grew by
+# more than tolerance (a fraction) or a throughput that fell by more than it
+# is a regression. counts like calls and avgGuesses are reported when they change
+# since that means the two runs did different work.
+# RETURNS:
+# (regressions, lines) - number of regressions and a printable report
+def compareBenchmarks(baseline, current, tolerance=0.2):
+    old = flatten(baseline['results'])
+    new = flatten(current['results'])
+    regressions = 0
+    lines = []
+    for key in sorted(old):
+        if key not in new:
+            lines.append('MISSING   %s' % key)
+            continue
+        before, after = old[key], new[key]
+        name = key.rsplit('/', 1)[-1]
+        if name in ('calls', 'games', 'avgGuesses'):
+            if before != after:
+                lines.append('CHANGED   %s: %s -> %s' % (key, before, after))
+            continue
+        if before == 0:
+            continue
+        change = (after - before) / before
+        if name in HIGHER_IS_BETTER:
+            worse = change < -tolerance
+        else:
+            worse = change > tolerance
+        if name not in GATED:
+            status = 'info     '
+        elif worse:
+            status = 'REGRESSED'
+            regressions += 1
+        else:
+            status = 'ok       '
+        lines.append('%s %s: %.1f -> %.1f (%+.0f%%)' % (
+            status, key, before, after, change * 100))
+    return regressions, lines
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Quordle solver benchmarks')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run = commands.add_parser('run', help='run the benchmarks')
+    run.add_argument('--out', help='save the results to this JSON file')
+    run.add_argument('--games', type=int, default=50)
+    run.add_argument('--calls', type=int, default=2000)
+    run.add_argument('--seed', type=int, default=0)
+    run.add_argument('--repeat', type=int, default=3)
+    run.add_argument('--strategies', nargs='+', default=STRATEGIES)
+    run.add_argument('--books', action='store_true',
+                     help='read the opening books saved in cache/')
+
+    compare = commands.add_parser('compare',
+                                  help='run again and compare to a baseline')
+    compare.add_argument('baseline')
+    compare.add_argument('--tolerance', type=float, default=0.2)
+    compare.add_argument('--out', help='also save this run to a JSON file')
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'run':
+        current = runBenchmarks(args.games, args.calls, args.seed,
+                                args.strategies, args.repeat, args.books)
+    else:
+        with open(args.baseline) as baselineFile:
+            baseline = json.load(baselineFile)
+        current = runBenchmarks(baseline['games'], baseline['calls'],
+                                baseline['seed'],
+                                list(baseline['results']['pickWord']),
+                                baseline.get('repeat', 3),
+                                baseline.get('books', False))
+
+    if args.out:
+        with open(args.out, 'w') as outFile:
+            json.dump(current, outFile, indent=2)
+
+    if args.command == 'run':
+        json.dump(current, sys.stdout, indent=2)
+        print()
+        return 0
+
+    regressions, lines = compareBenchmarks(baseline, current, args.tolerance)
+    print('\n'.join(lines))
+    print('\n%d REGRESSION(S)' % regressions)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
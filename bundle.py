@@ -0,0 +1,282 @@
+import array
+import hashlib
+import mmap
+import os
+import struct
+import sys
+
+import patterns
+
+# A prebuilt binary bundle of everything derived from the word lists, so a
+# run (or a worker process) maps one file instead of parsing the lists and
+# recomputing the same indexes: the clean word lists, the letter masks of the
+# answers, the letter frequency tables, and the rankings of the strategies
+# that hand words out in a fixed order. Build it with
+#
+#   python bundle.py
+#
+# The bundle is keyed by a sha256 of the word list files and of the modules
+# its sections are computed by (BUILD_MODULES: AI.py, which the rankings come
+# from, and the helpers that make the masks, tables and scores). Whenever one
+# of them changes the bundle is stale and simply ignored, and everything is
+# computed the old way until it is built again.
+
+BUNDLE_VERSION = 1 # bump whenever the layout of a section changes.
+MAGIC = b'QBND'
+HEADER = struct.Struct('<4sHHI32s') # magic, version, word length, number of
+                                    # sections, digest of the sources.
+ENTRY = struct.Struct('<48sQQ') # section name, offset, length
+BUNDLE_PATH = os.path.join(patterns.CACHE_DIR, 'bundle.bin')
+# modules whose code decides what goes in the bundle.
+BUILD_MODULES = ('AI', 'filters', 'letterstats', 'rankings', 'words',
+                 'patterns')
+SOURCES = (patterns.ANSWERS_PATH, patterns.GUESSES_PATH) + tuple(
+    [os.path.join(patterns.BASE_DIR, name + '.py') for name in BUILD_MODULES])
+
+ANSWERS = 'answers'
+GUESSES = 'guesses'
+MASKS = 'masks'
+STATS = 'stats'
+ALPHABET = 'abcdefghijklmnopqrstuvwxyz'
+RANK_PREFIX = 'rank/' # + class name + '/' + score method name
+# score methods the strategies of AI.py sort their pools by
+# (rankings.rankPool); every class that has one gets its order bundled.
+RANK_KEYS = ('priority', 'ScrabbleWord', 'CommonWord', 'CommonLetterSpot')
+
+
+# FUNCTION: SOURCEDIGEST
+# sha256 of the bundle version and the contents of the source files.
+# returns None if one of them can not be read.
+def sourceDigest(paths=SOURCES):
+    digest = hashlib.sha256(b'v%d\0' % BUNDLE_VERSION)
+    try:
+        for path in paths:
+            with open(path, 'rb') as source:
+                digest.update(source.read())
+            digest.update(b'\0')
+    except OSError:
+        return None
+    return digest.digest()
+
+
+# CLASS: BUNDLE
+# a mapped bundle file. sections are read on demand.
+# ARGS:
+# data - the mapped file (anything bytes-like)
+# sections - name -> (offset, length)
+class Bundle:
+    def __init__(self, data, sections):
+        self.data = data
+        self.sections = sections
+
+    def __contains__(self, name):
+        return name in self.sections
+
+    # the bytes of a section, or None if the bundle does not have it.
+    def section(self, name):
+        found = self.sections.get(name)
+        if found is None:
+            return None
+        offset, length = found
+        return self.data[offset:offset + length]
+
+    # a word list section as a list of words.
+    def words(self, name):
+        raw = self.section(name)
+        if raw is None:
+            return None
+        return bytes(raw).decode('ascii').split('\n')
+
+    # the (green, present, atLeast) masks of the answers, laid out like
+    # filters.WordMasks.
+    def masks(self, numWords):
+        raw = self.section(MASKS)
+        if raw is None:
+            return None
+        size = maskBytes(numWords)
+        ints = [int.from_bytes(raw[i:i + size], 'little')
+                for i in range(0, len(raw), size)]
+        alphabet = len(ALPHABET)
+        spots = patterns.WORD_LENGTH
+        green = [dict(zip(ALPHABET, ints[spot * alphabet:
+                                         (spot + 1) * alphabet]))
+                 for spot in range(spots)]
+        start = spots * alphabet
+        present = dict(zip(ALPHABET, ints[start:start + alphabet]))
+        start += alphabet
+        full = (1 << numWords) - 1
+        atLeast = {}
+        for i, letter in enumerate(ALPHABET):
+            first = start + i * spots
+            atLeast[letter] = [full] + ints[first:first + spots]
+        return green, present, atLeast
+
+    # (count, present, spots) of the answers' letter frequency tables, laid
+    # out like letterstats.LetterStats.
+    def stats(self):
+        raw = self.section(STATS)
+        if raw is None:
+            return None
+        values = array.array('d')
+        values.frombytes(bytes(raw))
+        alphabet = len(ALPHABET)
+        count = int(values[0])
+        present = dict(zip(ALPHABET, values[1:1 + alphabet]))
+        spots = []
+        for spot in range(patterns.WORD_LENGTH):
+            start = 1 + alphabet * (spot + 1)
+            spots.append(dict(zip(ALPHABET, values[start:start + alphabet])))
+        return count, present, spots
+
+    # the table positions of the answers in the order a strategy's score
+    # method ranks them (highest first), or None if it was not bundled.
+    def rankOrder(self, className, keyName):
+        raw = self.section(RANK_PREFIX + className + '/' + keyName)
+        if raw is None:
+            return None
+        order = array.array('H')
+        order.frombytes(bytes(raw))
+        return order.tolist()
+
+
+# FUNCTION: MASKBYTES
+# bytes one mask over numWords words takes.
+def maskBytes(numWords):
+    return (numWords + 7) // 8
+
+
+# FUNCTION: LOADBUNDLE
+# maps the bundle at path and checks it against the current sources.
+# returns None if it is missing, damaged or stale.
+def loadBundle(path=BUNDLE_PATH, digest=None):
+    if digest is None:
+        digest = sourceDigest()
+        if digest is None:
+            return None
+    try:
+        with open(path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    try:
+        magic, version, length, count, saved = HEADER.unpack_from(mapped)
+        if (magic != MAGIC or version != BUNDLE_VERSION or
+                length != patterns.WORD_LENGTH or saved != digest):
+            mapped.close()
+            return None
+        sections = {}
+        for i in range(count):
+            name, offset, size = ENTRY.unpack_from(
+                mapped, HEADER.size + i * ENTRY.size)
+            if offset + size > len(mapped):
+                raise ValueError('section past the end of the file')
+            sections[name.rstrip(b'\0').decode('ascii')] = (offset, size)
+    except (struct.error, ValueError, UnicodeDecodeError):
+        mapped.close()
+        return None
+    return Bundle(memoryview(mapped), sections)
+
+
+# FUNCTION: SAVEBUNDLE
+# writes sections (name -> bytes) as a bundle for digest. written to a temp
+# file and renamed so other processes never map a half written bundle.
+def saveBundle(path, digest, sections):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    names = sorted(sections)
+    offset = HEADER.size + ENTRY.size * len(names)
+    directory = b''
+    for name in names:
+        directory += ENTRY.pack(name.encode('ascii'), offset,
+                                len(sections[name]))
+        offset += len(sections[name])
+    temp = '%s.%d.tmp' % (path, os.getpid())
+    with open(temp, 'wb') as out:
+        out.write(HEADER.pack(MAGIC, BUNDLE_VERSION, patterns.WORD_LENGTH,
+                              len(names), digest))
+        out.write(directory)
+        for name in names:
+            out.write(sections[name])
+    os.replace(temp, path)
+
+
+# FUNCTION: BUILDBUNDLE
+# computes every section from the sources and saves the bundle.
+# ARGS:
+# path - file to write
+# RETURNS:
+# sections - name -> bytes of what was written
+def buildBundle(path=BUNDLE_PATH):
+    # imported here: they load the bundle themselves, so this module can't
+    # import them at the top.
+    import AI
+    import letterstats
+    import rankings
+    import words
+
+    digest = sourceDigest()
+    if digest is None:
+        raise OSError('the word lists or the modules can not be read')
+    answers = patterns.readWords(patterns.ANSWERS_PATH)
+    guesses = patterns.readWords(patterns.GUESSES_PATH)
+    sections = {
+        ANSWERS: '\n'.join(answers).encode('ascii'),
+        GUESSES: '\n'.join(guesses).encode('ascii'),
+    }
+
+    table = words.WordTable(answers) # computed, not read from a bundle
+    masks = table.masks()
+    size = maskBytes(len(table))
+    ints = []
+    for spot in range(patterns.WORD_LENGTH):
+        ints += [masks.green[spot][letter] for letter in ALPHABET]
+    ints += [masks.present[letter] for letter in ALPHABET]
+    for letter in ALPHABET:
+        ints += masks.atLeast[letter][1:]
+    sections[MASKS] = b''.join([value.to_bytes(size, 'little')
+                                for value in ints])
+
+    stats = letterstats.countStats(masks, masks.full)
+    values = [float(stats.count)]
+    values += [stats.present[letter] for letter in ALPHABET]
+    for spot in range(patterns.WORD_LENGTH):
+        values += [stats.spots[spot][letter] for letter in ALPHABET]
+    sections[STATS] = array.array('d', values).tobytes()
+
+    for name, ai in AI.strategyClasses().items():
+        for keyName in RANK_KEYS:
+            if not callable(getattr(ai, keyName, None)):
+                continue
+            scores = rankings.scoreVector(table, ai, keyName)
+            order = sorted(range(len(table)), key=scores.__getitem__,
+                           reverse=True)
+            sections[RANK_PREFIX + name + '/' + keyName] = \
+                array.array('H', order).tobytes()
+
+    saveBundle(path, digest, sections)
+    return sections
+
+
+_shared = None
+_sharedLoaded = False
+
+# FUNCTION: SHAREDBUNDLE
+# the bundle at BUNDLE_PATH, mapped on first use, or None if there is no
+# fresh one.
+def sharedBundle():
+    global _shared, _sharedLoaded
+    if not _sharedLoaded:
+        _sharedLoaded = True
+        _shared = loadBundle()
+    return _shared
+
+
+def main():
+    sections = buildBundle()
+    size = sum([len(data) for data in sections.values()])
+    print('wrote %s: %d sections, %d bytes' % (BUNDLE_PATH, len(sections),
+                                               size))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
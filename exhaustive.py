@@ -0,0 +1,280 @@
+import argparse
+import itertools
+import math
+import random
+import sys
+
+import AI
+import patterns
+import quordle
+import aggregate
+import tournament
+import words
+
+# Exact evaluation instead of random games.
+#
+# With one board a strategy can be played against every answer. Rather than
+# playing 2315 games, WalkTree walks the strategy's decision tree: at every
+# node the AI picks once, the answers still hidden there are split by the
+# hint they would give, and each group goes on with its own copy of the AI.
+# Games with the same hints so far share every pick, so the whole list costs
+# one pick per distinct position: 2300 to 2900 for the strategies here,
+# against about 9000 when the games are played one by one.
+#
+# With more boards the tuples are far too many to enumerate, so they are
+# stratified instead: every answer is put in a stratum by how many guesses
+# the strategy needs for it on its own, every combination of strata (which
+# strata the boards' words come from) is played with the same number of
+# tuples, and the results are weighted by how likely each combination is.
+# Rare combinations (every word hard) are covered, and the mean is
+# estimated with less noise than plain random games give.
+
+MAX_TURNS = 30 # a strategy that needs more than this on one board is stuck
+STRATUM_LOW = 3 # answers solved in this many guesses or fewer share a stratum
+STRATUM_HIGH = 5 # and so do the ones that take this many or more
+
+
+# CLASS: WALKRESULT
+# the exact results of a strategy over every answer.
+# ARGS:
+# stats - aggregate.RunStats over every answer
+# guesses - answer -> guesses the strategy needs for it
+# failures - (answer, guesses) of the answers it takes more than goal for
+# picks - number of picks the walk made (distinct positions)
+class WalkResult:
+    def __init__(self, stats, guesses, failures, picks):
+        self.stats = stats
+        self.guesses = guesses
+        self.failures = failures
+        self.picks = picks
+        # the exact mean: one division of the whole sum, not a running mean
+        self.mean = sum(guesses.values()) / len(guesses) if guesses else 0.0
+
+
+# FUNCTION: SPLITHIDDEN
+# groups hidden words by the pattern code guess gets against them.
+def splitHidden(table, guess, hidden):
+    row = table.rowOf(guess) if table is not None else None
+    groups = {}
+    for word in hidden:
+        col = table.colOf(word) if row is not None else None
+        if col is not None:
+            code = table.data[row * table.numCols + col]
+        else: # outside the table, score it the slow way
+            code = patterns.patternCode(guess, patterns.cleanWord(word))
+        group = groups.get(code)
+        if group is None:
+            groups[code] = [word]
+        else:
+            group.append(word)
+    return groups
+
+
+# FUNCTION: WALKTREE
+# plays a strategy against every answer of one board at once, by walking its
+# decision tree. the strategy should be deterministic; for one that draws on
+# random, every position is seeded from the hints that led to it, so the walk
+# is repeatable but does not match any run of PlayAGame.
+# ARGS:
+# answers - valid answers, every one of them is played
+# ai - the AI class
+# goal - most guesses that still win, None for quordle.WinGoal(1)
+# seed - base of the seeds of every position
+# RETURNS:
+# result - WalkResult
+def WalkTree(answers, ai, goal=None, seed=0):
+    if goal is None:
+        goal = quordle.WinGoal(1)
+    answers = words.asTable(answers)
+    table = patterns.defaultTable()
+    guesses = {}
+    picks = 0
+
+    # each entry: the AI ready to pick, the answers still hidden, the number
+    # of guesses made and the codes they got.
+    stack = [(ai(answers, 1), list(answers), 0, ())]
+    while stack:
+        node, hidden, made, history = stack.pop()
+        random.seed('%d:%s' % (seed, ','.join(map(str, history))))
+        word = patterns.cleanWord(node.pickWord())
+        picks += 1
+        turn = made + 1
+        groups = splitHidden(table, word, hidden)
+        last = len(groups) - 1
+        for i, (code, group) in enumerate(groups.items()):
+            if code == patterns.SOLVED:
+                guesses[group[0]] = turn
+                continue
+            if turn >= MAX_TURNS:
+                raise RuntimeError('%s is stuck after %d guesses on %s'
+                                   % (ai.__name__, turn, group))
+            child = node if i == last else node.clone()
+            child.interpretHint(patterns.HINTS[code], word,
+                                child.guessPools[0])
+            stack.append((child, group, turn, history + (code,)))
+
+    stats = aggregate.RunStats(1, goal)
+    failures = []
+    for word in answers:
+        stats.addGame(guesses[word], [guesses[word]])
+        if guesses[word] > goal:
+            failures.append((word, guesses[word]))
+    return WalkResult(stats, guesses, failures, picks)
+
+
+# FUNCTION: STRATA
+# the strata of the answers by the guesses a strategy needs for them alone:
+# stratum -> list of answers.
+def Strata(walk):
+    strata = {}
+    for word, count in walk.guesses.items():
+        key = min(max(count, STRATUM_LOW), STRATUM_HIGH)
+        strata.setdefault(key, []).append(word)
+    return strata
+
+
+# FUNCTION: COMBOWEIGHT
+# chance that numWords different answers drawn at random fall in the strata
+# of combo (a sorted tuple of stratum keys, one per board).
+def comboWeight(combo, strata, total):
+    weight = math.factorial(len(combo))
+    for key, count in zip(*uniqueCounts(combo)):
+        size = len(strata[key])
+        weight /= math.factorial(count)
+        for k in range(count):
+            weight *= size - k
+    for k in range(len(combo)):
+        weight /= total - k
+    return weight
+
+
+# FUNCTION: UNIQUECOUNTS
+# the distinct keys of a sorted tuple and how often each appears.
+def uniqueCounts(combo):
+    keys = []
+    counts = []
+    for key, group in itertools.groupby(combo):
+        keys.append(key)
+        counts.append(len(list(group)))
+    return keys, counts
+
+
+# FUNCTION: STRATIFIEDTUPLES
+# perCombo random tuples of hidden words for every combination of strata.
+# ARGS:
+# strata - stratum -> answers
+# numWords - number of boards
+# perCombo - tuples per combination
+# rng - random.Random the tuples come from
+# RETURNS:
+# combos - list of (combo, weight, tuples), weight being the chance of the
+# combination; combinations whose strata are too small are left out
+def StratifiedTuples(strata, numWords, perCombo, rng):
+    total = sum([len(group) for group in strata.values()])
+    combos = []
+    for combo in itertools.combinations_with_replacement(sorted(strata),
+                                                         numWords):
+        weight = comboWeight(combo, strata, total)
+        if weight == 0:
+            continue
+        tuples = []
+        for j in range(perCombo):
+            hidden = []
+            for key, count in zip(*uniqueCounts(combo)):
+                hidden += rng.sample(strata[key], count)
+            rng.shuffle(hidden) # any board can hold any stratum
+            tuples.append(hidden)
+        combos.append((combo, weight, tuples))
+    return combos
+
+
+# FUNCTION: EVALUATESTRATIFIED
+# estimates a strategy's results on numWords boards from stratified tuples.
+# ARGS:
+# answers - valid answers
+# numWords - number of boards
+# ai - the AI class
+# perCombo - tuples played per combination of strata
+# seed - seed of the tuples and of the games
+# workers - number of processes to play on
+# goal - most guesses that still win, None for quordle.WinGoal(numWords)
+# RETURNS:
+# report - dict with the weighted mean and its standard error, the weighted
+# win rate, every combination's results and the failing tuples
+def EvaluateStratified(answers, numWords, ai, perCombo=20, seed=0, workers=1,
+                       goal=None):
+    if goal is None:
+        goal = quordle.WinGoal(numWords)
+    answers = words.asTable(answers)
+    strata = Strata(WalkTree(answers, ai, seed=seed))
+    combos = StratifiedTuples(strata, numWords, perCombo,
+                              random.Random('stratified:%d' % seed))
+
+    hidden = [one for combo, weight, tuples in combos for one in tuples]
+    counts = tournament.PlayStrategy(answers, numWords, ai, hidden, seed,
+                                     workers)
+    mean = 0.0
+    variance = 0.0
+    winRate = 0.0
+    rows = []
+    failures = []
+    for i, (combo, weight, tuples) in enumerate(combos):
+        stats = aggregate.RunStats(numWords, goal)
+        for j in range(len(tuples)):
+            count = counts[i * perCombo + j]
+            stats.addGame(count)
+            if count > goal:
+                failures.append((tuples[j], count))
+        mean += weight * stats.mean
+        variance += weight * weight * stats.variance() / stats.games
+        winRate += weight * stats.wins / stats.games
+        rows.append({'combo': combo, 'weight': weight, 'mean': stats.mean,
+                     'winPct': stats.wins / stats.games})
+    return {'games': len(hidden), 'mean': mean, 'stderr': math.sqrt(variance),
+            'winPct': winRate, 'goal': goal, 'combos': rows,
+            'strata': {key: len(group) for key, group in strata.items()},
+            'failures': failures}
+
+
+def main(argv=None):
+    strategies = AI.strategyClasses()
+    parser = argparse.ArgumentParser(
+        description='exact (1 board) or stratified (more boards) evaluation')
+    parser.add_argument('strategy', choices=sorted(strategies))
+    parser.add_argument('--boards', type=int, default=1)
+    parser.add_argument('--per-combo', type=int, default=20,
+                        help='tuples per combination of strata')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=1)
+    args = parser.parse_args(argv)
+
+    answers = words.defaultAnswers()
+    ai = strategies[args.strategy]
+    if args.boards == 1:
+        walk = WalkTree(answers, ai, seed=args.seed)
+        summary = walk.stats.summary()
+        print('%s over all %d answers (%d picks): mean %.4f, win %.2f%%'
+              % (args.strategy, summary['games'], walk.picks,
+                 walk.mean, summary['winPct'] * 100))
+        print('guesses: %s' % summary['histogram'])
+        print('failures: %s' % ' '.join(['%s(%d)' % failure
+                                         for failure in walk.failures]))
+        return 0
+
+    report = EvaluateStratified(answers, args.boards, ai, args.per_combo,
+                                args.seed, args.workers)
+    print('%s on %d boards, %d stratified games: mean %.4f +- %.4f, win '
+          '%.2f%%' % (args.strategy, args.boards, report['games'],
+                      report['mean'], report['stderr'],
+                      report['winPct'] * 100))
+    print('strata (solo guesses -> answers): %s' % report['strata'])
+    for row in report['combos']:
+        print('  %-16s weight %.4f  mean %.3f  win %.1f%%' % (
+            '-'.join(map(str, row['combo'])), row['weight'], row['mean'],
+            row['winPct'] * 100))
+    print('%d failing tuples' % len(report['failures']))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,174 @@
+from functools import lru_cache
+
+import patterns
+
+# Pool filtering with bitsets. A pool over a word list is an int with bit i
+# set when word i is still possible. Every (spot, letter) and letter gets a
+# precomputed mask of the words it matches, so a (guess, hint) pair compiles
+# to a single mask of the words it allows and narrowing a pool is one AND.
+# Repeated letters are handled with count masks: a letter the hint marks G
+# or Y n times needs at least n copies in the word, and exactly n if one of
+# its copies in the guess also got a B.
+
+ALPHABET = 'abcdefghijklmnopqrstuvwxyz'
+
+
+# CLASS: WORDMASKS
+# per-position and per-letter bitmasks over a fixed list of words.
+# ARGS:
+# words - the word list, bit i of every mask is words[i]
+class WordMasks:
+    def __init__(self, words):
+        self.words = [patterns.cleanWord(w) for w in words]
+        self.index = {}
+        for i, word in enumerate(self.words):
+            self.index.setdefault(word, i)
+        self.full = (1 << len(self.words)) - 1
+
+        # green[spot][letter] - words with letter at spot
+        # present[letter] - words with letter anywhere
+        # atLeast[letter][k] - words with k or more copies of letter
+        self.green = [dict.fromkeys(ALPHABET, 0)
+                      for i in range(patterns.WORD_LENGTH)]
+        self.present = dict.fromkeys(ALPHABET, 0)
+        self.atLeast = {letter: [self.full] + [0] * patterns.WORD_LENGTH
+                        for letter in ALPHABET}
+        for i, word in enumerate(self.words):
+            bit = 1 << i
+            for spot in range(patterns.WORD_LENGTH):
+                self.green[spot][word[spot]] = \
+                    self.green[spot].get(word[spot], 0) | bit
+            for letter in set(word):
+                self.present[letter] = self.present.get(letter, 0) | bit
+                counts = self.atLeast.setdefault(
+                    letter, [self.full] + [0] * patterns.WORD_LENGTH)
+                for k in range(1, word.count(letter) + 1):
+                    counts[k] |= bit
+
+    # WordMasks of words from masks computed before (by bundle.py), without
+    # going over the words again. green, present and atLeast are laid out
+    # like the attributes of the same names.
+    @classmethod
+    def prebuilt(cls, words, green, present, atLeast):
+        masks = cls.__new__(cls)
+        masks.words = [patterns.cleanWord(w) for w in words]
+        masks.index = {}
+        for i, word in enumerate(masks.words):
+            masks.index.setdefault(word, i)
+        masks.full = (1 << len(masks.words)) - 1
+        masks.green = green
+        masks.present = present
+        masks.atLeast = atLeast
+        return masks
+
+    # returns the mask of words consistent with hint for guess.
+    def compile(self, guess, hint):
+        return compileHint(self, patterns.cleanWord(guess), hint)
+
+    # returns the bitset of a list of words, or None if one is not known.
+    def bits(self, words):
+        bits = 0
+        for word in words:
+            i = self.index.get(word)
+            if i is None:
+                i = self.index.get(patterns.cleanWord(word))
+                if i is None:
+                    return None
+            bits |= 1 << i
+        return bits
+
+    # returns the words in a bitset, in word list order.
+    def wordsOf(self, bits):
+        return [self.words[i] for i in bitIndices(bits)]
+
+    # returns the words of pool allowed by (guess, hint), keeping the
+    # strings and order of pool, or None if a pool word is not known.
+    def filter(self, pool, guess, hint):
+        allowed = self.compile(guess, hint)
+        index = self.index
+        kept = []
+        for word in pool:
+            i = index.get(word)
+            if i is None:
+                i = index.get(patterns.cleanWord(word))
+                if i is None:
+                    return None
+            if allowed >> i & 1:
+                kept.append(word)
+        return kept
+
+
+# FUNCTION: COMPILEHINT
+# ANDs together the masks for every letter of the hint: the green or not
+# green mask of every spot, then the count mask of every letter. cached,
+# since the same guesses and hints come up in game after game.
+# ARGS:
+# masks - WordMasks of the word list
+# guess - the (clean) guessed word
+# hint - the G/Y/B string returned for it
+# RETURNS:
+# allowed - bitset of the words that would have given this hint
+@lru_cache(maxsize=65536)
+def compileHint(masks, guess, hint):
+    allowed = masks.full
+    marked = {} # letter -> copies marked G or Y
+    capped = set() # letters with a copy marked B: no more copies than marked
+    for spot in range(patterns.WORD_LENGTH):
+        letter = guess[spot]
+        green = masks.green[spot].get(letter, 0)
+        if hint[spot] == 'G': # letter is in this spot
+            allowed &= green
+            marked[letter] = marked.get(letter, 0) + 1
+        else: # Y or B: a copy somewhere else, or none left
+            allowed &= ~green
+            if hint[spot] == 'Y':
+                if letter in capped:
+                    return 0 # Y after a B of the same letter never happens
+                marked[letter] = marked.get(letter, 0) + 1
+            else:
+                marked.setdefault(letter, 0)
+                capped.add(letter)
+    for letter, count in marked.items():
+        counts = masks.atLeast.get(letter)
+        if counts is None: # no word has it
+            if count:
+                return 0
+            continue
+        allowed &= counts[count]
+        if letter in capped:
+            allowed &= ~counts[count + 1]
+    return allowed
+
+
+# FUNCTION: NARROW
+# narrows a list of pool bitsets by the hints one guess got on each board.
+# ARGS:
+# masks - WordMasks the pools are over
+# pools - list of bitsets, one per board
+# guess - the guessed word
+# hints - list of hints, one per board
+# RETURNS:
+# pools - the narrowed bitsets
+def narrow(masks, pools, guess, hints):
+    return [pool & masks.compile(guess, hint)
+            for pool, hint in zip(pools, hints)]
+
+
+# FUNCTION: BITINDICES
+# yields the index of every set bit, lowest first.
+def bitIndices(bits):
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+
+# FUNCTION: DEFAULTMASKS
+# WordMasks over data/valid_answers.txt (the ones of the shared word table),
+# built on first use. returns None if the word list is not there.
+def defaultMasks():
+    import words # imported here, words imports us
+    try:
+        return words.defaultAnswers().masks()
+    except OSError:
+        return None
@@ -0,0 +1,177 @@
+import cProfile
+import json
+import os
+
+# Counters and timers for the game loop. PlayAGame / PlayManyGames only touch
+# them when an Instruments object is passed in, so leaving it out costs a
+# None check per phase.
+
+PHASES = ('setup', 'pickWord', 'evaluateGuess', 'interpretHint')
+
+
+# CLASS: INSTRUMENTS
+# timers (calls, total and max time of every phase of a game) and value
+# counters (words eliminated per hint, pool sizes, guesses), kept as one row
+# per game played. summary() adds the rows up per strategy.
+# ARGS:
+# jsonPath - file the summary and the game rows are written to when a run
+# finishes, or None
+# printSummary - print the summary table when a run finishes
+# profileGames - numbers of the games (0 based, within a PlayManyGames run)
+# to run under cProfile
+# profileDir - directory the .pstats files of profiled games are saved in
+class Instruments:
+    def __init__(self, jsonPath=None, printSummary=True, profileGames=(),
+                 profileDir='.'):
+        self.jsonPath = jsonPath
+        self.printSummary = printSummary
+        self.profileGames = set(profileGames)
+        self.profileDir = profileDir
+        self.games = [] # one row per game finished, see startGame
+        self.game = None # the row of the game being played
+
+    # starts the row of a game of strategy played with seed.
+    def startGame(self, strategy, seed=None):
+        self.game = {'strategy': strategy, 'seed': seed,
+                     'timers': {}, # phase -> [calls, total, max]
+                     'counters': {}} # name -> [count, total, max]
+
+    # files the row of the game being played.
+    def endGame(self):
+        self.games.append(self.game)
+        self.game = None
+
+    # adds one call of a phase that took seconds.
+    def addTime(self, phase, seconds):
+        addTo(self.game['timers'], phase, seconds)
+
+    # adds one observation of a counted value.
+    def addValue(self, name, amount):
+        addTo(self.game['counters'], name, amount)
+
+    # True if game number j should be profiled.
+    def shouldProfile(self, j):
+        return j in self.profileGames
+
+    # runs play() under cProfile and saves the stats for game number j.
+    def profile(self, j, strategy, play):
+        profiler = cProfile.Profile()
+        result = profiler.runcall(play)
+        os.makedirs(self.profileDir, exist_ok=True)
+        profiler.dump_stats(os.path.join(self.profileDir, 'game-%s-%d.pstats'
+                                         % (strategy, j)))
+        return result
+
+    # a fresh Instruments for a worker process, with the same settings.
+    def forWorker(self):
+        return Instruments(None, False, self.profileGames, self.profileDir)
+
+    # the game rows collected so far, as plain data to send between
+    # processes.
+    def state(self):
+        return self.games
+
+    # adds the game rows of another Instruments (from a worker) to this one.
+    def merge(self, state):
+        self.games.extend(state)
+
+    # forgets the game rows collected so far.
+    def clear(self):
+        self.games = []
+
+    # the game rows added up per strategy, as {strategy: {'games': n,
+    # 'phases': {...}, 'counters': {...}}}. counters also get the mean of
+    # their total per game (over every game of the strategy) and the most
+    # one game counted.
+    def summary(self):
+        timers = {} # (strategy, phase) -> [calls, total, max]
+        counters = {} # (strategy, name) -> [count, total, max]
+        perGame = {} # (strategy, name) -> [games, total, max] of the totals
+                     # of the games that counted it
+        numGames = {}
+        for game in self.games:
+            strategy = game['strategy']
+            numGames[strategy] = numGames.get(strategy, 0) + 1
+            for phase, (calls, total, most) in game['timers'].items():
+                mergeInto(timers, (strategy, phase), calls, total, most)
+            for name, (count, total, most) in game['counters'].items():
+                mergeInto(counters, (strategy, name), count, total, most)
+                addTo(perGame, (strategy, name), total)
+
+        result = {}
+        for strategy, games in numGames.items():
+            result[strategy] = {'games': games, 'phases': {}, 'counters': {}}
+        for (strategy, phase), (calls, total, most) in timers.items():
+            result[strategy]['phases'][phase] = {
+                'calls': calls, 'totalSec': total,
+                'meanUs': total / calls * 1e6, 'maxUs': most * 1e6}
+        for (strategy, name), (count, total, most) in counters.items():
+            gameTotal, gameMost = perGame[(strategy, name)][1:]
+            result[strategy]['counters'][name] = {
+                'count': count, 'total': total, 'mean': total / count,
+                'max': most, 'perGameMean': gameTotal / numGames[strategy],
+                'perGameMax': gameMost}
+        return result
+
+    # summary as a printable table.
+    def table(self):
+        lines = []
+        for strategy, parts in sorted(self.summary().items()):
+            lines.append('%s (%d games)' % (strategy, parts['games']))
+            lines.append('  %-16s %10s %10s %12s %12s' %
+                         ('PHASE', 'CALLS', 'TOTAL S', 'MEAN US', 'MAX US'))
+            for phase in sorted(parts['phases'],
+                                key=lambda p: PHASES.index(p)
+                                if p in PHASES else len(PHASES)):
+                t = parts['phases'][phase]
+                lines.append('  %-16s %10d %10.3f %12.1f %12.1f' %
+                             (phase, t['calls'], t['totalSec'], t['meanUs'],
+                              t['maxUs']))
+            lines.append('  %-16s %10s %10s %12s %12s %12s' %
+                         ('COUNTER', 'COUNT', 'TOTAL', 'MEAN', 'MAX',
+                          'PER GAME'))
+            for name in sorted(parts['counters']):
+                c = parts['counters'][name]
+                # counters can be fractions (the share 'evaluated'), so
+                # nothing but the count is printed as a whole number.
+                lines.append('  %-16s %10d %10.1f %12.2f %12.2f %12.2f' %
+                             (name, c['count'], c['total'], c['mean'],
+                              c['max'], c['perGameMean']))
+        return '\n'.join(lines)
+
+    # called by PlayManyGames at the end of a run.
+    def finish(self):
+        if self.printSummary:
+            print(self.table())
+        if self.jsonPath is not None:
+            with open(self.jsonPath, 'w') as out:
+                json.dump({'summary': self.summary(), 'games': self.games},
+                          out, indent=2)
+
+
+# FUNCTION: ADDTO
+# adds one observation of amount to the [count, total, max] of key in
+# table.
+def addTo(table, key, amount):
+    entry = table.get(key)
+    if entry is None:
+        table[key] = [1, amount, amount]
+    else:
+        entry[0] += 1
+        entry[1] += amount
+        if amount > entry[2]:
+            entry[2] = amount
+
+
+# FUNCTION: MERGEINTO
+# adds a [count, total, max] of several observations to the one of key in
+# table.
+def mergeInto(table, key, count, total, most):
+    entry = table.get(key)
+    if entry is None:
+        table[key] = [count, total, most]
+    else:
+        entry[0] += count
+        entry[1] += total
+        if most > entry[2]:
+            entry[2] = most
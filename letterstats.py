@@ -0,0 +1,170 @@
+from functools import lru_cache
+
+import patterns
+import filters
+import words
+
+# Letter frequency tables built from the word lists instead of typed in.
+# For a word list (or any pool of it) there are two kinds of table: the
+# fraction of words that contain a letter anywhere, and for each spot the
+# fraction of words with a letter in that spot. Both come from the bitset
+# masks of filters.WordMasks, so building every table is 26 + 26 * 5 popcounts
+# of one AND each, whatever the size of the pool.
+
+ALPHABET = filters.ALPHABET
+
+# names the AI classes use for the tables: 'PercentageValue' for letters
+# anywhere, then one per spot.
+PRESENT_NAME = 'PercentageValue'
+SPOT_NAMES = ('FirstLetter', 'SecondLetter', 'ThirdLetter', 'FourthLetter',
+              'FifthLetter')
+
+
+# CLASS: LETTERSTATS
+# the frequency tables of one set of words.
+# ARGS:
+# count - number of words the tables were counted over
+# present - letter -> fraction of the words containing it
+# spots - one dict per spot, letter -> fraction of the words with it there
+class LetterStats:
+    __slots__ = ('count', 'present', 'spots', 'byName')
+
+    def __init__(self, count, present, spots):
+        self.count = count
+        self.present = present
+        self.spots = spots
+        self.byName = {PRESENT_NAME: present}
+        for spot in range(patterns.WORD_LENGTH):
+            self.byName[SPOT_NAMES[spot]] = spots[spot]
+
+    # the table the AI classes call name (e.g. 'FirstLetter').
+    def table(self, name):
+        return self.byName[name]
+
+
+# FUNCTION: COUNTSTATS
+# the tables of the words in a bitset over a masks' word list. cached, since
+# the same pools (the full list, the pools after the usual openers) come up
+# in game after game.
+# ARGS:
+# masks - filters.WordMasks of the word list
+# bits - bitset of the words to count
+# RETURNS:
+# stats - LetterStats of those words
+@lru_cache(maxsize=4096)
+def countStats(masks, bits):
+    count = bits.bit_count()
+    scale = 1 / count if count else 0
+    present = {}
+    for letter in ALPHABET:
+        present[letter] = (bits & masks.present[letter]).bit_count() * scale
+    spots = []
+    for spot in range(patterns.WORD_LENGTH):
+        green = masks.green[spot]
+        spots.append({letter: (bits & green[letter]).bit_count() * scale
+                      for letter in ALPHABET})
+    return LetterStats(count, present, spots)
+
+
+_stats = {} # sha256 of a word list -> its LetterStats
+
+# FUNCTION: WORDSTATS
+# the tables of a whole word list (a list of words or a words.WordTable),
+# kept by the digest of its contents so equal lists share one set of tables.
+def wordStats(wordList):
+    table = words.asTable(wordList)
+    digest = table.digest()
+    stats = _stats.get(digest)
+    if stats is None:
+        masks = table.masks()
+        stats = countStats(masks, masks.full)
+        _stats[digest] = stats
+    return stats
+
+
+# FUNCTION: POOLSTATS
+# the tables of the words still in a pool. a words.Pool is counted from its
+# bitset; a plain list of words is counted in one pass over its letters.
+def poolStats(pool):
+    if isinstance(pool, words.Pool):
+        return countStats(pool.table.masks(), pool.bits)
+
+    present = dict.fromkeys(ALPHABET, 0)
+    spots = [dict.fromkeys(ALPHABET, 0) for i in range(patterns.WORD_LENGTH)]
+    count = 0
+    for word in pool:
+        word = patterns.cleanWord(word)
+        count += 1
+        for letter in set(word):
+            present[letter] += 1
+        for spot in range(patterns.WORD_LENGTH):
+            spots[spot][word[spot]] += 1
+    scale = 1 / count if count else 0
+    for table in [present] + spots:
+        for letter in table:
+            table[letter] *= scale
+    return LetterStats(count, present, spots)
+
+
+# FUNCTION: DEFAULTSTATS
+# the tables of data/valid_answers.txt, read from the prebuilt bundle when
+# there is a fresh one.
+def defaultStats():
+    table = words.defaultAnswers()
+    digest = table.digest()
+    if digest not in _stats:
+        import bundle # imported here, bundle imports us
+        shared = bundle.sharedBundle()
+        found = shared.stats() if shared is not None else None
+        if found is not None:
+            _stats[digest] = LetterStats(*found)
+    return wordStats(table)
+
+
+# CLASS: DEFAULTTABLE
+# a class attribute that reads as one of the defaultStats() tables, counted
+# the first time a strategy looks at it. an instance can still set its own
+# table of the same name over it.
+# ARGS:
+# name - PRESENT_NAME or one of SPOT_NAMES
+class DefaultTable:
+    def __init__(self, name):
+        self.name = name
+
+    def __get__(self, obj, owner=None):
+        return defaultStats().table(self.name)
+
+
+# FUNCTION: BESTWORD
+# the word of a pool that scores highest under a strategy's score method
+# when the strategy's letter tables are counted over that pool. ties go to
+# the first word in pool order. words.Pools are remembered by their bitset,
+# so the full pool every game opens with is only scored once.
+# ARGS:
+# owner - the AI class, its score method reads the tables by name
+# keyName - name of the score method, e.g. 'CommonLetterSpot'
+# pool - words.Pool or list of words to choose from
+# RETURNS:
+# word - the best word
+def bestWord(owner, keyName, pool):
+    if isinstance(pool, words.Pool):
+        best = bestIndex(owner, keyName, pool.table, pool.bits, pool.ranking)
+        return pool.table.words[best]
+    return scoreWith(owner, keyName, poolStats(pool), pool)
+
+
+# FUNCTION: BESTINDEX
+# bestWord for the words in a bitset, as a table position.
+@lru_cache(maxsize=4096)
+def bestIndex(owner, keyName, table, bits, ranking):
+    pool = words.Pool(table, bits, ranking)
+    return table.index(scoreWith(owner, keyName, poolStats(pool), pool))
+
+
+# FUNCTION: SCOREWITH
+# the first of the best words of pool under owner's keyName method, with
+# the tables of stats in place of owner's own.
+def scoreWith(owner, keyName, stats, pool):
+    view = object.__new__(owner) # same methods, these tables
+    view.__dict__.update(stats.byName)
+    return max(pool, key=getattr(view, keyName))
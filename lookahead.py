@@ -0,0 +1,271 @@
+import math
+import time
+from collections import OrderedDict
+
+import patterns
+import scoring
+import pruning
+
+# Depth limited search for the guess that minimizes the guesses still needed.
+# A pool is a sorted tuple of pattern table columns. The value of a pool is
+# the expected (or worst case) number of guesses to solve it, counting the
+# next one: a guess splits the pool into groups by the hint it would get, and
+# costs 1 plus the value of every group weighted by its size (the group that
+# gets GGGGG is done). Past the depth limit a pool is valued by an estimate
+# from its size.
+#
+# Values are kept in a transposition table keyed by (pool, depth), shared by
+# every game that uses the same settings, so the pools that keep coming back
+# (everything after the usual openers) are searched once per process. A
+# search below the best value found so far is cut as soon as the lower bound
+# of its remaining groups shows it can not win, and a search that runs out of
+# its node or time budget keeps the best guess it has.
+
+EXPECTED = 'expected' # minimize the average number of guesses
+WORST = 'worst' # minimize the most guesses any answer could need
+OBJECTIVES = (EXPECTED, WORST)
+
+LEAF_SPLIT = 20 # groups a good guess splits a pool into, for the estimate
+CLOCK_EVERY = 64 # nodes between looks at the clock
+MAX_ENTRIES = 500000 # values kept in a transposition table
+
+
+# FUNCTION: LOWERBOUND
+# fewest guesses n possible answers can need on average: the first guess is
+# right for one of them, every other one needs at least a second guess.
+def lowerBound(n):
+    return 2 - 1 / n
+
+
+# FUNCTION: LEAFESTIMATE
+# estimated guesses to solve a pool of n words, used past the depth limit.
+def leafEstimate(n, objective=EXPECTED):
+    if n <= 2:
+        return lowerBound(n) if objective == EXPECTED else n
+    guesses = 1 + math.log(n) / math.log(LEAF_SPLIT)
+    if objective == WORST:
+        return 1 + math.ceil(guesses - 1)
+    return max(lowerBound(n), guesses)
+
+
+# CLASS: SEARCHTREE
+# the search and its transposition table for one pattern table and one set
+# of settings.
+# ARGS:
+# table - patterns.PatternTable
+# objective - EXPECTED or WORST
+# width - guesses tried per pool (the best ones by entropy)
+# rootWidth - guesses tried for the move itself, which come from the whole
+# (pruned) dictionary
+class SearchTree:
+    def __init__(self, table, objective=EXPECTED, width=8, rootWidth=16):
+        if objective not in OBJECTIVES:
+            raise ValueError('unknown objective: %r' % (objective,))
+        self.table = table
+        self.objective = objective
+        self.width = width
+        self.rootWidth = rootWidth
+        self.values = OrderedDict() # (pool, depth) -> (value, exact)
+        self.moves = OrderedDict() # (pools, depth) -> chosen row
+        self.candidateLists = OrderedDict() # pool -> rows to try
+        # every answer column's row, for trying pool words as guesses
+        self.answerRows = [table.rowOf(word) for word in table.answers]
+        self.nodes = 0
+        self.hits = 0
+        self.cutoffs = 0
+        self.budgetStops = 0
+        self.nodeLimit = None
+        self.deadline = None
+
+    # keeps a dict to MAX_ENTRIES, dropping the least recently used.
+    def store(self, cache, key, value):
+        cache[key] = value
+        cache.move_to_end(key)
+        if len(cache) > MAX_ENTRIES:
+            cache.popitem(last=False)
+
+    # True once the move being searched has used its budget.
+    def outOfBudget(self):
+        if self.nodeLimit is not None and self.nodes >= self.nodeLimit:
+            return True
+        if (self.deadline is not None and self.nodes % CLOCK_EVERY == 0 and
+                time.perf_counter() >= self.deadline):
+            self.nodeLimit = self.nodes # stay stopped without the clock
+            return True
+        return False
+
+    # the hint groups a guess splits a pool into: code -> columns.
+    def partition(self, row, pool):
+        start = row * self.table.numCols
+        codes = scoring.patternGetter(pool)(
+            self.table.data[start:start + self.table.numCols])
+        groups = {}
+        for code, col in zip(codes, pool):
+            group = groups.get(code)
+            if group is None:
+                groups[code] = [col]
+            else:
+                group.append(col)
+        return groups
+
+    # the guesses to try on a pool, best first by entropy.
+    def candidates(self, pool):
+        rows = self.candidateLists.get(pool)
+        if rows is None:
+            rows = [self.answerRows[col] for col in pool]
+            scores = scoring.scoreRows(self.table, rows, pool)
+            order = sorted(range(len(rows)), key=lambda i: -scores[i])
+            rows = [rows[i] for i in order[:self.width]]
+            self.store(self.candidateLists, pool, rows)
+        return rows
+
+    # the guesses to try for a move on a pool: the best by entropy of the
+    # whole dictionary, pruned, with the pool's words first so they win ties.
+    def rootCandidates(self, pool):
+        key = ('root', pool)
+        rows = self.candidateLists.get(key)
+        if rows is None:
+            words = [self.table.answers[col] for col in pool]
+            rows, pruned = pruning.candidateRows(
+                self.table, [words], first=[self.answerRows[col]
+                                            for col in pool])
+            scores = scoring.scoreRows(self.table, rows, pool)
+            order = sorted(range(len(rows)), key=lambda i: -scores[i])
+            rows = [rows[i] for i in order[:self.rootWidth]]
+            self.store(self.candidateLists, key, rows)
+        return rows
+
+    # value of a pool searched depth guesses deep. a value at or above limit
+    # only means "no better than limit".
+    def value(self, pool, depth, limit=math.inf):
+        n = len(pool)
+        if n <= 2 or depth == 0:
+            return leafEstimate(n, self.objective)
+
+        key = (pool, depth)
+        entry = self.values.get(key)
+        if entry is not None:
+            self.hits += 1
+            value, exact = entry
+            if exact or value >= limit:
+                return value
+        if self.outOfBudget():
+            self.budgetStops += 1
+            return leafEstimate(n, self.objective)
+
+        self.nodes += 1
+        stops = self.budgetStops
+        best = limit
+        for row in self.candidates(pool):
+            cost = self.guessCost(row, pool, depth, best)
+            if cost < best:
+                best = cost
+        if self.budgetStops == stops: # not cut short, safe to keep
+            self.store(self.values, key, (best, best < limit))
+        return best
+
+    # value of a pool after guessing row, depth counting this guess. stops
+    # early (returning bound) once it can't get below bound.
+    def guessCost(self, row, pool, depth, bound):
+        groups = self.partition(row, pool)
+        groups.pop(patterns.SOLVED, None) # that answer needs no more guesses
+        sizes = sorted(groups.values(), key=len, reverse=True)
+        n = len(pool)
+
+        if self.objective == WORST:
+            worst = 1
+            for group in sizes:
+                if 1 + lowerBound(len(group)) >= bound:
+                    self.cutoffs += 1
+                    return bound
+                worst = max(worst, 1 + self.value(tuple(group), depth - 1,
+                                                  bound - 1))
+                if worst >= bound:
+                    self.cutoffs += 1
+                    return bound
+            return worst
+
+        rest = sum([len(group) * lowerBound(len(group)) for group in sizes])
+        total = 1.0
+        for group in sizes:
+            size = len(group)
+            rest -= size * lowerBound(size)
+            if total + rest / n + size * lowerBound(size) / n >= bound:
+                self.cutoffs += 1
+                return bound
+            limit = (bound - total - rest / n) * n / size
+            total += size * self.value(tuple(group), depth - 1, limit) / n
+        return total
+
+    # expected guesses board pool still needs after row is guessed, valued
+    # depth - 1 deep: cheap side cost for the boards not being searched.
+    def sideCost(self, row, pool):
+        groups = self.partition(row, pool)
+        groups.pop(patterns.SOLVED, None)
+        total = 0.0
+        for group in groups.values():
+            total += len(group) * leafEstimate(len(group), self.objective)
+        return total / len(pool)
+
+    # the row to guess, searching the chosen pool depth guesses deep and
+    # adding the side cost of the other pools.
+    # ARGS:
+    # pools - sorted column tuples of every board still being solved
+    # chosen - index in pools of the board to search
+    # depth - guesses to search (this one included)
+    # nodeLimit - most nodes to expand for this move, None for no limit
+    # seconds - most time to spend on this move, None for no limit
+    # RETURNS:
+    # row - the table row of the guess
+    def bestMove(self, pools, chosen, depth, nodeLimit=None, seconds=None):
+        key = (tuple(pools), chosen, depth)
+        row = self.moves.get(key)
+        if row is not None:
+            self.hits += 1
+            return row
+
+        self.nodes = 0
+        self.nodeLimit = nodeLimit
+        self.deadline = None
+        if seconds is not None:
+            self.deadline = time.perf_counter() + seconds
+        stops = self.budgetStops
+
+        pool = pools[chosen]
+        rows = self.rootCandidates(pool)
+        best = rows[0] # the entropy pick, if the budget runs out at once
+        bestCost = math.inf
+        for i, row in enumerate(rows):
+            side = 0.0
+            for other in range(len(pools)):
+                if other != chosen:
+                    side += self.sideCost(row, pools[other])
+            if side >= bestCost:
+                continue
+            cost = side + self.guessCost(row, pool, depth, bestCost - side)
+            if cost < bestCost:
+                best = row
+                bestCost = cost
+            if i + 1 < len(rows) and self.outOfBudget():
+                self.budgetStops += 1 # the rows left were never tried
+                break
+
+        if self.budgetStops == stops: # a full search, keep the move
+            self.store(self.moves, key, best)
+        self.nodeLimit = None
+        self.deadline = None
+        return best
+
+
+_trees = {} # (id of table, settings) -> (table, SearchTree)
+
+# FUNCTION: SHAREDTREE
+# the SearchTree for a table and settings, shared by every game in this
+# process so values found in one game are reused by the next.
+def sharedTree(table, objective=EXPECTED, width=8, rootWidth=16):
+    key = (id(table), objective, width, rootWidth)
+    found = _trees.get(key)
+    if found is None or found[0] is not table:
+        found = (table, SearchTree(table, objective, width, rootWidth))
+        _trees[key] = found
+    return found[1]
@@ -0,0 +1,232 @@
+import hashlib
+import json
+import os
+import sys
+from collections import OrderedDict
+
+import patterns
+import filters
+import words
+
+# Memo of solver decisions. Entropy's choice only depends on the words left
+# in the pool it is picking from (and how it scores them), so the choice is
+# stored under a fingerprint of that pool and every later game that reaches
+# the same pool gets it back with one dict lookup instead of a rating pass.
+
+BOOK_VERSION = 1
+DEFAULT_SIZE = 200000 # most entries kept in memory before evicting
+LOAD_SAVED = True # fill shared books from the files of earlier runs
+
+
+# FUNCTION: POOLKEY
+# fingerprint of a pool of words: blake2b of its bitset over the answer list.
+# returns None if a word is not in the answer list.
+def poolKey(pool, masks=None):
+    if masks is None:
+        masks = filters.defaultMasks()
+        if masks is None:
+            return None
+    if isinstance(pool, words.Pool) and pool.table.masks() is masks:
+        bits = pool.bits
+    else:
+        bits = masks.bits(pool)
+    if bits is None:
+        return None
+    raw = bits.to_bytes((len(masks.words) + 7) // 8, 'little')
+    return hashlib.blake2b(raw, digest_size=16).hexdigest()
+
+
+# FUNCTION: POOLSKEY
+# fingerprint of several pools together (one per board, in board order).
+# returns None if a word is not in the answer list.
+def poolsKey(pools, masks=None):
+    keys = []
+    for pool in pools:
+        key = poolKey(pool, masks)
+        if key is None:
+            return None
+        keys.append(key)
+    return hashlib.blake2b(','.join(keys).encode('ascii'),
+                           digest_size=16).hexdigest()
+
+
+# CLASS: OPENINGBOOK
+# LRU map from pool fingerprints to the position (in the pool) of the word to
+# guess, which can be saved to and loaded from a JSON file. strategies that
+# guess words outside the pool store other values (like a table row) with
+# get and put directly.
+# ARGS:
+# name - which strategy the book is for, e.g. 'Entropy-entropy'
+# digest - hex digest of the word lists the book was built on
+# path - file to save to / load from, None for a memory only book
+# maxSize - most entries kept, least recently used ones are dropped first
+class OpeningBook:
+    def __init__(self, name, digest, path=None, maxSize=DEFAULT_SIZE):
+        self.name = name
+        self.digest = digest
+        self.path = path
+        self.maxSize = maxSize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    # returns the stored pool position (or word) for key, or None.
+    def get(self, key):
+        pos = self.entries.get(key)
+        if pos is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return pos
+
+    # stores the pool position of the chosen word for key.
+    def put(self, key, pos):
+        self.entries[key] = pos
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.maxSize:
+            self.entries.popitem(last=False)
+
+    # looks up the word to guess from pool. returns None on a miss.
+    def pick(self, pool):
+        key = poolKey(pool)
+        if key is None:
+            return None
+        pos = self.get(key)
+        if isinstance(pos, str): # a guess from outside the pool
+            return pos
+        if pos is None or pos >= len(pool):
+            return None
+        return pool[pos]
+
+    # remembers that word was the guess for pool: its position in the pool,
+    # or the word itself if it is not in the pool.
+    def remember(self, pool, word):
+        key = poolKey(pool)
+        if key is not None:
+            self.put(key, pool.index(word) if word in pool else word)
+
+    # loads entries saved by an earlier run. a file for other word lists or
+    # another version is ignored. returns True if anything was loaded.
+    def load(self):
+        if self.path is None:
+            return False
+        try:
+            with open(self.path) as bookFile:
+                saved = json.load(bookFile)
+        except (OSError, ValueError):
+            return False
+        if (saved.get('version') != BOOK_VERSION or
+                saved.get('digest') != self.digest or
+                saved.get('name') != self.name):
+            return False
+        for key, pos in saved['entries']:
+            self.put(key, pos)
+        return True
+
+    # writes the book to its file (to a temp file first, then renamed).
+    def save(self):
+        if self.path is None:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temp = '%s.%d.tmp' % (self.path, os.getpid())
+        with open(temp, 'w') as bookFile:
+            json.dump({'version': BOOK_VERSION, 'name': self.name,
+                       'digest': self.digest,
+                       'entries': list(self.entries.items())}, bookFile)
+        os.replace(temp, self.path)
+
+    # empties the book (and its file) so it gets rebuilt from scratch.
+    def clear(self):
+        self.entries.clear()
+        if self.path is not None and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+_books = {}
+
+# FUNCTION: SHAREDBOOK
+# the book for a strategy, shared by every game in this process. it is
+# loaded from cache/ the first time it is asked for (if LOAD_SAVED).
+# ARGS:
+# name - strategy name (also names the file)
+# RETURNS:
+# book - the OpeningBook, or None if the pattern table is not available
+def sharedBook(name):
+    if name not in _books:
+        table = patterns.defaultTable()
+        if table is None:
+            return None
+        digest = table.digest.hex()
+        path = os.path.join(patterns.CACHE_DIR, 'book-%s-%s.json' %
+                            (name, digest[:16]))
+        book = OpeningBook(name, digest, path)
+        if LOAD_SAVED:
+            book.load()
+        _books[name] = book
+    return _books[name]
+
+
+# FUNCTION: DROPBOOKS
+# forgets every shared book of this process (their files stay), so the next
+# sharedBook starts over, e.g. after LOAD_SAVED changed.
+def dropBooks():
+    _books.clear()
+
+
+# FUNCTION: BUILDBOOK
+# walks the whole Wordle decision tree of an AI by playing one single board
+# game against every answer, filling its book, then saves it.
+# ARGS:
+# ai - the AI class, which must keep its choices in sharedBook(ai.BookName())
+# rebuild - drop the old entries first (e.g. after changing the AI)
+# RETURNS:
+# book - the filled OpeningBook
+def buildBook(ai, rebuild=False):
+    import quordle # imported here, quordle imports AI which imports us
+
+    book = sharedBook(ai.BookName())
+    if rebuild:
+        book.clear()
+    answers = words.defaultAnswers()
+    for hidden in answers:
+        quordle.PlayAGame(answers, 1, ai, hidden=[hidden])
+    book.save()
+    return book
+
+
+# FUNCTION: BUILDOPENINGS
+# fills the book of an AI that picks for all boards at once (like
+# AI.JointEntropy) with its first guess for every board count, the slowest
+# pick of its games, then saves it.
+# ARGS:
+# ai - the AI class, which must keep its choices in sharedBook(ai.BookName())
+# boardCounts - numbers of boards to open for
+# rebuild - drop the old entries first (e.g. after changing the AI)
+# RETURNS:
+# book - the filled OpeningBook
+def buildOpenings(ai, boardCounts, rebuild=False):
+    book = sharedBook(ai.BookName())
+    if rebuild:
+        book.clear()
+    answers = words.defaultAnswers()
+    for numWords in boardCounts:
+        ai(answers, numWords).pickWord()
+    book.save()
+    return book
+
+
+if __name__ == '__main__':
+    # go through the imported module so AI and this script share the books.
+    import AI
+    import openingbook
+    import quordle
+    rebuild = '--rebuild' in sys.argv
+    book = openingbook.buildBook(AI.Entropy, rebuild)
+    print("BOOK", book.name, "HAS", len(book), "POSITIONS, SAVED TO", book.path)
+    book = openingbook.buildOpenings(AI.JointEntropy, sorted(quordle.GOALS),
+                                     rebuild)
+    print("BOOK", book.name, "HAS", len(book), "POSITIONS, SAVED TO", book.path)
@@ -0,0 +1,371 @@
+import hashlib
+import mmap
+import os
+import struct
+
+# Feedback patterns are stored as base 3 codes, one byte per (guess, answer)
+# pair. Position i of the hint is digit i of the code (weight 3**i), with
+# B = 0, Y = 1 and G = 2, so every 5 letter hint fits in 0..242.
+#
+# Hints follow the Wordle rules for repeated letters: greens are marked
+# first, then each other copy of a letter in the guess, left to right, is Y
+# while the answer still has copies of it left over and B after that. So
+# "speed" against "abide" is BBYBY: the answer has one e, and it goes to the
+# first e of the guess.
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(BASE_DIR, 'data')
+CACHE_DIR = os.path.join(BASE_DIR, 'cache')
+ANSWERS_PATH = os.path.join(DATA_DIR, 'valid_answers.txt')
+GUESSES_PATH = os.path.join(DATA_DIR, 'valid_guesses.txt')
+
+WORD_LENGTH = 5
+NUM_PATTERNS = 3 ** WORD_LENGTH
+TABLE_VERSION = 2 # bump whenever the meaning of a stored code changes.
+MAGIC = b'QPAT'
+HEADER = struct.Struct('<4sHHII32s') # magic, version, word length, rows,
+                                     # columns, digest of the word lists.
+
+DIGITS = {'B': 0, 'Y': 1, 'G': 2}
+LETTERS = 'BYG'
+WEIGHTS = [3 ** i for i in range(WORD_LENGTH)]
+SOLVED = NUM_PATTERNS - 1 # code for GGGGG
+
+
+# FUNCTION: HINTCODE
+# turns a hint string like "GYBBG" into its pattern code.
+def hintCode(hint):
+    code = 0
+    for i in range(WORD_LENGTH):
+        code += DIGITS[hint[i]] * WEIGHTS[i]
+    return code
+
+
+# FUNCTION: CODEHINT
+# turns a pattern code back into the hint string evaluateGuess returns.
+def codeHint(code):
+    hint = ''
+    for i in range(WORD_LENGTH):
+        hint += LETTERS[code % 3]
+        code //= 3
+    return hint
+
+
+HINTS = tuple(codeHint(code) for code in range(NUM_PATTERNS)) # code -> hint
+
+
+# FUNCTION: PATTERNCODE
+# the pattern code guess gets against answer, one pair at a time. buildRows
+# is the fast way to do many; this is the plain statement of the rules.
+def patternCode(guess, answer):
+    code = 0
+    left = {} # copies of each letter of answer not matched by a green
+    for i in range(WORD_LENGTH):
+        if guess[i] == answer[i]:
+            code += 2 * WEIGHTS[i]
+        else:
+            left[answer[i]] = left.get(answer[i], 0) + 1
+    for i in range(WORD_LENGTH):
+        letter = guess[i]
+        if letter != answer[i] and left.get(letter, 0) > 0:
+            left[letter] -= 1
+            code += WEIGHTS[i]
+    return code
+
+
+# FUNCTION: CLEANWORD
+# strips the newline readlines() leaves on words and lowercases them, so
+# 'raise\n' and 'raise' look up the same row/column.
+def cleanWord(word):
+    return word.strip().lower()
+
+
+# FUNCTION: WORDLISTDIGEST
+# sha256 of the guess and answer lists (and the table version) used to key
+# the cache file, so editing either list invalidates old tables.
+def wordListDigest(guesses, answers):
+    digest = hashlib.sha256()
+    digest.update(b'v%d\0' % TABLE_VERSION)
+    digest.update('\n'.join(guesses).encode('ascii'))
+    digest.update(b'\0')
+    digest.update('\n'.join(answers).encode('ascii'))
+    return digest.digest()
+
+
+# FUNCTION: BUILDROWS
+# computes every pattern of guesses against answers and returns them as one
+# bytes object, row major (one row of len(answers) bytes per guess).
+# each row is built with plain integer arithmetic: a python int is used as a
+# vector of one byte lanes (one lane per answer), so a whole row is a handful
+# of big int ANDs and additions instead of len(answers) string comparisons.
+#
+# repeated letters are counted per lane: atLeast[letter][k] marks the
+# answers with k or more copies of letter. for a letter at spots P of the
+# guess, every way the answer can match it green on P is a lane mask; on
+# the lanes of one such way, with g greens, the n-th other spot of P (left
+# to right) is yellow exactly where the answer has at least g + n copies.
+# a letter the guess has once needs none of that: green plus present.
+def buildRows(guesses, answers):
+    numAnswers = len(answers)
+    ones = laneVector(answers, lambda a: True)
+    green = [{} for i in range(WORD_LENGTH)] # green[spot][letter] -> lanes
+    atLeast = {} # atLeast[letter][k] -> lanes of answers with k+ copies
+
+    for letter in 'abcdefghijklmnopqrstuvwxyz':
+        copies = [answer.count(letter) for answer in answers]
+        atLeast[letter] = [int.from_bytes(bytes([c >= k for c in copies]),
+                                          'little')
+                           for k in range(WORD_LENGTH + 1)]
+        for spot in range(WORD_LENGTH):
+            green[spot][letter] = laneVector(answers,
+                                             lambda a: a[spot] == letter)
+    noCopies = [ones] + [0] * WORD_LENGTH # atLeast of a letter no answer has
+
+    rows = bytearray()
+    for guess in guesses:
+        spots = {} # letter -> the spots it is at in guess
+        for spot in range(WORD_LENGTH):
+            spots.setdefault(guess[spot], []).append(spot)
+
+        total = 0
+        for letter, at in spots.items():
+            counts = atLeast.get(letter, noCopies)
+            if len(at) == 1:
+                # green lanes get 1 + 1 = 2, yellow lanes 0 + 1 = 1, black 0.
+                spot = at[0]
+                total += WEIGHTS[spot] * (green[spot].get(letter, 0) +
+                                          counts[1])
+                continue
+            greens = [green[spot].get(letter, 0) for spot in at]
+            for spot, lanes in zip(at, greens):
+                total += 2 * WEIGHTS[spot] * lanes
+            for matched in range(1 << len(at)): # which spots are green
+                lanes = ones
+                numGreen = 0
+                for i in range(len(at)):
+                    if matched >> i & 1:
+                        lanes &= greens[i]
+                        numGreen += 1
+                    else:
+                        lanes &= ones ^ greens[i]
+                if not lanes:
+                    continue
+                n = 0
+                for i in range(len(at)):
+                    if not matched >> i & 1:
+                        n += 1
+                        total += WEIGHTS[at[i]] * (lanes &
+                                                   counts[numGreen + n])
+        rows += total.to_bytes(numAnswers, 'little')
+    return bytes(rows)
+
+
+# FUNCTION: LANEVECTOR
+# packs a 0/1 flag per word into an int with one byte per word.
+def laneVector(words, test):
+    return int.from_bytes(bytes(1 if test(w) else 0 for w in words), 'little')
+
+
+# CLASS: PATTERNTABLE
+# the precomputed guess x answer pattern matrix. data is anything that
+# supports indexing and slicing like bytes (a bytes object or an mmap).
+# ARGS:
+# guesses - words that can be guessed (one row each)
+# answers - words that can be hidden (one column each)
+# data - rows * columns pattern codes
+# digest - wordListDigest of guesses and answers
+class PatternTable:
+    def __init__(self, guesses, answers, data, digest):
+        self.guesses = guesses
+        self.answers = answers
+        self.data = data
+        self.digest = digest
+        self.numRows = len(guesses)
+        self.numCols = len(answers)
+
+        self.rowIndex = {}
+        for i, word in enumerate(guesses):
+            self.rowIndex.setdefault(word, i)
+        self.colIndex = {}
+        for i, word in enumerate(answers):
+            self.colIndex.setdefault(word, i)
+        self.sameAs = {} # id of a word list -> (list, True if same answers)
+
+    # returns the row number of a guess, or None if it is not in the table.
+    def rowOf(self, guess):
+        row = self.rowIndex.get(guess)
+        if row is None:
+            row = self.rowIndex.get(cleanWord(guess))
+        return row
+
+    # returns the column number of an answer, or None if it is not in the table.
+    def colOf(self, answer):
+        col = self.colIndex.get(answer)
+        if col is None:
+            col = self.colIndex.get(cleanWord(answer))
+        return col
+
+    # True if words (a word list or words.WordTable) holds exactly this
+    # table's answers in column order, so its positions are column numbers.
+    # remembered per object, since tables never change.
+    def sameAnswers(self, words):
+        seen = self.sameAs.get(id(words))
+        if seen is None or seen[0] is not words:
+            seen = (words, list(words) == self.answers)
+            self.sameAs[id(words)] = seen
+        return seen[1]
+
+    # returns a whole row of codes (one per answer) as bytes.
+    def row(self, guess):
+        row = self.rowOf(guess)
+        if row is None:
+            return None
+        start = row * self.numCols
+        return self.data[start:start + self.numCols]
+
+    # returns the pattern code of a single guess/answer pair, or None.
+    def pattern(self, guess, answer):
+        row = self.rowOf(guess)
+        col = self.colOf(answer)
+        if row is None or col is None:
+            return None
+        return self.data[row * self.numCols + col]
+
+    # returns the hint string of guess against every answer in answers, or
+    # None if any of the words is missing from the table.
+    def hints(self, guess, answers):
+        row = self.rowOf(guess)
+        if row is None:
+            return None
+        start = row * self.numCols
+        hints = []
+        for answer in answers:
+            col = self.colOf(answer)
+            if col is None:
+                return None
+            hints.append(HINTS[self.data[start + col]])
+        return hints
+
+    # returns the words of pool whose pattern against guess is code, or None
+    # if the guess or one of the pool words is missing from the table.
+    def filterPool(self, guess, code, pool):
+        row = self.row(guess)
+        if row is None:
+            return None
+        kept = []
+        for word in pool:
+            col = self.colOf(word)
+            if col is None:
+                return None
+            if row[col] == code:
+                kept.append(word)
+        return kept
+
+
+# FUNCTION: LOADTABLE
+# returns the PatternTable for guesses x answers. a table saved by an earlier
+# run is memory mapped; otherwise the table is built and saved to cacheDir
+# (keyed by the digest of the word lists) for next time.
+# ARGS:
+# guesses - list of guessable words (newlines are stripped)
+# answers - list of hidden word candidates (newlines are stripped)
+# cacheDir - directory for table files, None to skip the disk cache
+# RETURNS:
+# table - the PatternTable
+def loadTable(guesses, answers, cacheDir=CACHE_DIR):
+    guesses = [cleanWord(w) for w in guesses]
+    answers = [cleanWord(w) for w in answers]
+    digest = wordListDigest(guesses, answers)
+
+    if cacheDir is None:
+        return PatternTable(guesses, answers, buildRows(guesses, answers),
+                            digest)
+
+    path = tablePath(cacheDir, digest)
+    data = mapTable(path, digest, len(guesses), len(answers))
+    if data is None:
+        rows = buildRows(guesses, answers)
+        saveTable(path, digest, len(guesses), len(answers), rows)
+        data = mapTable(path, digest, len(guesses), len(answers))
+        if data is None: # could not write the cache, keep it in memory.
+            data = rows
+    return PatternTable(guesses, answers, data, digest)
+
+
+# FUNCTION: TABLEPATH
+# file name of the cached table for a digest.
+def tablePath(cacheDir, digest):
+    return os.path.join(cacheDir, 'patterns-v%d-%s.bin' %
+                        (TABLE_VERSION, digest.hex()[:16]))
+
+
+# FUNCTION: SAVETABLE
+# writes header + rows to path. written to a temp file and renamed so other
+# processes never map a half written table.
+def saveTable(path, digest, numRows, numCols, rows):
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp = '%s.%d.tmp' % (path, os.getpid())
+        with open(temp, 'wb') as out:
+            out.write(HEADER.pack(MAGIC, TABLE_VERSION, WORD_LENGTH,
+                                  numRows, numCols, digest))
+            out.write(rows)
+        os.replace(temp, path)
+    except OSError:
+        pass
+
+
+# FUNCTION: MAPTABLE
+# memory maps a saved table and checks its header. returns a memoryview of
+# the pattern codes, or None if the file is missing or stale.
+def mapTable(path, digest, numRows, numCols):
+    try:
+        with open(path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    expected = HEADER.size + numRows * numCols
+    if len(mapped) != expected:
+        mapped.close()
+        return None
+    magic, version, length, rows, cols, saved = HEADER.unpack_from(mapped)
+    if (magic != MAGIC or version != TABLE_VERSION or length != WORD_LENGTH
+            or rows != numRows or cols != numCols or saved != digest):
+        mapped.close()
+        return None
+    return memoryview(mapped)[HEADER.size:]
+
+
+# FUNCTION: READWORDS
+# reads a word list file into a list of clean words.
+def readWords(path):
+    with open(path) as wordsText:
+        return [cleanWord(w) for w in wordsText.readlines() if w.strip()]
+
+
+_defaultTable = None
+_defaultLoaded = False
+
+# FUNCTION: DEFAULTTABLE
+# the table for data/valid_guesses.txt + data/valid_answers.txt against
+# data/valid_answers.txt, loaded (or built) on first use. the word lists come
+# from the prebuilt bundle when there is a fresh one. returns None if the
+# word lists are not there.
+def defaultTable():
+    global _defaultTable, _defaultLoaded
+    if not _defaultLoaded:
+        _defaultLoaded = True
+        import bundle # imported here, bundle imports us
+        shared = bundle.sharedBundle()
+        try:
+            if shared is not None:
+                answers = shared.words(bundle.ANSWERS)
+                guesses = shared.words(bundle.GUESSES) + answers
+            else:
+                answers = readWords(ANSWERS_PATH)
+                guesses = readWords(GUESSES_PATH) + answers
+        except OSError:
+            return None
+        _defaultTable = loadTable(guesses, answers)
+    return _defaultTable
@@ -0,0 +1,284 @@
+import math
+from collections import OrderedDict
+from itertools import islice
+
+import patterns
+import filters
+import letterstats
+import scoring
+import words
+
+# Cuts down the guesses worth scoring before a strategy scores them. Feedback
+# for a letter none of the possible answers have is always B, so such letters
+# can be blanked out of a guess without changing any hint it could get. Every
+# guess is turned into that signature (its letters, with the ones missing
+# from the pools replaced by '*'); guesses with the same signature split the
+# pools into exactly the same groups, so only the first of them is kept, and
+# a guess that is all '*' tells nothing and is dropped. This holds however
+# repeated letters are scored, since a missing letter is black either way.
+#
+# Pruning the whole table for a new letter set takes a pass over every row.
+# A pick with a time budget can't afford that, so it only takes the LEAD_ROWS
+# rows a letter frequency ranking puts first (see leadRows) and prunes those.
+#
+# Scoring a guess on several pools at once can also skip the guesses that
+# can't win: jointBounds gives every row a cheap upper bound on its entropy
+# over the pools, and scoring.bestRowJoint only scores the rows whose bound
+# reaches the best score found. The hint of a guess is decided by which of
+# its spots are green and, for each of its letters, how many copies (up to
+# as many as the guess has) the answer has. So its entropy on a pool is at
+# most the sum of the entropies of those parts, and each of them is read off
+# the pool's masks.
+
+BLANK = '*'
+CACHE_SIZE = 256 # letter sets whose pruned dictionary is kept per table
+LEAD_ROWS = 512 # best ranked rows a budgeted pick looks at
+ALL_LETTERS = (1 << len(filters.ALPHABET)) - 1
+
+
+# CLASS: CANDIDATEINDEX
+# the letter signatures of every row of a pattern table, and a cache of the
+# pruned dictionary by the set of letters still possible.
+# ARGS:
+# table - patterns.PatternTable
+class CandidateIndex:
+    def __init__(self, table):
+        self.table = table
+        # rowLetters[row] - bitset of the letters in the guess of that row
+        self.rowLetters = [letterSet(word) for word in table.guesses]
+        self.pruned = OrderedDict() # letter set -> (kept rows of the table,
+                                    # signature -> kept row)
+        self.ranking = None # rows best first, made on first use
+        self.parts = None # per row, its (spot, letter) pairs and its
+                          # (letter, copies) pairs, made on first use
+        self.calls = 0
+        self.candidates = 0
+        self.kept = 0
+
+    # the rows of candidates (in order) left after pruning against letters,
+    # a bitset of the letters the pools still have, and the signature of
+    # every kept row.
+    def prune(self, rows, letters):
+        blank = str.maketrans({letter: BLANK for i, letter in
+                               enumerate(filters.ALPHABET)
+                               if not letters >> i & 1})
+        guesses = self.table.guesses
+        rowLetters = self.rowLetters
+        signatures = {}
+        kept = []
+        for row in rows:
+            if not rowLetters[row] & letters:
+                continue # all black on every board
+            signature = guesses[row].translate(blank)
+            if signature not in signatures:
+                signatures[signature] = row
+                kept.append(row)
+        return kept, signatures
+
+    # every row of the table, pruned against letters, with the signatures.
+    # kept per letter set, so turns (and games) that reach the same letters
+    # share it.
+    def allRows(self, letters):
+        found = self.pruned.get(letters)
+        if found is None:
+            found = self.prune(range(self.table.numRows), letters)
+            self.pruned[letters] = found
+            while len(self.pruned) > CACHE_SIZE:
+                self.pruned.popitem(last=False)
+        else:
+            self.pruned.move_to_end(letters)
+        return found
+
+    # every row of the table, best guess first by how common its letters are
+    # among the table's answers (anywhere, plus in their spot, as
+    # AI.CommonLetterSpots rates words). made once per table.
+    def ranked(self):
+        if self.ranking is None:
+            masks = words.asTable(self.table.answers).masks()
+            stats = letterstats.countStats(masks, masks.full)
+            present = stats.present
+            spots = list(enumerate(stats.spots))
+            scores = []
+            for word in self.table.guesses:
+                scores.append(sum([present[letter] for letter in set(word)]) +
+                              sum([spot[word[i]] for i, spot in spots]))
+            self.ranking = sorted(range(self.table.numRows),
+                                  key=scores.__getitem__, reverse=True)
+        return self.ranking
+
+    # the (spot, letter) and (letter, copies in the guess) pairs of every
+    # row, what jointBounds sums the entropies of.
+    def rowParts(self):
+        if self.parts is None:
+            self.parts = [(tuple(enumerate(word)),
+                           tuple([(letter, word.count(letter))
+                                  for letter in sorted(set(word))]))
+                          for word in self.table.guesses]
+        return self.parts
+
+    # adds one pruning of numCandidates down to numKept to the counters.
+    def count(self, numCandidates, numKept):
+        self.calls += 1
+        self.candidates += numCandidates
+        self.kept += numKept
+
+    # the counters as a dict.
+    def stats(self):
+        return {'calls': self.calls, 'candidates': self.candidates,
+                'kept': self.kept, 'pruned': self.candidates - self.kept}
+
+
+# FUNCTION: LETTERSET
+# bitset of the letters in a word (bit 0 = a).
+def letterSet(word):
+    letters = 0
+    for letter in word:
+        letters |= 1 << (ord(letter) - ord('a'))
+    return letters & ALL_LETTERS
+
+
+# FUNCTION: POOLLETTERS
+# bitset of the letters in any word of any of the pools. words.Pools are
+# read from their masks, 26 ANDs whatever their size.
+def poolLetters(pools):
+    letters = 0
+    for pool in pools:
+        if isinstance(pool, words.Pool):
+            present = pool.table.masks().present
+            for i, letter in enumerate(filters.ALPHABET):
+                if pool.bits & present[letter]:
+                    letters |= 1 << i
+        else:
+            for word in pool:
+                letters |= letterSet(patterns.cleanWord(word))
+    return letters
+
+
+_indexes = {} # id of a table -> (table, CandidateIndex)
+
+# FUNCTION: TABLEINDEX
+# the CandidateIndex of a table, built on first use.
+def tableIndex(table):
+    found = _indexes.get(id(table))
+    if found is None or found[0] is not table:
+        found = (table, CandidateIndex(table))
+        _indexes[id(table)] = found
+    return found[1]
+
+
+# FUNCTION: LEADROWS
+# the first count rows of the table's ranking with a letter from the pools,
+# for a pick that can't wait for the whole table to be pruned. stops as soon
+# as it has them.
+def leadRows(table, pools, count=LEAD_ROWS):
+    index = tableIndex(table)
+    letters = poolLetters(pools)
+    rowLetters = index.rowLetters
+    return list(islice((row for row in index.ranked()
+                        if rowLetters[row] & letters), count))
+
+
+# FUNCTION: CANDIDATEROWS
+# the table rows worth scoring against some pools.
+# ARGS:
+# table - patterns.PatternTable
+# pools - the pools the guess will be scored on
+# rows - candidate rows in order of preference, None for the whole table
+# first - with rows None, rows to put ahead of the rest of the table (e.g.
+# the pool's own words, so they win ties)
+# RETURNS:
+# (kept, pruned) - the rows left, in order (the first of every group of
+# equivalent guesses), and how many were cut
+def candidateRows(table, pools, rows=None, first=()):
+    index = tableIndex(table)
+    letters = poolLetters(pools)
+    if rows is not None:
+        rows = list(rows)
+        kept = index.prune(rows, letters)[0]
+        numCandidates = len(rows)
+    else:
+        kept, signatures = index.allRows(letters)
+        numCandidates = table.numRows
+        if first:
+            # the same pruning as first + every row, without redoing the
+            # whole table: rows equivalent to a kept first row are dropped.
+            numCandidates += len(first)
+            first, firstSignatures = index.prune(first, letters)
+            replaced = set([signatures[signature]
+                            for signature in firstSignatures
+                            if signature in signatures])
+            kept = first + [row for row in kept if row not in replaced]
+    index.count(numCandidates, len(kept))
+    return kept, numCandidates - len(kept)
+
+
+# FUNCTION: PARTENTROPIES
+# the entropies, over the words of bits, of whether a spot is green for each
+# (spot, letter), and of how many copies of a letter (capped at copies)
+# the answer has for each (letter, copies).
+# ARGS:
+# masks - filters.WordMasks of the table's answers
+# bits - bitset of the pool over masks
+# RETURNS:
+# (greens, copies) - spot -> letter -> bits, and (letter, copies) -> bits
+def partEntropies(masks, bits):
+    n = bits.bit_count()
+    logN = math.log2(n)
+
+    def entropy(counts):
+        return logN - sum([c * math.log2(c) for c in counts if c]) / n
+
+    greens = []
+    for spot in range(patterns.WORD_LENGTH):
+        green = masks.green[spot]
+        table = {}
+        for letter in filters.ALPHABET:
+            c = (bits & green[letter]).bit_count()
+            table[letter] = entropy((c, n - c))
+        greens.append(table)
+    copies = {}
+    for letter in filters.ALPHABET:
+        atLeast = [(bits & mask).bit_count() for mask in masks.atLeast[letter]]
+        for most in range(1, patterns.WORD_LENGTH + 1):
+            counts = [atLeast[k] - atLeast[k + 1] for k in range(most)]
+            copies[letter, most] = entropy(counts + [atLeast[most]])
+    return greens, copies
+
+
+# FUNCTION: JOINTBOUNDS
+# an upper bound on the scoring.scoreRowsJoint entropy score of every row
+# (see the top of the file), for scoring.bestRowJoint.
+# ARGS:
+# table - patterns.PatternTable
+# rows - table rows of the candidate guesses
+# poolsCols - list of column lists, one per pool still being solved
+# bonus - weight of the chance to solve a board with the guess
+# RETURNS:
+# bounds - one bound per row
+def jointBounds(table, rows, poolsCols, bonus=1.0):
+    masks = words.asTable(table.answers).masks()
+    groups = {} # distinct pools -> how many boards have that pool
+    for cols in poolsCols:
+        if len(cols) > 0:
+            key = tuple(cols)
+            groups[key] = groups.get(key, 0) + 1
+    pools = []
+    for cols, weight in groups.items():
+        bits = 0
+        for col in cols:
+            bits |= 1 << col
+        greens, copies = partEntropies(masks, bits)
+        pools.append((greens, copies, math.log2(len(cols)), weight))
+
+    solveChance = scoring.solveChances(table, poolsCols)
+    parts = tableIndex(table).rowParts()
+    bounds = []
+    for row in rows:
+        spots, counts = parts[row]
+        total = bonus * solveChance.get(row, 0)
+        for greens, copies, most, weight in pools:
+            bound = (sum([greens[spot][letter] for spot, letter in spots]) +
+                     sum([copies[count] for count in counts]))
+            total += weight * min(bound, most)
+        bounds.append(total)
+    return bounds
\ No newline at end of file
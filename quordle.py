@@ -1,19 +1,33 @@
 import time
 import random
+import operator
 import AI
+import patterns
+import filters
+import words
+import letterstats
+import aggregate
 
-NUM_ANSWERS = 2315 # the number of valid answers (lines in valid_answers.txt)
 NUM_GUESSES = 10657 # the number of valid guesses (lines in valid_guesses.txt)
 
+# guesses allowed to win a game, by number of boards: Wordle, Quordle,
+# Octordle, Sedecordle and Duotrigordle. other sizes get numWords + 5.
+GOALS = {1: 6, 4: 9, 8: 13, 16: 21, 32: 37}
+
 # CLASS: QUORDLE
 # represents a game of Wordle, quordle, or other.
 # ARGS:
 # answers - list of valid answers
 # numWords - number of words for the game (1 for Wordle, 4 for Quordle, etc.)
+# hidden - optional list of the hidden words to use instead of random ones
 class Quordle:
-    def __init__(self, answers, numWords):
+    def __init__(self, answers, numWords, hidden=None):
         self.answers = [] # list of hidden words
         self.numWords = numWords
+        self.columns = None # (hidden words, their table columns) for hintCodes
+        if hidden is not None:
+            self.answers = list(hidden)
+            return
 
         # randomly choose numWords number of hidden words
         i = 0
@@ -34,42 +48,76 @@ class Quordle:
     # more than one because in Quordle 4 different hints are returned for the
     # 4 different hidden words)
     def evaluateGuess(self, guess):
+        codes = self.hintCodes(guess) # precomputed hints, if available
+        if codes is not None:
+            return [patterns.HINTS[code] for code in codes]
+
         hints = [] # list of hints to be returned.
 
+        # repeated letters follow the Wordle rules (see patterns.patternCode)
+        guess = patterns.cleanWord(guess)
         for answer in self.answers:
-            hint = ''
-            count = 0
-            for letter in guess:
-                if letter.lower() == answer[count]: # letter matches
-                    hint += 'G'
-                elif letter.lower() in answer: # letter in word but not that spot
-                    hint += 'Y'
-                else: # letter not in word
-                    hint += 'B'
-
-                count += 1
-            hints.append(hint)
+            code = patterns.patternCode(guess, patterns.cleanWord(answer))
+            hints.append(patterns.HINTS[code])
         return hints
 
+    # FUNCTION: HINTCODES
+    # the pattern code of guess against every hidden word at once: one row of
+    # the pattern table, picked at the hidden words' columns.
+    # ARGS:
+    # guess - the string an AI is guessing
+    # RETURNS:
+    # codes - list of pattern codes, one per hidden word, or None if a word
+    # is not in the table
+    def hintCodes(self, guess):
+        table = patterns.defaultTable()
+        if table is None:
+            return None
+        row = table.rowOf(guess)
+        if row is None:
+            return None
+        if self.columns is None or self.columns[0] != self.answers:
+            cols = [table.colOf(answer) for answer in self.answers]
+            getter = None
+            if None not in cols:
+                getter = operator.itemgetter(*cols)
+            self.columns = (list(self.answers), getter)
+        getter = self.columns[1]
+        if getter is None:
+            return None
+        start = row * table.numCols
+        codes = getter(table.data[start:start + table.numCols])
+        return list(codes) if len(self.answers) > 1 else [codes]
+
 
 def main():
     # Keeping track of time, do not want to make program too long.
     tic = time.time()
 
-    # Create list of all possible answers (words that the hidden word could actually be)
-    answers = []
-    with open('data/valid_answers.txt') as answersText:
-        answers = answersText.readlines()
+    # Load all possible answers (words that the hidden word could actually be)
+    # once, into a table every game and AI shares.
+    answers = words.loadWords('data/valid_answers.txt')
 
-    # Create list of all possible guesses (words that the AI can guess that will be accepted)
-    guesses = []
-    with open('data/valid_guesses.txt') as guessesText:
-        guesses = guessesText.readlines()
+    # Load all possible guesses (words that the AI can guess that will be accepted)
+    guesses = words.loadWords('data/valid_guesses.txt')
 
     # Run tests on desired AI.
     # Change first arg for number of games
     # Change third arg for number of words in game (1 for wordle, 4 for quordle, etc)
     # Change last arg for the AI you want to test.
+    # Add workers=N to play the games on N processes, seed=S to repeat a run,
+    # reporter=reporters.PrintReporter() (after import reporters) to watch
+    # the games or reporter=reporters.JsonlReporter('games.jsonl') to record
+    # them (or open it in a with block, see reporters.Reporter, to close the
+    # file), and instruments=instrument.Instruments() (after import
+    # instrument) to see where the time goes. goal=N changes how many
+    # guesses still count as a win (see GOALS), and
+    # stats=aggregate.RunStats(4, WinGoal(4)) collects the variance,
+    # percentiles and per-board solve turns. For runs long enough to be
+    # interrupted, PlayLongRun checkpoints and resumes, and PlayUntilConverged
+    # picks the number of games itself. To compare strategies on the same
+    # games, run tournament.py instead. Running bundle.py once (and again
+    # after editing the word lists or AI.py) makes startup faster.
     res = PlayManyGames(100, answers, 4, AI.Entropy)
     print("\nAVERAGE NUM OF GUESSES: ", res[0], "\nWIN PERCENTAGE: ",
     res[1], "\nWORST GAME: ", res[2], "\nBEST GAME: ", res[3])
@@ -85,43 +133,113 @@ def main():
 # answers - valid answers
 # numWords - number of words for the game (1 for Wordle, 4 for Quordle)
 # ai - the AI type that we want to play
+# seed - if given, the random module is seeded with it first so the game
+# (hidden words and any random AI choices) can be replayed exactly.
+# reporter - a reporters.Reporter to show the game to, None to play silently
+# hidden - optional list of hidden words to play against instead of random
+# ones
+# instruments - an instrument.Instruments to time every phase of the game
+# with, None to skip timing
+# turns - optional list of numWords numbers, set to the turn every board's
+# word was found on
+# goal - most guesses that still win, told to the AI (for AIs that plan
+# around it); None for WinGoal(numWords)
 # RETURNS:
 # numGuesses - the number of guesses needed to find the word.
-def PlayAGame(answers, numWords, ai):
-    game = Quordle(answers, numWords) # make new game
+def PlayAGame(answers, numWords, ai, seed=None, reporter=None, hidden=None,
+              instruments=None, turns=None, goal=None):
+    if seed is not None:
+        random.seed(seed)
+    if instruments is not None:
+        instruments.startGame(ai.__name__, seed)
+        clock = time.perf_counter
+        tic = clock()
+    game = Quordle(answers, numWords, hidden) # make new game
     myAI = ai(answers, numWords); # make new AI
-    allGuesses = []
+    if goal is not None:
+        myAI.goal = goal
+    if instruments is not None:
+        instruments.addTime('setup', clock() - tic)
     numGuesses = 0
-    numCorrect = 0
-    print("--------------------------")
+    live = list(range(numWords)) # boards whose word has not been guessed
+    if reporter is not None:
+        reporter.startGame(seed, game.answers)
 
-    print("\nHIDDEN WORDS ARE: ", game.answers)
-    while numCorrect < numWords:
+    while live:
+        if instruments is not None:
+            tic = clock()
         word = myAI.pickWord() # AI picks a word
         numGuesses += 1
-        print("PICKED WORD: ", word, " out of ", len(myAI.poolToChooseFrom)+1, " words")
+        if instruments is not None:
+            instruments.addTime('pickWord', clock() - tic)
+            instruments.addValue('poolSize', len(myAI.poolToChooseFrom)+1)
+            pruned = getattr(myAI, 'pruned', None)
+            if pruned is not None: # guesses the AI cut before scoring
+                instruments.addValue('pruned', pruned)
+            evaluated = getattr(myAI, 'evaluated', None)
+            if evaluated is not None: # share of the pool a budget allowed
+                instruments.addValue('evaluated', evaluated)
+        if reporter is not None:
+            choseFrom = len(myAI.poolToChooseFrom)+1
 
-        if word in game.answers: # exit if its correct (change for >1 word)
-            numCorrect += 1
-            allGuesses.append(word.upper())
-        else:
-            allGuesses.append(word)
-
-
-        hint = game.evaluateGuess(word[:5]) # evaluate latest guess
-        print(game.answers)
-        print(hint)
-        interpretationsCount = 0
-        while interpretationsCount < numWords:
-            myAI.interpretHint(hint[interpretationsCount], word[:5],
-            myAI.guessPools[interpretationsCount]) # narrow down AI's guess pools
-            print(interpretationsCount, ": ", len(myAI.guessPools[interpretationsCount]))
-            interpretationsCount += 1
-    print ("ALL GUESSES: ", allGuesses)
-    print("GOT ALL WORDS IN :", numGuesses, " GUESSES.")
-    print("--------------------------")
+        correct = word in game.answers
+
+        if instruments is not None:
+            tic = clock()
+        # every board's hint in one lookup, as codes.
+        codes = game.hintCodes(word[:5])
+        if codes is None: # word not in the table, score it the slow way
+            codes = [patterns.hintCode(hint)
+                     for hint in game.evaluateGuess(word[:5])]
+        if instruments is not None:
+            instruments.addTime('evaluateGuess', clock() - tic)
+
+        # only boards still being played are looked at. a solved board is
+        # counted once and its pool dropped so the AI never spends another
+        # guess (or another look) on it.
+        stillLive = []
+        for board in live:
+            pool = myAI.guessPools[board]
+            if instruments is not None:
+                before = len(pool)
+                tic = clock()
+            if codes[board] == patterns.SOLVED:
+                pool.clear()
+                if turns is not None:
+                    turns[board] = numGuesses
+            else:
+                myAI.interpretHint(patterns.HINTS[codes[board]], word[:5],
+                pool) # narrow down AI's guess pools
+                stillLive.append(board)
+            if instruments is not None:
+                instruments.addTime('interpretHint', clock() - tic)
+                instruments.addValue('eliminated', before - len(pool))
+        live = stillLive
+
+        if reporter is not None:
+            hint = [patterns.HINTS[code] for code in codes]
+            reporter.guessMade(word, correct, choseFrom, hint,
+                               [len(pool) for pool in myAI.guessPools])
+
+    if reporter is not None:
+        reporter.endGame(numGuesses)
+    if instruments is not None:
+        instruments.addValue('guesses', numGuesses)
+        instruments.endGame()
     return numGuesses
 
+# FUNCTION: PLAYNUMBEREDGAME
+# plays game number j of a PlayManyGames run, under cProfile if the
+# instruments ask for that game to be profiled.
+def PlayNumberedGame(answers, numWords, ai, gameSeed, j, reporter,
+                     instruments, turns=None, goal=None):
+    if instruments is not None and instruments.shouldProfile(j):
+        return instruments.profile(j, ai.__name__, lambda: PlayAGame(
+            answers, numWords, ai, gameSeed, reporter, None, instruments,
+            turns, goal))
+    return PlayAGame(answers, numWords, ai, gameSeed, reporter, None,
+                     instruments, turns, goal)
+
 
 # FUNCTION: PLAYMANYGAMES
 # Plays a particular number of games of wordle/quordle/other, and reports the
@@ -131,54 +249,257 @@ def PlayAGame(answers, numWords, ai):
 # answers - valid answers
 # numWords - number of words for the game (1 for Wordle, 4 for Quordle)
 # ai - the AI type that we want to play
+# workers - number of processes to spread the games over (1 plays them here)
+# seed - base seed; game j is played with GameSeed(seed, j), so results are
+# the same for any number of workers. None plays unseeded games when serial
+# and picks a random base seed when parallel.
+# reporter - a reporters.Reporter to show every game to, None to play
+# silently
+# instruments - an instrument.Instruments to collect timings in, None to
+# skip them. its summary is printed/saved once all the games are done.
+# goal - most guesses a game can take and still count as a win, None for
+# WinGoal(numWords)
+# stats - an aggregate.RunStats every game (and the turn each board was
+# solved on) is added to, None to skip it
+# first - number of the first game, so a long run can be played in pieces
 # RETURNS:
 # results - tuple with resulting average number of guesses, win percentage,
 # the worst game the AI played, and the best game the AI played
-def PlayManyGames(numGames, answers, numWords, ai):
-    count = 0 # total number of guesses over all the games
-    wins = 0 # number of times the AI guessed it in less than 6 (change for >1 word)
-    best = 99 # best case, number should only go down
-    worst = 0 # worst case, number should only go up
-    goal = numWords + 5
-
-    j = 0
-    while j < numGames:
-        newAnswers = answers.copy() # need to make new answers each time, otherwise
-                                    # guessPools stay small.
-        temp = PlayAGame(newAnswers, numWords, ai)
-        if temp > worst: # updates worst if necessary.
-            worst = temp
-        if temp < best: # updates best if necessary.
-            best = temp
-        if temp <= goal: # adds a W if the AI won in time.
-            wins += 1
-        count += temp # update total number of guesses to calc avg later
-        j += 1
-        print("FINISHED GAME NUMBER: ", j)
+def PlayManyGames(numGames, answers, numWords, ai, workers=1, seed=None,
+                  reporter=None, instruments=None, goal=None, stats=None,
+                  first=0):
+    if goal is None:
+        goal = WinGoal(numWords)
+    # one shared, read only table: games and AIs only make views of it.
+    answers = words.asTable(answers)
+
+    try:
+        if workers <= 1:
+            totals = [0, 0, 0, 99]
+            turns = None
+            j = first
+            while j < first + numGames:
+                gameSeed = None if seed is None else GameSeed(seed, j)
+                if stats is not None:
+                    turns = [0] * numWords
+                temp = PlayNumberedGame(answers, numWords, ai, gameSeed, j,
+                                        reporter, instruments, turns, goal)
+                AddGame(totals, temp, goal)
+                if stats is not None:
+                    stats.addGame(temp, turns)
+                j += 1
+        else:
+            if seed is None:
+                seed = random.randrange(2 ** 32)
+            totals = PlayGamesInParallel(numGames, answers, numWords, ai,
+                                         goal, workers, seed, reporter,
+                                         instruments, stats, first)
+    finally:
+        if reporter is not None: # write out the games a reporter held back
+            reporter.flush()
+
+    if instruments is not None:
+        instruments.finish()
 
+    count, wins, worst, best = totals
     avg = count / numGames # find average
     winPct = wins / numGames # find win percentage
     return (avg, winPct, worst, best)
 
+# FUNCTION: WINGOAL
+# guesses allowed to win a game with numWords boards.
+def WinGoal(numWords):
+    return GOALS.get(numWords, numWords + 5)
+
+# FUNCTION: ADDGAME
+# adds one game to running totals [total guesses, wins, worst, best].
+def AddGame(totals, numGuesses, goal):
+    totals[0] += numGuesses # update total number of guesses to calc avg later
+    if numGuesses <= goal: # adds a W if the AI won in time.
+        totals[1] += 1
+    if numGuesses > totals[2]: # updates worst if necessary.
+        totals[2] = numGuesses
+    if numGuesses < totals[3]: # updates best if necessary.
+        totals[3] = numGuesses
+
+# FUNCTION: MERGETOTALS
+# merges totals from another set of games into totals.
+def MergeTotals(totals, other):
+    totals[0] += other[0]
+    totals[1] += other[1]
+    totals[2] = max(totals[2], other[2])
+    totals[3] = min(totals[3], other[3])
+
+# FUNCTION: GAMESEED
+# the seed for game number j of a run with base seed seed.
+def GameSeed(seed, j):
+    return "%d:%d" % (seed, j)
+
+# the read only game setup each worker process plays with, set once per
+# worker by InitWorker instead of being sent with every task.
+_workerSetup = None
+
+# FUNCTION: INITWORKER
+# process pool initializer. with fork the arguments are simply inherited,
+# including the pattern table and letter masks loaded by the parent.
+def InitWorker(answers, numWords, ai, goal, reporter, instruments,
+               keepStats=False):
+    global _workerSetup
+    _workerSetup = (answers, numWords, ai, goal, reporter, instruments,
+                    keepStats)
+
+# FUNCTION: PLAYGAMERANGE
+# plays games start..stop-1 of a seeded run inside a worker and returns
+# their totals, any records the worker's reporter collected, the timings
+# its instruments collected (which are then reset) and, if asked for, the
+# state of a RunStats of those games.
+def PlayGameRange(task):
+    seed, start, stop = task
+    (answers, numWords, ai, goal, reporter, instruments,
+     keepStats) = _workerSetup
+    totals = [0, 0, 0, 99]
+    stats = aggregate.RunStats(numWords, goal) if keepStats else None
+    turns = None
+    for j in range(start, stop):
+        if stats is not None:
+            turns = [0] * numWords
+        temp = PlayNumberedGame(answers, numWords, ai, GameSeed(seed, j), j,
+                                reporter, instruments, turns, goal)
+        AddGame(totals, temp, goal)
+        if stats is not None:
+            stats.addGame(temp, turns)
+    records = reporter.collected() if reporter is not None else []
+    timings = None
+    if instruments is not None:
+        timings = instruments.state()
+        instruments.clear()
+    statsState = stats.state() if stats is not None else None
+    return (start, stop, totals, records, timings, statsState)
+
+# FUNCTION: PLAYGAMESINPARALLEL
+# plays numGames seeded games (numbered from first) over a pool of worker
+# processes and returns the merged totals. the games' statistics are merged
+# into stats if it is given.
+def PlayGamesInParallel(numGames, answers, numWords, ai, goal, workers, seed,
+                        reporter, instruments, stats=None, first=0):
+    # load the shared tables before forking so every worker maps the same
+    # pages instead of loading its own copy.
+    patterns.defaultTable()
+    filters.defaultMasks()
+
+    chunk = max(1, numGames // (workers * 4))
+    tasks = [(seed, start, min(start + chunk, first + numGames))
+             for start in range(first, first + numGames, chunk)]
+
+    import multiprocessing # imported here, only parallel runs need it
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context('fork' if 'fork' in methods else None)
+    workerReporter = reporter.forWorker() if reporter is not None else None
+    workerInstruments = None
+    if instruments is not None:
+        workerInstruments = instruments.forWorker()
+    totals = [0, 0, 0, 99]
+    with context.Pool(workers, InitWorker, (answers, numWords, ai, goal,
+                                            workerReporter,
+                                            workerInstruments,
+                                            stats is not None)) as pool:
+        for (start, stop, other, records, timings,
+             statsState) in pool.imap_unordered(PlayGameRange, tasks):
+            MergeTotals(totals, other)
+            if reporter is not None:
+                reporter.writeRecords(records)
+            if timings is not None:
+                instruments.merge(timings)
+            if statsState is not None:
+                stats.merge(aggregate.RunStats.fromState(statsState))
+    return totals
+
+# FUNCTION: PLAYLONGRUN
+# plays a long seeded run in pieces of every games, saving the statistics
+# to a checkpoint file after each piece. run again with the same arguments,
+# it picks up after the last piece saved instead of starting over; nothing
+# is kept per game, so memory stays the same however long the run.
+# ARGS:
+# numGames - number of games in the whole run
+# answers - valid answers
+# numWords - number of words for the game (1 for Wordle, 4 for Quordle)
+# ai - the AI type that we want to play
+# seed - base seed, game j is played with GameSeed(seed, j)
+# path - the checkpoint file
+# every - games played between checkpoints
+# workers - number of processes to spread the games over
+# goal - most guesses a game can take and still count as a win, None for
+# WinGoal(numWords)
+# RETURNS:
+# stats - aggregate.RunStats of every game of the run
+def PlayLongRun(numGames, answers, numWords, ai, seed, path, every=1000,
+                workers=1, goal=None):
+    if goal is None:
+        goal = WinGoal(numWords)
+    answers = words.asTable(answers)
+    checkpoint = aggregate.Checkpoint(path, {
+        'strategy': ai.__name__, 'numWords': numWords, 'numGames': numGames,
+        'seed': seed, 'goal': goal, 'answers': answers.digest()})
+    saved = checkpoint.load() # raises ValueError for another run's file
+    if saved is not None:
+        done, stats = saved
+    else:
+        done, stats = 0, aggregate.RunStats(numWords, goal)
+    while done < numGames:
+        size = min(every, numGames - done)
+        PlayManyGames(size, answers, numWords, ai, workers, seed, goal=goal,
+                      stats=stats, first=done)
+        done += size
+        checkpoint.save(done, stats)
+    return stats
+
+# FUNCTION: PLAYUNTILCONVERGED
+# plays seeded games in batches until the interval of the mean guesses and
+# of the win rate are both narrow enough, instead of a fixed number of games.
+# ARGS:
+# answers - valid answers
+# numWords - number of words for the game (1 for Wordle, 4 for Quordle)
+# ai - the AI type that we want to play
+# seed - base seed, game j is played with GameSeed(seed, j)
+# meanWidth - widest the interval of the mean guesses may be
+# winWidth - widest the interval of the win rate may be
+# batch - games played between looks at the intervals
+# maxGames - games after which it stops anyway
+# workers - number of processes to spread the games over
+# goal - most guesses a game can take and still count as a win, None for
+# WinGoal(numWords)
+# z - width of the intervals in standard errors
+# RETURNS:
+# (stats, converged) - aggregate.RunStats of the games played, and False if
+# maxGames ran out first
+def PlayUntilConverged(answers, numWords, ai, seed=0, meanWidth=0.1,
+                       winWidth=0.02, batch=200, maxGames=100000, workers=1,
+                       goal=None, z=aggregate.Z_SEQUENTIAL):
+    if goal is None:
+        goal = WinGoal(numWords)
+    answers = words.asTable(answers)
+    stats = aggregate.RunStats(numWords, goal)
+    while stats.games < maxGames:
+        size = min(batch, maxGames - stats.games)
+        PlayManyGames(size, answers, numWords, ai, workers, seed, goal=goal,
+                      stats=stats, first=stats.games)
+        low, high = stats.meanInterval(z)
+        winLow, winHigh = stats.winInterval(z)
+        if high - low <= meanWidth and winHigh - winLow <= winWidth:
+            return stats, True
+    return stats, False
+
 # FUNCTION: PERCENTAGEOFWORDS
-# funcction i used to calculate the percentage of 5-letter words each letter
-# is in.
+# the fraction of the words in a word list that have a letter. comes from
+# letterstats, which counts every letter of a list in one go and keeps the
+# tables by the list's contents.
 def PercentageOfWords(words, letter):
-    count = 0
-    for word in words:
-        if letter in word:
-            count += 1
-    return count / NUM_ANSWERS
+    return letterstats.wordStats(words).present[letter]
 
 # FUNCITON: PercentageOfLetters
-# function i used to calculate the percentage of spots in the words with the certain
-# letters are.
+# the fraction of the words in a word list with a letter in a spot.
 def PercentageOfLetters(words, letter, spot):
-    count = 0
-    for word in words:
-        if letter == word[spot]:
-            count += 1
-    return count / NUM_ANSWERS
+    return letterstats.wordStats(words).spots[spot][letter]
 
 
 if __name__ == '__main__':
@@ -0,0 +1,128 @@
+import hashlib
+import json
+import os
+
+import words
+
+# Cache of the word rankings the sorting strategies use. A strategy's score
+# for a word never changes, so each (word list, strategy, score method) is
+# scored and sorted once per process and every game after that just points
+# its pools at the same Ranking. Set PERSIST_DIR (e.g. to
+# patterns.CACHE_DIR) to also keep the scores on disk between runs.
+
+RANK_VERSION = 1
+PERSIST_DIR = None # directory to save score vectors in, None for no files
+
+_rankings = {}
+_fingerprints = {}
+
+
+# FUNCTION: STRATEGYFINGERPRINT
+# sha256 of a strategy class's source (its score method and the tables it
+# reads), so editing the class invalidates saved scores. classes without
+# source (defined interactively) fall back to their name.
+def strategyFingerprint(ai):
+    fingerprint = _fingerprints.get(ai)
+    if fingerprint is None:
+        import inspect # imported here, it is slow to import and only
+                       # needed when scores are saved
+        try:
+            source = inspect.getsource(ai)
+        except (OSError, TypeError):
+            source = ai.__qualname__
+        fingerprint = hashlib.sha256(source.encode('utf-8')).hexdigest()
+        _fingerprints[ai] = fingerprint
+    return fingerprint
+
+
+# FUNCTION: SCOREVECTOR
+# the score of every word of table under an AI's score method, read from
+# PERSIST_DIR when an earlier run saved it.
+# ARGS:
+# table - words.WordTable
+# ai - the AI class
+# keyName - name of the score method, e.g. 'ScrabbleWord'
+# RETURNS:
+# scores - list with one score per word of the table
+def scoreVector(table, ai, keyName):
+    path = None
+    if PERSIST_DIR is not None:
+        path = os.path.join(PERSIST_DIR, 'rank-%s-%s-%s-%s.json' % (
+            ai.__name__, keyName, strategyFingerprint(ai)[:12],
+            table.digest()[:12]))
+        try:
+            with open(path) as scoreFile:
+                saved = json.load(scoreFile)
+            if (saved.get('version') == RANK_VERSION and
+                    len(saved['scores']) == len(table)):
+                return saved['scores']
+        except (OSError, ValueError, KeyError):
+            pass
+
+    # the score methods only read class tables, so an uninitialized
+    # instance is enough to call them.
+    score = getattr(ai.__new__(ai), keyName)
+    scores = [score(word) for word in table.words]
+
+    if path is not None:
+        try:
+            os.makedirs(PERSIST_DIR, exist_ok=True)
+            temp = '%s.%d.tmp' % (path, os.getpid())
+            with open(temp, 'w') as scoreFile:
+                json.dump({'version': RANK_VERSION, 'scores': scores},
+                          scoreFile)
+            os.replace(temp, path)
+        except OSError:
+            pass
+    return scores
+
+
+# FUNCTION: RANKING
+# the shared words.Ranking of a table under an AI's score method. the same
+# order list.sort(key=score, reverse=reverse) gives the table's words. the
+# strategies of AI.py over the default answers take their order from the
+# prebuilt bundle when there is a fresh one.
+# ARGS:
+# table - words.WordTable
+# ai - the AI class
+# keyName - name of the score method
+# reverse - True for highest score first
+# RETURNS:
+# ranking - words.Ranking, shared by everyone asking for the same one
+def ranking(table, ai, keyName, reverse=True):
+    key = (table, ai, keyName, reverse)
+    found = _rankings.get(key)
+    if found is None:
+        order = bundledOrder(table, ai, keyName, reverse)
+        if order is None:
+            scores = scoreVector(table, ai, keyName)
+            order = sorted(range(len(table)), key=scores.__getitem__,
+                           reverse=reverse)
+        found = words.Ranking(order)
+        _rankings[key] = found
+    return found
+
+
+# FUNCTION: BUNDLEDORDER
+# the order bundle.py saved for (table, ai, keyName), or None if it has none.
+# only highest first orders of the classes in AI.py over the default answers
+# are bundled, and the bundle goes stale when AI.py changes.
+def bundledOrder(table, ai, keyName, reverse):
+    if not reverse or ai.__module__ != 'AI':
+        return None
+    import bundle # imported here, bundle imports us
+    shared = bundle.sharedBundle()
+    if shared is None or table is not words.defaultAnswers():
+        return None
+    return shared.rankOrder(ai.__name__, keyName)
+
+
+# FUNCTION: RANKPOOL
+# the cached version of pool.sort(key=getattr(ai(), keyName), reverse=reverse).
+# a pool that already has an order of its own is sorted the slow way, since
+# the stable sort has to break ties by that order.
+def rankPool(pool, ai, keyName, reverse=True):
+    if pool.ranking is not None:
+        pool.sort(key=getattr(ai.__new__(ai), keyName), reverse=reverse)
+    else:
+        pool.ranking = ranking(pool.table, ai, keyName, reverse)
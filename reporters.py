@@ -0,0 +1,162 @@
+import json
+import sys
+
+# Reporters are handed to PlayAGame / PlayManyGames to see what happens in a
+# game. Passing no reporter (the default) plays silently and the game loop
+# skips all reporting work.
+
+
+# CLASS: REPORTER
+# base reporter, ignores everything. subclasses override what they need.
+class Reporter:
+    # called once the hidden words are chosen.
+    def startGame(self, seed, hidden):
+        pass
+
+    # called after every guess.
+    # ARGS:
+    # word - the word the AI picked
+    # correct - True if it was one of the hidden words
+    # choseFrom - size of the pool the AI picked it from
+    # hints - the hints returned for every board
+    # poolSizes - size of every board's pool after the hints
+    def guessMade(self, word, correct, choseFrom, hints, poolSizes):
+        pass
+
+    # called when every hidden word has been found.
+    def endGame(self, numGuesses):
+        pass
+
+    # the reporter a worker process should use when games are played in
+    # parallel (None for silent workers).
+    def forWorker(self):
+        return None
+
+    # records a worker collected, to send back to the parent.
+    def collected(self):
+        return []
+
+    # takes records collected by a worker reporter.
+    def writeRecords(self, records):
+        pass
+
+    # writes out anything held back. PlayManyGames calls it once the games
+    # are done.
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+    # reporters are context managers, closed (and so flushed) on exit:
+    #   with reporters.JsonlReporter('games.jsonl') as reporter:
+    #       quordle.PlayManyGames(100, answers, 4, AI.Entropy,
+    #                             reporter=reporter)
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# CLASS: PRINTREPORTER
+# prints every game as it goes, the way the games always used to.
+class PrintReporter(Reporter):
+    def __init__(self):
+        self.allGuesses = []
+        self.gamesDone = 0
+
+    def startGame(self, seed, hidden):
+        self.hidden = hidden
+        self.allGuesses = []
+        print("--------------------------")
+        print("\nHIDDEN WORDS ARE: ", hidden)
+
+    def guessMade(self, word, correct, choseFrom, hints, poolSizes):
+        print("PICKED WORD: ", word, " out of ", choseFrom, " words")
+        self.allGuesses.append(word.upper() if correct else word)
+        print(self.hidden)
+        print(hints)
+        for i, size in enumerate(poolSizes):
+            print(i, ": ", size)
+
+    def endGame(self, numGuesses):
+        self.gamesDone += 1
+        print("ALL GUESSES: ", self.allGuesses)
+        print("GOT ALL WORDS IN :", numGuesses, " GUESSES.")
+        print("--------------------------")
+        print("FINISHED GAME NUMBER: ", self.gamesDone)
+
+    def forWorker(self):
+        return PrintReporter()
+
+
+# CLASS: JSONLREPORTER
+# writes one JSON record per game (seed, hidden words, guesses, hints, pool
+# sizes per board after every guess, number of guesses) to a file or stdout.
+# lines are buffered and written bufferSize games at a time, and whatever is
+# left when PlayManyGames ends (or on flush / close, or leaving a with block).
+# ARGS:
+# out - file path, '-' for stdout, an open text stream, or None to only
+# collect records (what worker processes use)
+# bufferSize - number of records held before writing
+class JsonlReporter(Reporter):
+    def __init__(self, out='-', bufferSize=256):
+        self.bufferSize = bufferSize
+        self.ownsStream = False
+        if out == '-':
+            self.stream = sys.stdout
+        elif isinstance(out, str):
+            self.stream = open(out, 'a')
+            self.ownsStream = True
+        else:
+            self.stream = out
+        self.buffer = []
+        self.record = None
+
+    def startGame(self, seed, hidden):
+        self.record = {
+            'seed': seed,
+            'hidden': [w.strip() for w in hidden],
+            'guesses': [],
+            'hints': [],
+            'poolSizes': [],
+        }
+
+    def guessMade(self, word, correct, choseFrom, hints, poolSizes):
+        self.record['guesses'].append(word.strip())
+        self.record['hints'].append(hints)
+        self.record['poolSizes'].append(poolSizes)
+
+    def endGame(self, numGuesses):
+        self.record['numGuesses'] = numGuesses
+        self.writeRecords([self.record])
+        self.record = None
+
+    def forWorker(self):
+        return JsonlReporter(None)
+
+    def collected(self):
+        records = self.buffer
+        self.buffer = []
+        return records
+
+    def writeRecords(self, records):
+        self.buffer.extend(records)
+        if self.stream is not None and len(self.buffer) >= self.bufferSize:
+            self.flush()
+
+    # writes out every buffered record.
+    def flush(self):
+        if self.stream is None or not self.buffer:
+            return
+        self.stream.write(''.join(json.dumps(r, separators=(',', ':')) + '\n'
+                                  for r in self.buffer))
+        self.stream.flush()
+        self.buffer = []
+
+    def close(self):
+        self.flush()
+        if self.ownsStream:
+            self.stream.close()
+            self.ownsStream = False
@@ -0,0 +1,195 @@
+import math
+from functools import lru_cache
+
+import patterns
+import filters
+import scoring
+import words
+
+# Which board a multi-board AI works on each turn. Every strategy picks its
+# word from one board's pool, and the scheduler decides which. It ranks the
+# boards still being played; a board with one word left always comes first,
+# since that word has to be guessed some time and guessing it now also gives
+# hints on every other board. After that it depends on the policy:
+#
+#   LARGEST  - the most words left (the original rule)
+#   ENTROPY  - the board whose best guess would learn the most, in bits
+#   EXPECTED - the board expected to need the most turns still, since the
+#              game lasts until the slowest board is solved
+#   DEADLINE - EXPECTED while there are turns to spare before the win goal;
+#              once the turns left run short, the board closest to solved,
+#              so as many boards as possible are done in time
+#
+# A board's rating only changes when its pool does, so each Scheduler keeps
+# the last rating of every board with the pool it was made for, and only
+# boards the last hint narrowed are rated again. Ratings of the same pool are
+# also shared between games through a cache keyed by the pool's bitset.
+
+LARGEST = 'largest'
+ENTROPY = 'entropy'
+EXPECTED = 'expected'
+DEADLINE = 'deadline'
+POLICIES = (LARGEST, ENTROPY, EXPECTED, DEADLINE)
+
+SAMPLE_GUESSES = 24 # pool words tried as guesses when rating a board
+DEADLINE_SLACK = 1 # spare turns below which DEADLINE finishes boards
+CACHE_SIZE = 65536 # pool ratings shared between games
+
+
+# CLASS: BOARDRATING
+# what the scheduler knows about one board's pool.
+# ARGS:
+# size - words left
+# gain - bits the best sampled pool word would learn as a guess
+# turns - estimate of the guesses still needed to solve the board
+class BoardRating:
+    __slots__ = ('size', 'gain', 'turns')
+
+    def __init__(self, size, gain, turns):
+        self.size = size
+        self.gain = gain
+        self.turns = turns
+
+
+# FUNCTION: EXPECTEDTURNS
+# estimate of the guesses a board with size words needs when each guess
+# learns gain bits: the guess that may be right, then log2(size) / gain more
+# if it was not (1 in size it was).
+def expectedTurns(size, gain):
+    if size <= 1:
+        return float(size)
+    if gain <= 0: # nothing splits the pool, one word at a time
+        return (size + 1) / 2
+    return 1 + (1 - 1 / size) * math.log2(size) / gain
+
+
+# FUNCTION: RATECOLUMNS
+# rates the pool of a table's answer columns. up to SAMPLE_GUESSES of the
+# pool's words, spread over it, are scored as guesses against it. cached,
+# since the same pools (the full list, the pools after the starters) come up
+# in game after game.
+# ARGS:
+# table - patterns.PatternTable
+# cols - sorted tuple of the pool's answer columns
+# RETURNS:
+# rating - BoardRating
+@lru_cache(maxsize=CACHE_SIZE)
+def rateColumns(table, cols):
+    size = len(cols)
+    if size <= 1:
+        return BoardRating(size, 0.0, float(size))
+    step = max(1, size // SAMPLE_GUESSES)
+    rows = []
+    for col in cols[::step][:SAMPLE_GUESSES]:
+        row = table.rowOf(table.answers[col])
+        if row is not None:
+            rows.append(row)
+    if not rows:
+        return rateSize(size)
+    gain = max(scoring.scoreRows(table, rows, cols, scoring.ENTROPY))
+    return BoardRating(size, gain, expectedTurns(size, gain))
+
+
+# FUNCTION: RATEBITS
+# rateColumns of a bitset pool over the table's answers. cached by the bits,
+# so a pool seen before is not even turned into columns.
+@lru_cache(maxsize=CACHE_SIZE)
+def rateBits(table, bits):
+    return rateColumns(table, tuple(filters.bitIndices(bits)))
+
+
+# FUNCTION: RATESIZE
+# rates a pool that is not in the pattern table by its size alone, as if a
+# guess could split it evenly.
+def rateSize(size):
+    if size <= 1:
+        return BoardRating(size, 0.0, float(size))
+    gain = math.log2(min(size, patterns.NUM_PATTERNS))
+    return BoardRating(size, gain, expectedTurns(size, gain))
+
+
+# FUNCTION: RATEPOOL
+# BoardRating of a pool (a words.Pool or a list of words).
+def ratePool(pool):
+    size = len(pool)
+    if size <= 1:
+        return BoardRating(size, 0.0, float(size))
+    table = patterns.defaultTable()
+    if table is None:
+        return rateSize(size)
+    if isinstance(pool, words.Pool) and table.sameAnswers(pool.table):
+        return rateBits(table, pool.bits)
+    cols = scoring.poolColumns(table, pool)
+    if cols is None:
+        return rateSize(size)
+    return rateColumns(table, tuple(sorted(cols)))
+
+
+# CLASS: SCHEDULER
+# chooses the board an AI picks its word for, one per AI.
+# ARGS:
+# policy - LARGEST, ENTROPY, EXPECTED or DEADLINE
+# goal - most guesses that still win, for DEADLINE; None for
+# quordle.WinGoal of the number of boards
+class Scheduler:
+    def __init__(self, policy=LARGEST, goal=None):
+        if policy not in POLICIES:
+            raise ValueError('unknown pool policy: %r' % (policy,))
+        self.policy = policy
+        self.goal = goal
+        self.turns = 0 # boards chosen so far, one per guess
+        self.states = {} # board -> the pool state its rating is of
+        self.ratings = {} # board -> BoardRating
+
+    # a copy that can go on choosing without touching this one.
+    def copy(self):
+        twin = Scheduler(self.policy, self.goal)
+        twin.turns = self.turns
+        twin.states = dict(self.states)
+        twin.ratings = dict(self.ratings)
+        return twin
+
+    # the rating of one board, made again only if its pool changed since the
+    # last one. pools only ever shrink, so a list pool is known by its size.
+    def rate(self, board, pool):
+        state = pool.bits if isinstance(pool, words.Pool) else len(pool)
+        if self.states.get(board) != state:
+            self.ratings[board] = ratePool(pool)
+            self.states[board] = state
+        return self.ratings[board]
+
+    # the boards still being played (the ones with words left), best first.
+    def rank(self, pools):
+        live = [board for board, pool in enumerate(pools) if len(pool)]
+        singles = [board for board in live if len(pools[board]) == 1]
+        rest = [board for board in live if len(pools[board]) != 1]
+        if self.policy == LARGEST: # sizes are all it needs
+            rest.sort(key=lambda board: -len(pools[board]))
+            return singles + rest
+
+        ratings = {board: self.rate(board, pools[board]) for board in rest}
+        if self.policy == ENTROPY:
+            rest.sort(key=lambda board: -ratings[board].gain)
+        elif self.policy == EXPECTED or not self.shortOfTurns(ratings, pools):
+            rest.sort(key=lambda board: -ratings[board].turns)
+        else:
+            rest.sort(key=lambda board: ratings[board].turns)
+        return singles + rest
+
+    # True if the boards left are expected to need about as many guesses as
+    # there are turns before the goal (every board needs at least its own).
+    def shortOfTurns(self, ratings, pools):
+        goal = self.goal
+        if goal is None:
+            import quordle # imported here, quordle imports AI, which imports us
+            goal = quordle.WinGoal(len(pools))
+        left = goal - self.turns + 1 # counting the guess being chosen for
+        singles = sum([1 for pool in pools if len(pool) == 1])
+        needed = singles + sum([rating.turns for rating in ratings.values()])
+        return left - needed < DEADLINE_SLACK
+
+    # the board to pick from this turn, or None if every board is solved.
+    def choose(self, pools):
+        self.turns += 1
+        ranked = self.rank(pools)
+        return ranked[0] if ranked else None
@@ -0,0 +1,326 @@
+import math
+import random
+import time
+from collections import Counter
+from operator import itemgetter
+
+import words
+
+# Batched guess scoring on top of the pattern table. For each candidate guess
+# the patterns against the whole pool are pulled out of the table row in one
+# itemgetter call and histogrammed with Counter, both of which run in C, so
+# scoring every candidate against a pool costs a couple of C loops per guess.
+
+ENTROPY = 'entropy' # expected information in bits (Shannon entropy)
+RATIO = 'ratio' # the original sum of before / after over the pool
+METHODS = (ENTROPY, RATIO)
+
+SAMPLE_START = 64 # pool words the first round of anytime scoring looks at
+CLOCK_ROWS = 64 # rows scored between looks at the clock
+ROW_STRIDE = 17 # rows are visited 0, 17, 34, ..., then 1, 18, ..., so a round
+                # cut short has still seen rows from the whole list
+BOUND_SEED = 64 # rows with the highest bounds bestRowJoint scores first
+BOUND_SLACK = 1e-9 # rounding a bound may be off by
+
+
+# FUNCTION: POOLCOLUMNS
+# returns the table columns of the words in pool, or None if one is missing.
+# a words.Pool over the table's own answers already holds the columns.
+def poolColumns(table, pool):
+    if isinstance(pool, words.Pool) and table.sameAnswers(pool.table):
+        return pool.indices()
+    cols = []
+    for word in pool:
+        col = table.colOf(word)
+        if col is None:
+            return None
+        cols.append(col)
+    return cols
+
+
+# FUNCTION: PATTERNGETTER
+# returns a function that picks the codes of cols out of a table row as a
+# tuple (itemgetter returns a bare value for a single column, so that case is
+# wrapped).
+def patternGetter(cols):
+    if len(cols) == 1:
+        col = cols[0]
+        return lambda row: (row[col],)
+    return itemgetter(*cols)
+
+
+# FUNCTION: SCOREROWS
+# scores every candidate row against the pool columns.
+# ARGS:
+# table - PatternTable
+# rows - table row numbers of the candidate guesses
+# cols - table columns of the words still in the pool
+# method - ENTROPY or RATIO
+# RETURNS:
+# scores - one score per row, higher is better
+def scoreRows(table, rows, cols, method=ENTROPY):
+    if method not in METHODS:
+        raise ValueError('unknown scoring method: %r' % (method,))
+    n = len(cols)
+    if n == 0:
+        return [0] * len(rows)
+
+    getter = patternGetter(cols)
+    data = table.data
+    numCols = table.numCols
+    scores = []
+    if method == RATIO:
+        # sum of n / size over every pool word = n * number of groups
+        for row in rows:
+            start = row * numCols
+            codes = getter(data[start:start + numCols])
+            scores.append(n * len(set(codes)))
+    else:
+        # H = log2(n) - sum(c * log2(c)) / n over the group sizes c
+        xlogx = [0.0] + [c * math.log2(c) for c in range(1, n + 1)]
+        logN = math.log2(n)
+        for row in rows:
+            start = row * numCols
+            counts = Counter(getter(data[start:start + numCols])).values()
+            scores.append(logN - sum([xlogx[c] for c in counts]) / n)
+    return scores
+
+
+# FUNCTION: SAMPLEORDER
+# the pool columns in an order whose every prefix is a stratified random
+# sample: the columns are grouped by stratum, shuffled within it, and spread
+# out so every stratum shows up in proportion to its size.
+# ARGS:
+# cols - table columns of the words in the pool
+# strata - one key per column (e.g. the word's first letter)
+# rng - where the randomness comes from, the random module by default so a
+# seeded game replays
+def sampleOrder(cols, strata, rng=random):
+    groups = {}
+    for col, stratum in zip(cols, strata):
+        group = groups.get(stratum)
+        if group is None:
+            groups[stratum] = [col]
+        else:
+            group.append(col)
+    keyed = []
+    for group in groups.values():
+        rng.shuffle(group)
+        offset = rng.random()
+        for k in range(len(group)):
+            keyed.append(((k + offset) / len(group), group[k]))
+    keyed.sort()
+    return [col for key, col in keyed]
+
+
+# FUNCTION: HISTOGRAMSCORES
+# the scores of rows from their histograms of codes over n pool words.
+def histogramScores(counters, n, method):
+    if method == RATIO:
+        return [n * len(counts) for counts in counters]
+    xlogx = [0.0] + [c * math.log2(c) for c in range(1, n + 1)]
+    logN = math.log2(n)
+    return [logN - sum([xlogx[c] for c in counts.values()]) / n
+            for counts in counters]
+
+
+# FUNCTION: SCOREROWSANYTIME
+# scoreRows against a growing sample of the pool, for when there is only so
+# much time. every round adds the next slice of order (the first
+# SAMPLE_START columns, then as many again each round, so the sample doubles)
+# to every row's histogram. when the deadline passes the scores of the last
+# finished round are returned; if even the first round is cut short, the rows
+# it did not reach (spread over the list, see ROW_STRIDE) score -inf. at least
+# CLOCK_ROWS rows are always scored, so a pick never comes back blind.
+# ARGS:
+# table - PatternTable
+# rows - table row numbers of the candidate guesses
+# order - table columns of the pool in sampling order (see sampleOrder)
+# method - ENTROPY or RATIO
+# deadline - time.perf_counter() value to stop at, None to score everything
+# stride - ROW_STRIDE, or 1 to visit the rows in order when the best
+# candidates come first
+# RETURNS:
+# (scores, evaluated) - one score per row, higher is better, and the number
+# of pool words they were scored against
+def scoreRowsAnytime(table, rows, order, method=ENTROPY, deadline=None,
+                     stride=ROW_STRIDE):
+    if method not in METHODS:
+        raise ValueError('unknown scoring method: %r' % (method,))
+    total = len(order)
+    if total == 0 or len(rows) == 0:
+        return [0] * len(rows), total
+
+    clock = time.perf_counter
+    data = table.data
+    numCols = table.numCols
+    counters = [None] * len(rows) # made on a row's first visit
+    visit = [i for k in range(stride) for i in range(k, len(rows), stride)]
+    scores = None
+    evaluated = 0
+    while evaluated < total:
+        size = min(max(SAMPLE_START, 2 * evaluated), total)
+        getter = patternGetter(order[evaluated:size])
+        for first in range(0, len(visit), CLOCK_ROWS):
+            if (deadline is not None and (first or scores is not None) and
+                    clock() >= deadline):
+                if scores is None: # only the rows the first round reached
+                    scores = [-math.inf] * len(rows)
+                    reached = visit[:first]
+                    partial = histogramScores([counters[i] for i in reached],
+                                              size, method)
+                    for i, score in zip(reached, partial):
+                        scores[i] = score
+                    evaluated = size
+                return scores, evaluated
+            for i in visit[first:first + CLOCK_ROWS]:
+                start = rows[i] * numCols
+                codes = getter(data[start:start + numCols])
+                if counters[i] is None:
+                    counters[i] = Counter(codes)
+                else:
+                    counters[i].update(codes)
+        scores = histogramScores(counters, size, method)
+        evaluated = size
+    return scores, evaluated
+
+
+# FUNCTION: WORDROWS
+# returns the table rows of words, or None if one is missing.
+def wordRows(table, candidates):
+    rows = []
+    for word in candidates:
+        row = table.rowOf(word)
+        if row is None:
+            return None
+        rows.append(row)
+    return rows
+
+
+# FUNCTION: SCOREGUESSES
+# scores candidate guesses (words) against a pool of words. returns None if
+# any of the words is missing from the table.
+def scoreGuesses(table, candidates, pool, method=ENTROPY):
+    cols = poolColumns(table, pool)
+    if cols is None:
+        return None
+    rows = wordRows(table, candidates)
+    if rows is None:
+        return None
+    return scoreRows(table, rows, cols, method)
+
+
+# FUNCTION: BESTINDEX
+# position of the highest score, the first one on ties.
+def bestIndex(scores):
+    best = 0
+    for i in range(1, len(scores)):
+        if scores[i] > scores[best]:
+            best = i
+    return best
+
+
+# FUNCTION: BESTGUESS
+# returns the candidate with the highest score (the first one on ties) and
+# its score, or None if the words are not all in the table.
+def bestGuess(table, candidates, pool, method=ENTROPY):
+    scores = scoreGuesses(table, candidates, pool, method)
+    if scores is None or len(scores) == 0:
+        return None
+    best = bestIndex(scores)
+    return candidates[best], scores[best]
+
+
+# FUNCTION: SCOREROWSJOINT
+# scores every candidate row against several pools at once (one per board):
+# the sum of its score on each pool, plus bonus times the chance it solves a
+# board outright (1 / pool size for every pool it is in). pools holding the
+# same words are only scored once.
+# ARGS:
+# table - PatternTable
+# rows - table row numbers of the candidate guesses
+# poolsCols - list of column lists, one per pool still being solved
+# method - ENTROPY or RATIO
+# bonus - weight of the chance to solve a board with the guess
+# RETURNS:
+# scores - one score per row, higher is better
+def scoreRowsJoint(table, rows, poolsCols, method=ENTROPY, bonus=1.0):
+    if method not in METHODS:
+        raise ValueError('unknown scoring method: %r' % (method,))
+
+    groups = {} # distinct pools -> how many boards have that pool
+    for cols in poolsCols:
+        if len(cols) > 0:
+            key = tuple(cols)
+            groups[key] = groups.get(key, 0) + 1
+
+    # per distinct pool: the getter, its size, weight and x*log2(x) table
+    parts = []
+    for cols, weight in groups.items():
+        n = len(cols)
+        xlogx = None
+        if method == ENTROPY:
+            xlogx = [0.0] + [c * math.log2(c) for c in range(1, n + 1)]
+        parts.append((patternGetter(cols), n, weight, xlogx))
+
+    solveChance = solveChances(table, poolsCols)
+    data = table.data
+    numCols = table.numCols
+    scores = []
+    for row in rows:
+        start = row * numCols
+        codes = data[start:start + numCols]
+        total = bonus * solveChance.get(row, 0)
+        for getter, n, weight, xlogx in parts:
+            if method == RATIO:
+                total += weight * n * len(set(getter(codes)))
+            else:
+                counts = Counter(getter(codes)).values()
+                total += weight * (math.log2(n) -
+                                   sum([xlogx[c] for c in counts]) / n)
+        scores.append(total)
+    return scores
+
+
+# FUNCTION: SOLVECHANCES
+# the chance of solving a board outright with each guess, summed over the
+# boards, by the row of the guessed word (rows of no pool's words are left
+# out).
+def solveChances(table, poolsCols):
+    solveChance = {}
+    for cols in poolsCols:
+        for col in cols:
+            row = table.rowOf(table.answers[col])
+            if row is not None:
+                solveChance[row] = solveChance.get(row, 0) + 1 / len(cols)
+    return solveChance
+
+
+# FUNCTION: BESTROWJOINT
+# position in rows of the best scoreRowsJoint score (the first one on ties),
+# scoring as few rows as bounds allow: the BOUND_SEED rows with the highest
+# bounds are scored first, then only the rows whose bound reaches the best
+# score found. the pick is the same as scoring every row.
+# ARGS:
+# table, rows, poolsCols, method, bonus - as for scoreRowsJoint
+# bounds - one upper bound on the score per row, None to score every row
+# RETURNS:
+# (best, numScored) - the position of the best row and how many were scored
+def bestRowJoint(table, rows, poolsCols, method=ENTROPY, bonus=1.0,
+                 bounds=None):
+    if bounds is None or len(rows) <= BOUND_SEED:
+        scores = scoreRowsJoint(table, rows, poolsCols, method, bonus)
+        return bestIndex(scores), len(rows)
+    byBound = sorted(range(len(rows)), key=bounds.__getitem__, reverse=True)
+    seed = byBound[:BOUND_SEED]
+    scores = scoreRowsJoint(table, [rows[i] for i in seed], poolsCols,
+                            method, bonus)
+    scored = dict(zip(seed, scores))
+    floor = max(scores) - BOUND_SLACK
+    rest = [i for i in byBound[BOUND_SEED:] if bounds[i] >= floor]
+    scores = scoreRowsJoint(table, [rows[i] for i in rest], poolsCols,
+                            method, bonus)
+    scored.update(zip(rest, scores))
+    best = max(scored.values())
+    return min([i for i, score in scored.items() if score == best]), \
+        len(scored)
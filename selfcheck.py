@@ -0,0 +1,232 @@
+import json
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+import time
+
+import AI
+import aggregate
+import bundle
+import filters
+import patterns
+import quordle
+import words
+
+# Quick checks of behaviour that is easy to break without any game result
+# changing right away. Run
+#
+#   python selfcheck.py
+#
+# which prints every failed check and exits with 1 if there was one.
+
+
+# FUNCTION: CHECKPICKLE
+# word tables, pools and AIs survive a pickle round trip, which is how they
+# reach spawned worker processes.
+# RETURNS:
+# failures - list of messages, empty if everything passed
+def checkPickle():
+    failures = []
+    table = words.asTable(['cigar', 'rebut', 'sissy', 'humph', 'awake'])
+    copied = pickle.loads(pickle.dumps(table))
+    if copied.words != table.words or copied.find('sissy') != 2:
+        failures.append('WordTable does not survive pickling')
+
+    pool = words.Pool.of(table)
+    pool.remove('rebut')
+    copied = pickle.loads(pickle.dumps(pool))
+    if list(copied) != list(pool):
+        failures.append('Pool does not survive pickling')
+
+    ai = AI.AI(table, 2)
+    ai.interpretHint('BBBBB', 'humph', ai.guessPools[1])
+    copied = pickle.loads(pickle.dumps(ai))
+    if [list(p) for p in copied.guessPools] != [list(p) for p in
+                                                ai.guessPools]:
+        failures.append('AI pools do not survive pickling')
+    return failures
+
+
+# (guess, answer, hint) by the Wordle rules for repeated letters: a letter
+# is marked G or Y at most as many times as the answer has it, greens first.
+REPEATED_LETTERS = [
+    ('speed', 'abide', 'BBYBY'), # second e is B, abide has one e
+    ('abide', 'speed', 'BBBYY'), # one e guessed, answer has two
+    ('eerie', 'crane', 'BBYBG'), # the green e uses crane's only e
+    ('llama', 'hello', 'YYBBB'),
+    ('hello', 'llama', 'BBYYB'),
+    ('geese', 'those', 'BBBGG'),
+]
+# guesses with repeated letters checked against every answer of the table.
+TABLE_GUESSES = ['speed', 'eerie', 'llama', 'geese', 'mamma', 'error',
+                 'crane']
+
+
+# FUNCTION: CHECKREPEATEDLETTERS
+# patternCode, the pattern table and filters.compileHint agree with the
+# Wordle rules for repeated letters and with each other.
+# RETURNS:
+# failures - list of messages, empty if everything passed
+def checkRepeatedLetters():
+    failures = []
+    for guess, answer, hint in REPEATED_LETTERS:
+        got = patterns.HINTS[patterns.patternCode(guess, answer)]
+        if got != hint:
+            failures.append('%s against %s gave %s, not %s'
+                            % (guess, answer, got, hint))
+
+    table = patterns.defaultTable()
+    if table is None:
+        return failures + ['no word lists to build the pattern table from']
+    masks = words.asTable(table.answers).masks()
+    for guess in TABLE_GUESSES:
+        row = table.row(guess)
+        if row is None:
+            failures.append('%s is not in the pattern table' % guess)
+            continue
+        codes = [patterns.patternCode(guess, answer)
+                 for answer in table.answers]
+        if list(row) != codes:
+            failures.append('table row of %s differs from patternCode'
+                            % guess)
+            continue
+        # the words a hint allows are exactly the answers that give it.
+        for code in set(codes):
+            allowed = filters.compileHint(masks, guess, patterns.HINTS[code])
+            expected = sum([1 << col for col, c in enumerate(codes)
+                            if c == code])
+            if allowed != expected:
+                failures.append('compileHint(%s, %s) allows other words'
+                                % (guess, patterns.HINTS[code]))
+    return failures
+
+
+# (opener, answer) whose hint leaves a pool of a hundred words or more, the
+# size where scoring the whole dictionary takes many times the budget. the
+# first is only played to warm up: what a process does once (mapping the
+# table, ranking the dictionary) is not part of a pick.
+MID_POOLS = [('fuzzy', 'stare'), ('clout', 'stair'), ('raise', 'pygmy'),
+             ('raise', 'tonic')]
+BUDGET_SLACK = 2 # a budgeted pick may take this many times its budget
+
+
+# FUNCTION: CHECKTIMEBUDGET
+# AnytimeEntropy picks on mid-size pools keep to its time budget, setup
+# (pruning, sampling) included.
+# RETURNS:
+# failures - list of messages, empty if everything passed
+def checkTimeBudget():
+    failures = []
+    answers = words.defaultAnswers()
+    budget = AI.AnytimeEntropy.TimeBudget
+    for i, (opener, answer) in enumerate(MID_POOLS):
+        ai = AI.AnytimeEntropy(answers, 1)
+        ai.guessNum = len(ai.Starters) # past the starters
+        hint = patterns.HINTS[patterns.patternCode(opener, answer)]
+        ai.interpretHint(hint, opener, ai.guessPools[0])
+        size = len(ai.guessPools[0])
+        start = time.perf_counter()
+        ai.pickWord()
+        took = time.perf_counter() - start
+        if i and took > BUDGET_SLACK * budget:
+            failures.append('pick on a %d word pool took %.1f ms, budget '
+                            '%.1f ms' % (size, took * 1e3, budget * 1e3))
+    return failures
+
+
+# FUNCTION: CHECKBUNDLESOURCES
+# a freshly built bundle loads, and editing any of the modules it is built
+# by makes it stale.
+# RETURNS:
+# failures - list of messages, empty if everything passed
+def checkBundleSources():
+    failures = []
+    with tempfile.TemporaryDirectory() as temp:
+        path = os.path.join(temp, 'bundle.bin')
+        bundle.buildBundle(path)
+        if bundle.loadBundle(path) is None:
+            return ['a bundle just built does not load']
+        for name in bundle.BUILD_MODULES:
+            source = os.path.join(patterns.BASE_DIR, name + '.py')
+            edited = os.path.join(temp, name + '.py')
+            shutil.copyfile(source, edited)
+            with open(edited, 'a') as module:
+                module.write('\n# edited\n')
+            paths = [edited if p == source else p for p in bundle.SOURCES]
+            if edited not in paths:
+                failures.append('%s.py is not a source of the bundle' % name)
+                continue
+            digest = bundle.sourceDigest(paths)
+            if bundle.loadBundle(path, digest) is not None:
+                failures.append('bundle still loads after %s.py changed'
+                                % name)
+    return failures
+
+
+# FUNCTION: CHECKRUNSTATS
+# a run's RunStats come out exactly the same played in one go, over worker
+# processes, and stopped after a checkpoint and resumed.
+# RETURNS:
+# failures - list of messages, empty if everything passed
+def checkRunStats():
+    failures = []
+    answers = words.defaultAnswers()
+    numGames, numWords, every = 24, 4, 10
+    ai = AI.CommonLetterSpots
+    goal = quordle.WinGoal(numWords)
+
+    serial = aggregate.RunStats(numWords, goal)
+    quordle.PlayManyGames(numGames, answers, numWords, ai, seed=5,
+                          stats=serial)
+    parallel = aggregate.RunStats(numWords, goal)
+    quordle.PlayManyGames(numGames, answers, numWords, ai, workers=2, seed=5,
+                          stats=parallel)
+    if parallel.summary() != serial.summary():
+        failures.append('parallel stats differ from serial: %s vs %s'
+                        % (parallel.summary(), serial.summary()))
+
+    with tempfile.TemporaryDirectory() as temp:
+        whole = os.path.join(temp, 'whole.json')
+        quordle.PlayLongRun(numGames, answers, numWords, ai, 5, whole, every)
+        # the same run stopped after its first checkpoint, then run again.
+        with open(whole) as stateFile:
+            settings = json.load(stateFile)['settings']
+        stopped = os.path.join(temp, 'stopped.json')
+        first = aggregate.RunStats(numWords, goal)
+        quordle.PlayManyGames(every, answers, numWords, ai, seed=5,
+                              stats=first)
+        aggregate.Checkpoint(stopped, settings).save(every, first)
+        resumed = quordle.PlayLongRun(numGames, answers, numWords, ai, 5,
+                                      stopped, every)
+        if resumed.summary() != serial.summary():
+            failures.append('resumed stats differ from serial: %s vs %s'
+                            % (resumed.summary(), serial.summary()))
+        loaded = aggregate.Checkpoint(whole, settings).load()[1]
+        if loaded.summary() != serial.summary():
+            failures.append('stats read back from a checkpoint differ')
+    return failures
+
+
+CHECKS = [checkPickle, checkRepeatedLetters, checkTimeBudget,
+          checkBundleSources, checkRunStats]
+
+
+def main():
+    failures = []
+    for check in CHECKS:
+        try:
+            found = check()
+        except Exception as error: # a check that crashes fails
+            found = ['%s: %s' % (type(error).__name__, error)]
+        for failure in found:
+            failures.append('%s: %s' % (check.__name__, failure))
+    for failure in failures:
+        print('FAILED ' + failure)
+    print('%d checks, %d failures' % (len(CHECKS), len(failures)))
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,332 @@
+import argparse
+import asyncio
+import collections
+import concurrent.futures
+import json
+import sys
+import threading
+import time
+
+import AI
+import patterns
+import aggregate
+import words
+
+# A local solver service for playing real Quordle (or Wordle, or any number of
+# boards) with the AIs. Clients connect over TCP or a Unix socket and send one
+# JSON object per line; every request gets one JSON line back.
+#
+#   {"op": "guess", "strategy": "Entropy", "boards": 4,
+#    "history": [["raise", ["BYBBG", "BBBBY", "GBBBB", "BBYBB"]], ...]}
+#   -> {"ok": true, "guess": "clout", "cached": false, "poolSizes": [...],
+#       "ms": 1.2}
+#   {"op": "metrics"}    -> request counters and latency percentiles
+#   {"op": "strategies"} -> the strategy names a guess can ask for
+#
+# The word lists and pattern table are loaded once at startup. Solver states
+# are kept in an LRU keyed by (strategy, boards, history), so a position any
+# client has reached before (every common opening) is answered from memory,
+# and a new position is reached by copying the state of its longest known
+# prefix and applying only the new guesses. Solving runs on one worker thread
+# so the event loop keeps answering cached positions and metrics meanwhile.
+
+DEFAULT_PORT = 7337
+DEFAULT_CACHE = 10000 # solver states kept in the LRU
+DEFAULT_LIMIT = 64 # requests waiting for the solver before new ones are turned
+                   # away
+LATENCY_WINDOW = 10000 # recent request times kept for the percentiles
+
+
+# CLASS: SOLVERSTATE
+# one position of a game as the solver sees it.
+# ARGS:
+# ai - the AI with every hint so far applied, ready to pick
+# picked - a copy of ai after it picked its suggestion (counters moved on,
+# suggestion removed from its pool), or None until asked
+# solved - one flag per board, True once it got GGGGG
+# suggestion - the word it picked
+class SolverState:
+    __slots__ = ('ai', 'solved', 'picked', 'suggestion')
+
+    def __init__(self, ai, solved):
+        self.ai = ai
+        self.solved = solved
+        self.picked = None
+        self.suggestion = None
+
+    # the AI's guess for this position, picked on a copy so the state can
+    # still be continued with a different guess.
+    def suggest(self):
+        if self.picked is None:
+            picked = self.ai.clone()
+            self.suggestion = patterns.cleanWord(picked.pickWord())
+            self.picked = picked
+        return self.suggestion
+
+    # the state after guess got hints. if guess is the AI's own suggestion
+    # the AI continues from its pick, so its starters and counters carry on;
+    # any other guess narrows the pools and counts as a turn taken.
+    def advance(self, guess, hints):
+        if self.picked is not None and guess == self.suggestion:
+            ai = self.picked.clone()
+        else:
+            ai = self.ai.clone()
+            ai.countGuess()
+        solved = list(self.solved)
+        for b in range(len(hints)):
+            if hints[b] == patterns.HINTS[patterns.SOLVED]:
+                solved[b] = True
+                ai.guessPools[b].clear() # like PlayAGame does
+            elif ai.guessPools[b]:
+                ai.interpretHint(hints[b], guess, ai.guessPools[b])
+        return SolverState(ai, tuple(solved))
+
+
+# CLASS: SOLVER
+# the strategies and the LRU of solver states shared by every client.
+# ARGS:
+# answers - the words that can be hidden (a WordTable or a list)
+# cacheSize - number of states the LRU holds
+class Solver:
+    def __init__(self, answers=None, cacheSize=DEFAULT_CACHE):
+        if answers is None:
+            answers = words.defaultAnswers()
+        self.answers = words.asTable(answers)
+        self.cacheSize = cacheSize
+        self.strategies = AI.strategyClasses()
+        self.states = collections.OrderedDict() # key -> SolverState
+        self.lock = threading.Lock() # the LRU is used from two threads
+        self.hits = 0
+        self.misses = 0
+
+    # loads the pattern table and the masks now instead of on the first
+    # request.
+    def warm(self):
+        patterns.defaultTable()
+        self.answers.masks()
+
+    # checks a request and returns its key: (strategy, boards, history) with
+    # history as a tuple of (guess, hints) pairs. raises ValueError.
+    def requestKey(self, request):
+        name = request.get('strategy', 'Entropy')
+        if name not in self.strategies:
+            raise ValueError('unknown strategy %r' % (name,))
+        boards = request.get('boards', 4)
+        if not isinstance(boards, int) or boards < 1:
+            raise ValueError('boards must be a positive integer')
+        history = []
+        for step in request.get('history', []):
+            if not isinstance(step, (list, tuple)) or len(step) != 2:
+                raise ValueError('history steps are [guess, hints] pairs')
+            guess, hints = step
+            if (not isinstance(guess, str) or
+                    len(patterns.cleanWord(guess)) != patterns.WORD_LENGTH):
+                raise ValueError('bad guess %r' % (guess,))
+            if isinstance(hints, str):
+                hints = [hints]
+            if len(hints) != boards:
+                raise ValueError('%r needs %d hints' % (guess, boards))
+            for hint in hints:
+                if (not isinstance(hint, str) or
+                        len(hint) != patterns.WORD_LENGTH or
+                        set(hint.upper()) - set(patterns.LETTERS)):
+                    raise ValueError('bad hint %r' % (hint,))
+            history.append((patterns.cleanWord(guess),
+                            tuple(hint.upper() for hint in hints)))
+        return (name, boards, tuple(history))
+
+    # the state for a key from the LRU, or None.
+    def cached(self, key):
+        with self.lock:
+            state = self.states.get(key)
+            if state is not None:
+                self.states.move_to_end(key)
+            return state
+
+    def remember(self, key, state):
+        with self.lock:
+            self.states[key] = state
+            self.states.move_to_end(key)
+            while len(self.states) > self.cacheSize:
+                self.states.popitem(last=False)
+
+    # the state for a key: from the LRU, or built from the longest prefix of
+    # its history the LRU knows (the new game if none).
+    def state(self, key):
+        state = self.cached(key)
+        if state is not None:
+            self.hits += 1
+            return state
+        self.misses += 1
+
+        name, boards, history = key
+        start = len(history)
+        state = None
+        while start > 0 and state is None:
+            start -= 1
+            state = self.cached((name, boards, history[:start]))
+        if state is None:
+            ai = self.strategies[name](self.answers, boards)
+            state = SolverState(ai, (False,) * boards)
+            self.remember((name, boards, ()), state)
+        for i in range(start, len(history)):
+            guess, hints = history[i]
+            state.suggest() # so a followed suggestion keeps the AI's counters
+            state = state.advance(guess, hints)
+            self.remember((name, boards, history[:i + 1]), state)
+        return state
+
+    # answers a guess request for a key from requestKey.
+    def solve(self, key):
+        state = self.state(key)
+        poolSizes = [len(pool) for pool in state.ai.guessPools]
+        for b in range(len(poolSizes)):
+            if poolSizes[b] == 0 and not state.solved[b]:
+                raise ValueError('no word fits the hints of board %d' % b)
+        if all(state.solved):
+            return {'ok': True, 'guess': None, 'poolSizes': poolSizes,
+                    'solved': True}
+        return {'ok': True, 'guess': state.suggest(), 'poolSizes': poolSizes}
+
+    # True if a key can be answered without any solving.
+    def ready(self, key):
+        with self.lock:
+            state = self.states.get(key)
+        return state is not None and (state.picked is not None or
+                                      all(state.solved))
+
+
+# CLASS: SERVICE
+# the asyncio front end: parses requests, answers cached positions straight
+# from the event loop, and queues the rest for the solver thread.
+# ARGS:
+# solver - the Solver
+# limit - most requests allowed to wait for the solver at once
+class Service:
+    def __init__(self, solver, limit=DEFAULT_LIMIT):
+        self.solver = solver
+        self.limit = limit
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        self.waiting = 0
+        self.connections = 0
+        self.counts = collections.Counter()
+        self.latencies = collections.deque(maxlen=LATENCY_WINDOW)
+        self.started = time.time()
+
+    # answers one request object.
+    async def handle(self, request):
+        op = request.get('op', 'guess')
+        if op == 'metrics':
+            return self.metrics()
+        if op == 'strategies':
+            return {'ok': True, 'strategies': sorted(self.solver.strategies)}
+        if op != 'guess':
+            raise ValueError('unknown op %r' % (op,))
+
+        key = self.solver.requestKey(request)
+        if self.solver.ready(key): # cached, answer without queueing
+            self.counts['cached'] += 1
+            response = self.solver.solve(key)
+            response['cached'] = True
+            return response
+
+        if self.waiting >= self.limit:
+            self.counts['rejected'] += 1
+            return {'ok': False, 'error': 'busy, %d requests waiting'
+                    % self.waiting}
+        self.waiting += 1
+        try:
+            loop = asyncio.get_running_loop()
+            response = await loop.run_in_executor(self.executor,
+                                                  self.solver.solve, key)
+        finally:
+            self.waiting -= 1
+        self.counts['solved'] += 1
+        response['cached'] = False
+        return response
+
+    # reads request lines from one client until it disconnects.
+    async def serve(self, reader, writer):
+        self.connections += 1
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                start = time.perf_counter()
+                self.counts['requests'] += 1
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError('requests are JSON objects')
+                    response = await self.handle(request)
+                except ValueError as error: # includes bad JSON
+                    self.counts['errors'] += 1
+                    response = {'ok': False, 'error': str(error)}
+                except Exception as error: # a strategy failed, keep serving
+                    self.counts['errors'] += 1
+                    response = {'ok': False, 'error': '%s: %s' % (
+                        type(error).__name__, error)}
+                elapsed = time.perf_counter() - start
+                self.latencies.append(elapsed)
+                response['ms'] = round(elapsed * 1000, 3)
+                writer.write(json.dumps(response).encode('utf-8') + b'\n')
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.connections -= 1
+            writer.close()
+
+    # request counters, cache use and latency percentiles.
+    def metrics(self):
+        return {
+            'ok': True,
+            'uptime': round(time.time() - self.started, 3),
+            'connections': self.connections,
+            'waiting': self.waiting,
+            'limit': self.limit,
+            'counts': dict(self.counts),
+            'states': len(self.solver.states),
+            'stateHits': self.solver.hits,
+            'stateMisses': self.solver.misses,
+            'latency': aggregate.summarizeTimes(list(self.latencies)),
+        }
+
+    # listens on a Unix socket if path is given, TCP host:port otherwise.
+    async def run(self, host='127.0.0.1', port=DEFAULT_PORT, path=None):
+        if path is not None:
+            server = await asyncio.start_unix_server(self.serve, path)
+        else:
+            server = await asyncio.start_server(self.serve, host, port)
+        async with server:
+            await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Quordle solver service')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--unix', help='listen on this Unix socket instead')
+    parser.add_argument('--cache', type=int, default=DEFAULT_CACHE,
+                        help='solver states to keep')
+    parser.add_argument('--limit', type=int, default=DEFAULT_LIMIT,
+                        help='requests allowed to wait for the solver')
+    args = parser.parse_args(argv)
+
+    solver = Solver(cacheSize=args.cache)
+    solver.warm()
+    service = Service(solver, args.limit)
+    where = args.unix or '%s:%d' % (args.host, args.port)
+    print('solver listening on %s' % where, file=sys.stderr)
+    try:
+        asyncio.run(service.run(args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,421 @@
+import argparse
+import hashlib
+import json
+import math
+import os
+import random
+import sys
+
+import AI
+import aggregate
+import bundle
+import patterns
+import quordle
+import words
+
+# Plays strategies against each other on exactly the same games. The hidden
+# words of every game come from one seeded generator, independent of the
+# global random module the AIs use, so every strategy sees the same set, and
+# game j of every strategy is also played with the same AI seed. Results are
+# compared game by game (paired), which cancels out how hard each set of
+# hidden words happened to be.
+#
+# Each strategy's guess counts are cached in the cache directory under a key
+# made of its source code (the class and every AI class it inherits from),
+# the modules every game runs through (HELPER_MODULES), the word lists and
+# the tournament settings, so changing or adding one strategy only replays
+# that one, and changing the shared code replays them all. Strategies with a
+# TimeBudget play differently with the speed of the machine (and the load on
+# it), so their results are never cached.
+#
+# CompareUntilSettled (--compare A B) plays two strategies on the same stream
+# of games in batches and stops as soon as the difference between them is
+# settled, instead of playing a fixed number of games.
+
+TOURNAMENT_VERSION = 1
+# modules whose code decides how games play out besides the strategy
+# classes themselves.
+HELPER_MODULES = ('AI', 'quordle', 'patterns', 'filters', 'words', 'scoring',
+                  'pruning', 'lookahead', 'scheduler', 'letterstats',
+                  'rankings', 'openingbook')
+
+
+# FUNCTION: HIDDENGENERATOR
+# the generator the hidden words of a tournament with seed come from.
+def hiddenGenerator(seed):
+    return random.Random('tournament:%d' % seed)
+
+
+# FUNCTION: HIDDENSETS
+# the hidden words of the next numGames games, numWords different words
+# each, from rng (the first games of seed's tournament if None).
+def hiddenSets(answers, numWords, numGames, seed, rng=None):
+    if rng is None:
+        rng = hiddenGenerator(seed)
+    return [rng.sample(answers, numWords) for j in range(numGames)]
+
+
+# FUNCTION: STRATEGYDIGEST
+# sha256 of the source of a strategy class, the AI classes it inherits from
+# and the helper modules. classes without source (defined interactively)
+# fall back to their names, which means they are never cached across edits.
+def strategyDigest(ai):
+    import inspect # imported here, it is slow to import and only needed here
+    digest = hashlib.sha256(helpersDigest())
+    for cls in ai.__mro__:
+        if cls is object:
+            continue
+        try:
+            source = inspect.getsource(cls)
+        except (OSError, TypeError):
+            source = cls.__qualname__
+        digest.update(source.encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+_helpersDigest = None
+
+# FUNCTION: HELPERSDIGEST
+# bundle.sourceDigest of HELPER_MODULES, read once per process.
+def helpersDigest():
+    global _helpersDigest
+    if _helpersDigest is None:
+        paths = [os.path.join(patterns.BASE_DIR, name + '.py')
+                 for name in HELPER_MODULES]
+        _helpersDigest = bundle.sourceDigest(paths) or b''
+    return _helpersDigest
+
+
+# FUNCTION: WORDSDIGEST
+# digest of the answer list and of the pattern table's word lists.
+def wordsDigest(answers):
+    digest = hashlib.sha256(words.asTable(answers).digest().encode('ascii'))
+    table = patterns.defaultTable()
+    if table is not None:
+        digest.update(table.digest)
+    return digest.hexdigest()
+
+
+# FUNCTION: RESULTPATH
+# cache file of one strategy's results for one tournament.
+def resultPath(cacheDir, ai, answers, numWords, numGames, seed):
+    key = hashlib.sha256(('%d|%s|%s|%d|%d|%d' % (
+        TOURNAMENT_VERSION, strategyDigest(ai), wordsDigest(answers),
+        numWords, numGames, seed)).encode('ascii')).hexdigest()
+    return os.path.join(cacheDir, 'tournament-%s-%s.json' %
+                        (ai.__name__, key[:16]))
+
+
+# FUNCTION: PLAYGAMES
+# plays hidden[start:stop] and returns their guess counts. hidden[0] is game
+# number first of the tournament.
+def PlayGames(answers, numWords, ai, hidden, seed, start, stop, first=0):
+    counts = []
+    for i in range(start, stop):
+        counts.append(quordle.PlayAGame(answers, numWords, ai,
+                                        quordle.GameSeed(seed, first + i),
+                                        hidden=hidden[i]))
+    return counts
+
+# the setup each worker process plays with, set by InitWorker.
+_workerSetup = None
+
+# FUNCTION: INITWORKER
+# runs once in every worker process before it plays (like quordle.InitWorker,
+# so it works with spawned workers too).
+def InitWorker(answers, numWords, ai, hidden, seed, first):
+    global _workerSetup
+    _workerSetup = (answers, numWords, ai, hidden, seed, first)
+
+def PlayGameRange(task):
+    start, stop = task
+    answers, numWords, ai, hidden, seed, first = _workerSetup
+    return start, PlayGames(answers, numWords, ai, hidden, seed, start, stop,
+                            first)
+
+
+# FUNCTION: PLAYSTRATEGY
+# plays every game of the tournament with one strategy.
+# ARGS:
+# answers - valid answers
+# numWords - number of boards
+# ai - the AI class
+# hidden - list of hidden word lists, one per game
+# seed - tournament seed, game j seeds the AI with quordle.GameSeed(seed, j)
+# workers - number of processes to play on
+# first - number of the game hidden[0] is
+# RETURNS:
+# counts - guesses taken in every game, in game order
+def PlayStrategy(answers, numWords, ai, hidden, seed, workers=1, first=0):
+    numGames = len(hidden)
+    if workers <= 1:
+        return PlayGames(answers, numWords, ai, hidden, seed, 0, numGames,
+                         first)
+
+    patterns.defaultTable() # load before forking so workers share it
+    chunk = max(1, numGames // (workers * 4))
+    tasks = [(start, min(start + chunk, numGames))
+             for start in range(0, numGames, chunk)]
+    import multiprocessing # imported here, only parallel runs need it
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context('fork' if 'fork' in methods else None)
+    counts = [0] * numGames
+    with context.Pool(workers, initializer=InitWorker,
+                      initargs=(answers, numWords, ai, hidden, seed,
+                                first)) as pool:
+        for start, part in pool.imap_unordered(PlayGameRange, tasks):
+            counts[start:start + len(part)] = part
+    return counts
+
+
+# FUNCTION: REPEATABLE
+# True if a strategy plays the same seeded games the same way every time,
+# which a strategy with a TimeBudget does not: how much it looks at depends
+# on how fast the machine is.
+def Repeatable(ai):
+    return getattr(ai, 'TimeBudget', None) is None
+
+
+# FUNCTION: STRATEGYRESULTS
+# a strategy's guess counts, from the cache if this exact strategy code has
+# played this exact tournament before. strategies that are not Repeatable
+# are always played and never cached.
+# RETURNS:
+# (counts, cached) - the counts and True if they came from the cache
+def StrategyResults(answers, numWords, ai, hidden, seed, workers=1,
+                    cacheDir=patterns.CACHE_DIR):
+    path = None
+    if cacheDir is not None and Repeatable(ai):
+        path = resultPath(cacheDir, ai, answers, numWords, len(hidden), seed)
+        try:
+            with open(path) as resultFile:
+                saved = json.load(resultFile)
+            if len(saved['counts']) == len(hidden):
+                return saved['counts'], True
+        except (OSError, ValueError, KeyError):
+            pass
+
+    counts = PlayStrategy(answers, numWords, ai, hidden, seed, workers)
+    if path is not None:
+        try:
+            os.makedirs(cacheDir, exist_ok=True)
+            temp = '%s.%d.tmp' % (path, os.getpid())
+            with open(temp, 'w') as resultFile:
+                json.dump({'strategy': ai.__name__, 'numWords': numWords,
+                           'seed': seed, 'counts': counts}, resultFile)
+            os.replace(temp, path)
+        except OSError:
+            pass
+    return counts, False
+
+
+# FUNCTION: SUMMARY
+# mean, win rate, worst and best of one strategy's guess counts (all 0 for
+# no games).
+def Summary(counts, goal):
+    n = len(counts)
+    if n == 0:
+        return {'games': 0, 'mean': 0.0, 'winPct': 0.0, 'worst': 0,
+                'best': 0}
+    return {
+        'games': n,
+        'mean': sum(counts) / n,
+        'winPct': sum(1 for count in counts if count <= goal) / n,
+        'worst': max(counts),
+        'best': min(counts),
+    }
+
+
+# FUNCTION: PAIRED
+# game by game comparison of counts against baseline counts: the mean
+# difference (negative = fewer guesses than the baseline) with its standard
+# error and 95% interval, and in how many games each side was better.
+def Paired(counts, baseline):
+    diffs = [a - b for a, b in zip(counts, baseline)]
+    n = len(diffs)
+    mean = sum(diffs) / n if n else 0.0
+    var = sum((d - mean) ** 2 for d in diffs) / (n - 1) if n > 1 else 0.0
+    stderr = math.sqrt(var / n) if n else 0.0
+    return {
+        'meanDiff': mean,
+        'stderr': stderr,
+        'ci95': (mean - 1.96 * stderr, mean + 1.96 * stderr),
+        't': mean / stderr if stderr > 0 else 0.0,
+        'better': sum(1 for d in diffs if d < 0),
+        'worse': sum(1 for d in diffs if d > 0),
+        'ties': sum(1 for d in diffs if d == 0),
+    }
+
+
+# FUNCTION: RUNTOURNAMENT
+# plays every strategy on the same games and compares them.
+# ARGS:
+# strategies - AI classes to play
+# numGames - number of games
+# numWords - number of boards
+# seed - tournament seed
+# baseline - name of the strategy the others are paired against, None for
+# the one with the lowest mean
+# workers - number of processes to play on
+# cacheDir - where results are cached, None to always replay
+# answers - valid answers, data/valid_answers.txt if None
+# RETURNS:
+# report - dict with the settings, every strategy's summary and its paired
+# comparison against the baseline
+def RunTournament(strategies, numGames=500, numWords=4, seed=0,
+                  baseline=None, workers=1, cacheDir=patterns.CACHE_DIR,
+                  answers=None, goal=None):
+    if answers is None:
+        answers = words.defaultAnswers()
+    answers = words.asTable(answers)
+    if goal is None:
+        goal = quordle.WinGoal(numWords)
+    hidden = hiddenSets(answers, numWords, numGames, seed)
+
+    results = {}
+    cached = {}
+    for ai in strategies:
+        results[ai.__name__], cached[ai.__name__] = StrategyResults(
+            answers, numWords, ai, hidden, seed, workers, cacheDir)
+
+    summaries = {name: Summary(counts, goal)
+                 for name, counts in results.items()}
+    if baseline is None:
+        baseline = min(summaries, key=lambda name: summaries[name]['mean'])
+    if baseline not in results:
+        raise ValueError('baseline %r was not played' % (baseline,))
+    paired = {name: Paired(counts, results[baseline])
+              for name, counts in results.items() if name != baseline}
+    return {'games': numGames, 'numWords': numWords, 'seed': seed,
+            'goal': goal, 'baseline': baseline, 'cached': cached,
+            'summaries': summaries, 'paired': paired}
+
+
+# FUNCTION: COMPAREUNTILSETTLED
+# plays two strategies on the same games, a batch at a time, until the
+# interval of the mean difference either leaves out 0 (one of them is
+# better) or fits inside (-margin, margin) (they are as good as each other).
+# the games are the same ones a tournament with seed plays, in order.
+# ARGS:
+# aiA, aiB - the AI classes
+# numWords - number of boards
+# seed - tournament seed
+# margin - a mean difference smaller than this counts as no difference
+# batch - games played between looks at the interval
+# minGames - games played before the first look
+# maxGames - games after which it stops anyway
+# workers - number of processes to play on
+# answers - valid answers, data/valid_answers.txt if None
+# z - width of the interval in standard errors
+# RETURNS:
+# (paired, verdict) - aggregate.PairedStats of aiA's guesses minus aiB's,
+# and 'better' or 'worse' (for aiA), 'same' or 'unsettled' if maxGames ran
+# out first
+def CompareUntilSettled(aiA, aiB, numWords=4, seed=0, margin=0.02,
+                        batch=200, minGames=200, maxGames=100000, workers=1,
+                        answers=None, z=aggregate.Z_SEQUENTIAL):
+    if answers is None:
+        answers = words.defaultAnswers()
+    answers = words.asTable(answers)
+    rng = hiddenGenerator(seed)
+    paired = aggregate.PairedStats()
+    while paired.games < maxGames:
+        size = min(batch, maxGames - paired.games)
+        hidden = hiddenSets(answers, numWords, size, seed, rng)
+        countsA = PlayStrategy(answers, numWords, aiA, hidden, seed, workers,
+                               paired.games)
+        countsB = PlayStrategy(answers, numWords, aiB, hidden, seed, workers,
+                               paired.games)
+        for a, b in zip(countsA, countsB):
+            paired.addPair(a, b)
+        if paired.games < minGames:
+            continue
+        low, high = paired.interval(z)
+        if high < 0:
+            return paired, 'better'
+        if low > 0:
+            return paired, 'worse'
+        if -margin < low and high < margin:
+            return paired, 'same'
+    return paired, 'unsettled'
+
+
+# FUNCTION: FORMATREPORT
+# the tournament report as a table, best mean first.
+def FormatReport(report):
+    lines = ['%d games, %d boards, seed %d, win = %d guesses or fewer' % (
+        report['games'], report['numWords'], report['seed'], report['goal'])]
+    lines.append('%-20s %7s %6s %5s %5s  %-28s %s' % (
+        'strategy', 'mean', 'win%', 'worst', 'best',
+        'vs ' + report['baseline'] + ' (95% CI)', 'better/worse/tie'))
+    order = sorted(report['summaries'],
+                   key=lambda name: report['summaries'][name]['mean'])
+    for name in order:
+        summary = report['summaries'][name]
+        pair = report['paired'].get(name)
+        if pair is None:
+            versus = 'baseline'
+            record = ''
+        else:
+            versus = '%+.3f (%+.3f, %+.3f)' % (pair['meanDiff'],
+                                               pair['ci95'][0],
+                                               pair['ci95'][1])
+            record = '%d/%d/%d' % (pair['better'], pair['worse'],
+                                   pair['ties'])
+        lines.append('%-20s %7.3f %6.1f %5d %5d  %-28s %s%s' % (
+            name, summary['mean'], summary['winPct'] * 100, summary['worst'],
+            summary['best'], versus, record,
+            ' (cached)' if report['cached'][name] else ''))
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    strategies = AI.strategyClasses()
+    parser = argparse.ArgumentParser(description='Quordle strategy tournament')
+    parser.add_argument('--games', type=int, default=500)
+    parser.add_argument('--boards', type=int, default=4)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--goal', type=int, help='guesses that still win')
+    parser.add_argument('--strategies', nargs='+', default=sorted(strategies),
+                        choices=sorted(strategies))
+    parser.add_argument('--baseline', help='strategy to pair the others with')
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--no-cache', action='store_true',
+                        help='replay every strategy')
+    parser.add_argument('--out', help='also save the report to a JSON file')
+    parser.add_argument('--compare', nargs=2, metavar='STRATEGY',
+                        choices=sorted(strategies),
+                        help='play two strategies until their difference is '
+                        'settled (--games is then the most to play)')
+    parser.add_argument('--margin', type=float, default=0.02,
+                        help='mean difference that counts as none')
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        nameA, nameB = args.compare
+        paired, verdict = CompareUntilSettled(
+            strategies[nameA], strategies[nameB], args.boards, args.seed,
+            args.margin, maxGames=args.games, workers=args.workers)
+        low, high = paired.interval(aggregate.Z_SEQUENTIAL)
+        print('%s vs %s after %d games: %s' % (nameA, nameB, paired.games,
+                                                verdict))
+        print('mean difference %+.3f (%+.3f, %+.3f), better/worse/tie '
+              '%d/%d/%d' % (paired.mean, low, high, paired.better,
+                            paired.worse, paired.ties))
+        return 0
+
+    report = RunTournament([strategies[name] for name in args.strategies],
+                           args.games, args.boards, args.seed, args.baseline,
+                           args.workers,
+                           None if args.no_cache else patterns.CACHE_DIR,
+                           goal=args.goal)
+    print(FormatReport(report))
+    if args.out:
+        with open(args.out, 'w') as outFile:
+            json.dump(report, outFile, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,269 @@
+import hashlib
+from collections.abc import Sequence
+
+import patterns
+import filters
+
+# The shared word store. A WordTable holds a word list once per process:
+# the clean words, their letters packed as 5 byte codes (a = 0 .. z = 25) per
+# word, and an index from word to position. It never changes after it is
+# built, so every game and every board can point at the same one. Pools are
+# small Pool views over a table: a bitset of the words still possible and an
+# optional shared Ranking saying which order to hand them out in.
+
+
+# CLASS: WORDTABLE
+# an immutable word list. works like a read only list of strings (len,
+# indexing, iteration, in, index) so it can be passed anywhere a list of
+# answers used to go.
+# ARGS:
+# words - the words, newlines are stripped
+class WordTable:
+    __slots__ = ('words', 'letters', 'positions', '_masks', '_digest')
+
+    def __init__(self, words):
+        clean = tuple(patterns.cleanWord(w) for w in words)
+        positions = {}
+        for i, word in enumerate(clean):
+            positions.setdefault(word, i)
+        object.__setattr__(self, 'words', clean)
+        object.__setattr__(self, 'letters', bytes(
+            ord(letter) - ord('a') for word in clean for letter in word))
+        object.__setattr__(self, 'positions', positions)
+        object.__setattr__(self, '_masks', None)
+        object.__setattr__(self, '_digest', None)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('WordTable is read only')
+
+    # pickled as its words, so it can be sent to spawned worker processes
+    # (the masks and digest are built again on the other side).
+    def __reduce__(self):
+        return (WordTable, (self.words,))
+
+    def __len__(self):
+        return len(self.words)
+
+    def __getitem__(self, i):
+        return self.words[i]
+
+    def __iter__(self):
+        return iter(self.words)
+
+    def __contains__(self, word):
+        return self.find(word) is not None
+
+    # position of word in the table, or None if it is not in it.
+    def find(self, word):
+        i = self.positions.get(word)
+        if i is None:
+            i = self.positions.get(patterns.cleanWord(word))
+        return i
+
+    # position of word in the table, ValueError if it is not in it (like
+    # list.index).
+    def index(self, word):
+        i = self.find(word)
+        if i is None:
+            raise ValueError('%r is not in the word table' % (word,))
+        return i
+
+    # a table never changes, so a copy is itself.
+    def copy(self):
+        return self
+
+    # the filters.WordMasks of this table, built on first use.
+    def masks(self):
+        if self._masks is None:
+            object.__setattr__(self, '_masks', filters.WordMasks(self.words))
+        return self._masks
+
+    # sha256 hex digest of the words, for keying files built from them.
+    def digest(self):
+        if self._digest is None:
+            object.__setattr__(self, '_digest', hashlib.sha256(
+                '\n'.join(self.words).encode('ascii')).hexdigest())
+        return self._digest
+
+
+Sequence.register(WordTable) # so random.sample and friends accept it
+
+
+# CLASS: RANKING
+# an order to hand out the words of a table in, shared by every pool sorted
+# the same way.
+# ARGS:
+# order - table positions, best first
+class Ranking:
+    __slots__ = ('order', 'rankOf')
+
+    def __init__(self, order):
+        self.order = tuple(order)
+        rankOf = [0] * len(self.order)
+        for rank, i in enumerate(self.order):
+            rankOf[i] = rank
+        self.rankOf = rankOf
+
+
+# pools up to this size are walked bit by bit instead of through the ranking.
+SMALL_POOL = 64
+
+
+# CLASS: POOL
+# the words of a table still possible on one board. supports what the AIs
+# use lists for (len, indexing, iteration, in, remove, pop, copy, sort), but
+# copying one only copies a bitset.
+# ARGS:
+# table - the WordTable
+# bits - bitset of the table positions in the pool
+# ranking - Ranking to hand the words out in, None for table order
+class Pool:
+    __slots__ = ('table', 'bits', 'ranking')
+
+    def __init__(self, table, bits, ranking=None):
+        self.table = table
+        self.bits = bits
+        self.ranking = ranking
+
+    # a pool of every word of a table, a list of words (interned as a table),
+    # or a copy of another pool.
+    @classmethod
+    def of(cls, words):
+        if isinstance(words, Pool):
+            return words.copy()
+        table = asTable(words)
+        return cls(table, (1 << len(table)) - 1)
+
+    def __len__(self):
+        return self.bits.bit_count()
+
+    def __bool__(self):
+        return self.bits != 0
+
+    # table positions of the pool's words, in pool order.
+    def indices(self):
+        found = list(filters.bitIndices(self.bits))
+        if self.ranking is not None:
+            found.sort(key=self.ranking.rankOf.__getitem__)
+        return found
+
+    def __iter__(self):
+        words = self.table.words
+        return iter([words[i] for i in self.indices()])
+
+    def __getitem__(self, k):
+        if k == 0: # the common case, the best word left
+            return self.table.words[self.first()]
+        return self.table.words[self.indices()[k]]
+
+    def __contains__(self, word):
+        i = self.table.find(word)
+        return i is not None and self.bits >> i & 1 == 1
+
+    # table position of the first word in pool order.
+    def first(self):
+        if self.bits == 0:
+            raise IndexError('pool is empty')
+        if self.ranking is None:
+            low = self.bits & -self.bits
+            return low.bit_length() - 1
+        if len(self) <= SMALL_POOL:
+            return min(filters.bitIndices(self.bits),
+                       key=self.ranking.rankOf.__getitem__)
+        for i in self.ranking.order:
+            if self.bits >> i & 1:
+                return i
+
+    # position of word within the pool order (like list.index).
+    def index(self, word):
+        i = self.table.find(word)
+        if i is None or not self.bits >> i & 1:
+            raise ValueError('%r is not in the pool' % (word,))
+        if self.ranking is None:
+            return (self.bits & ((1 << i) - 1)).bit_count()
+        rank = self.ranking.rankOf
+        return sum(1 for j in filters.bitIndices(self.bits)
+                   if rank[j] < rank[i])
+
+    def remove(self, word):
+        i = self.table.find(word)
+        if i is None or not self.bits >> i & 1:
+            raise ValueError('%r is not in the pool' % (word,))
+        self.bits ^= 1 << i
+
+    def pop(self, k=-1):
+        word = self[k]
+        self.remove(word)
+        return word
+
+    def clear(self):
+        self.bits = 0
+
+    def copy(self):
+        return Pool(self.table, self.bits, self.ranking)
+
+    # orders the pool (and every later copy of it) by key, stable like
+    # list.sort. the whole table is ranked, so copies narrowed later keep
+    # the same order.
+    def sort(self, key, reverse=False):
+        words = self.table.words
+        if self.ranking is None:
+            current = range(len(words))
+        else:
+            current = self.ranking.order
+        self.ranking = Ranking(sorted(current, key=lambda i: key(words[i]),
+                                      reverse=reverse))
+
+    # keeps only the words in the allowed bitset.
+    def narrow(self, allowed):
+        self.bits &= allowed
+
+    def __repr__(self):
+        return 'Pool(%r)' % (list(self),)
+
+
+_tables = {}
+
+# FUNCTION: ASTABLE
+# returns words as a WordTable. tables are passed through, and lists are
+# interned so the same list always gives back the same table.
+def asTable(words):
+    if isinstance(words, WordTable):
+        return words
+    if isinstance(words, Pool):
+        return words.table
+    key = tuple(patterns.cleanWord(w) for w in words)
+    table = _tables.get(key)
+    if table is None:
+        table = WordTable(key)
+        _tables[key] = table
+    return table
+
+
+# FUNCTION: LOADWORDS
+# reads a word list file into its (interned) WordTable.
+def loadWords(path):
+    return asTable(patterns.readWords(path))
+
+
+_defaultAnswers = None
+
+# FUNCTION: DEFAULTANSWERS
+# the WordTable of data/valid_answers.txt, loaded on first use. with a fresh
+# prebuilt bundle the words and their masks are read from it instead.
+def defaultAnswers():
+    global _defaultAnswers
+    if _defaultAnswers is None:
+        import bundle # imported here, bundle imports us
+        shared = bundle.sharedBundle()
+        if shared is None:
+            _defaultAnswers = loadWords(patterns.ANSWERS_PATH)
+        else:
+            table = asTable(shared.words(bundle.ANSWERS))
+            if table._masks is None:
+                found = shared.masks(len(table))
+                if found is not None:
+                    masks = filters.WordMasks.prebuilt(table.words, *found)
+                    object.__setattr__(table, '_masks', masks)
+            _defaultAnswers = table
+    return _defaultAnswers